@@ -8,6 +8,12 @@ from PIL import Image, ImageTk, ImageDraw
 USE_SHARED_DATA = "--use-shared-data" in sys.argv
 SHARED_DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WristRehab", "live_angle_data.json")
 
+# Score service shared with the GUI
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WristRehab"))
+from score_service import ScoreService
+from calibration_profiles import read_calibration
+
 # --- CONFIG ---
 WIDTH, HEIGHT = 800, 600
 ROD_Y = 20
@@ -43,107 +49,50 @@ if len(sys.argv) >= 2:
 if len(sys.argv) >= 3:
     PATIENT_NAME = sys.argv[2]
 
-# --- HIGH SCORE FILE ---
-HIGHSCORE_FILE = "Highscore_flex.json"
-def get_highscore_file_path():
-    return os.path.join(os.path.dirname(__file__), HIGHSCORE_FILE)
-
-def load_patient_data():
-    file_path = get_highscore_file_path()
-    full_data = {}
-
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as f:
-                full_data = json.load(f)
-        except:
-            full_data = {}
-
-    p_data = full_data.get(PATIENT_ID, {
-        "name": PATIENT_NAME,
-        "highscore": 0,
-        "session_highscore": 0
-    })
-    
-    return p_data.get("highscore", 0)
-# reset each session highscore for patient
-def reset_session_highscore_for_patient():
-    file_path = get_highscore_file_path()
-    full_data = {}
+# Scores live in the patient database (see WristRehab/score_service.py)
+GAME_ID = "flexion"
+SCORES = None  # opened on first use, so a missing or locked database cannot stop the game
 
-    if os.path.exists(file_path):
+# Returns the score service, or None if the patient database cannot be opened.
+def get_scores():
+    global SCORES
+    if SCORES is None:
         try:
-            with open(file_path, "r") as f:
-                full_data = json.load(f)
-        except:
-            full_data = {}
-
-    p_data = full_data.get(PATIENT_ID, {
-        "name": PATIENT_NAME,
-        "highscore": 0,
-        "session_highscore": 0
-    })
-
-    p_data["session_highscore"] = 0
-    full_data[PATIENT_ID] = p_data
+            SCORES = ScoreService()
+        except Exception as e:
+            print("Error opening score database:", e)
+    return SCORES
 
+# Returns the all-time highscore of PATIENT_ID.
+def load_patient_data():
+    scores = get_scores()
+    if scores is None:
+        return 0
     try:
-        tmp = file_path + ".tmp"
-        with open(tmp, "w") as f:
-            json.dump(full_data, f, indent=2)
-        os.replace(tmp, file_path)
-    except:
-        pass
-
-def save_score_data(current_score):
-    file_path = get_highscore_file_path()
-    full_data = {}
-
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as f:
-                full_data = json.load(f)
-        except:
-            full_data = {}
-
-    p_data = full_data.get(PATIENT_ID, {
-        "name": PATIENT_NAME,
-        "highscore": 0,
-        "session_highscore": 0
-    })
-
-    if current_score > p_data["highscore"]:
-        p_data["highscore"] = int(current_score)
-
-    if current_score > p_data["session_highscore"]:
-        p_data["session_highscore"] = int(current_score)
-
-    p_data["name"] = PATIENT_NAME
-    full_data[PATIENT_ID] = p_data
-
+        return scores.highscore(PATIENT_ID, GAME_ID)
+    except Exception as e:
+        print("Error loading highscore:", e)
+        return 0
+
+# Records one finished play of PATIENT_ID, returns the all-time highscore.
+def record_play(score, level=None, duration_s=None):
+    scores = get_scores()
+    if scores is None:
+        return max(highscore, int(score))
     try:
-        tmp = file_path + ".tmp"
-        with open(tmp, "w") as f:
-            json.dump(full_data, f, indent=2)
-        os.replace(tmp, file_path)
-    except:
-        print("Error saving highscore")
-
-    return p_data["highscore"]
+        return scores.record_play(PATIENT_ID, GAME_ID, score, duration_s=duration_s, level=level)
+    except Exception as e:
+        print("Error saving play:", e)
+        return max(highscore, int(score))
 
-reset_session_highscore_for_patient()
 highscore = load_patient_data()
 
 # --- CALIBRATION ---
 def load_calibration():
     global val_recta, val_flexion
     try:
-        game_dir = os.path.dirname(__file__)
-        main_dir = os.path.dirname(game_dir)
-        file_path = os.path.join(main_dir, "WristRehab", "calibration_data.json")
-
-        with open(file_path, "r") as f:
-            data = json.load(f)
+        # Profile given by the GUI (--calibration-profile), else calibration_data.json
+        data = read_calibration(sys.argv)
         # Use only neutral and flexion values
         val_recta = float(data.get("neutral", 450))
         val_flexion = float(data.get("flexion", 120))
@@ -243,7 +192,7 @@ class FishingGame:
 
         if len(sys.argv) >= 2:
             self.back_btn = Button(root, text="← Back to Launcher", bg="#e74c3c", fg="white",
-                                   command=lambda: root.destroy())
+                                   command=lambda: self.exit_and_save())
             self.back_btn.pack(side="right", padx=10)
         # in case we want to use keyboard controls for testing without Arduino
         root.bind("<space>", lambda e: self.toggle_sweep())
@@ -260,6 +209,8 @@ class FishingGame:
         self.stopped = False
         self.score = 0 
         self.start_time = time.time()
+        self.play_start = time.time()  # current level, None once it is recorded; start_time restarts every round
+        root.protocol("WM_DELETE_WINDOW", self.exit_and_save)
 
         global arduino
         self.arduino = arduino 
@@ -434,11 +385,17 @@ class FishingGame:
                         PotNumber = data.get('angle', 0.0)
                         Button = int(data.get('button', 1.0))
                         
+                        # Range refined by the GUI during play (see WristRehab/rom_tracker.py)
+                        rom = data.get('rom')
+                        if rom:
+                            val_recta, val_flexion = rom['neutral'], rom['flexion']
+                        
                         # Button logic (0 = pressed)
                         if Button == 0 and last_button_state != 0:
                             self.toggle_sweep()
                         
                         last_button_state = Button
+                        self.apply_angle(PotNumber)
             except:
                 pass  # Silently continue on read errors
             
@@ -463,38 +420,40 @@ class FishingGame:
                     self.toggle_sweep()
 
                 last_button_state = Button
-
-                # Angle normalization
-                cal_min = min(val_recta, val_flexion)
-                cal_max = max(val_recta, val_flexion)
-                angle = PotNumber
-                clamped = max(cal_min, min(cal_max, angle))
-                # Normalize between 0 and 1
-                if (val_flexion - val_recta) != 0:
-                    norm = (clamped - val_recta) / (val_flexion - val_recta)
-                else:
-                    norm = 0
-                
-                norm = max(0, min(1, norm))
-                # Map to rope length
-                rope = int(norm * ROPE_MAX_LEN)
-                
-                # Only flexion logic when stopped and make the movement
-                if not self.sweeping:
-
-                    # If the patient extends the rope significantly, mark that an extension happened
-                    if rope > 30:
-                        self.was_extended = True
-
-                    # Only update rope if changed significantly to avoid noise
-                    if self.was_extended:
-                        self.set_rope(rope)
+                self.apply_angle(PotNumber)
 
             except:
                 pass
 
         self.root.after(25, self.update_from_arduino)
 
+    # Maps the angle between neutral and flexion to the rope length
+    def apply_angle(self, angle):
+        # Angle normalization
+        cal_min = min(val_recta, val_flexion)
+        cal_max = max(val_recta, val_flexion)
+        clamped = max(cal_min, min(cal_max, angle))
+        # Normalize between 0 and 1
+        if (val_flexion - val_recta) != 0:
+            norm = (clamped - val_recta) / (val_flexion - val_recta)
+        else:
+            norm = 0
+        
+        norm = max(0, min(1, norm))
+        # Map to rope length
+        rope = int(norm * ROPE_MAX_LEN)
+        
+        # Only flexion logic when stopped and make the movement
+        if not self.sweeping:
+
+            # If the patient extends the rope significantly, mark that an extension happened
+            if rope > 30:
+                self.was_extended = True
+
+            # Only update rope if changed significantly to avoid noise
+            if self.was_extended:
+                self.set_rope(rope)
+
     # ---------- UPDATE LOOP ----------
     def update(self):
         self.root.after(UPDATE_MS, self.update)
@@ -523,8 +482,17 @@ class FishingGame:
         self.update_rope()
 
     # ---------- ENDING ----------
+    # records the current level once (completed or left part way), returns the highscore
+    def finish_play(self):
+        global highscore
+        if self.play_start is not None:
+            highscore = record_play(self.score, level=self.level,
+                                    duration_s=time.time() - self.play_start)
+            self.play_start = None
+        return highscore
+
     def exit_and_save(self):
-        save_score_data(self.score)
+        self.finish_play()
         self.root.destroy()
 
     def show_end_menu(self):
@@ -535,7 +503,7 @@ class FishingGame:
             self.canvas.delete(tid)
         self.temp_texts.clear()
         
-        new_high = save_score_data(self.score)
+        new_high = self.finish_play()
 
         win = Toplevel(self.root)
         win.title("Level Complete!")
@@ -552,6 +520,7 @@ class FishingGame:
         def _play_again():
             win.destroy()
             self.level += 1
+            self.play_start = time.time()
             self.sweep_speed = ROD_SWEEP_SPEED + (self.level - 1) * 1.2
             self.reset_round()
             self.rod_x = 100
@@ -12,6 +12,12 @@ import os
 USE_SHARED_DATA = "--use-shared-data" in sys.argv
 SHARED_DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WristRehab", "live_angle_data.json")
 
+# Score service shared with the GUI
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WristRehab"))
+from score_service import ScoreService
+from calibration_profiles import read_calibration
+
 # --- Calibration Globals ---
 val_flexion = 0
 val_extension = 1023
@@ -30,6 +36,7 @@ score_text = None
 menu_widgets = []
 arduino = None
 level = 1
+play_start = None  # time the current play started
 game_active = True
 lives = 3
 Total_lives_text = None
@@ -55,118 +62,49 @@ if len(sys.argv) >= 3:
 root = Tk()
 root.title("Catch the Bird")
 root.resizable(False, False)
+root.protocol("WM_DELETE_WINDOW", lambda: (finish_play(), root.destroy()))
 
 canvas = Canvas(root, width=WIDTH, height=HEIGHT)
 canvas.pack()
 
-# --- Highscore handling ---
-HIGHSCORE_FILE = "highscore_all.json"
-
+# Scores live in the patient database (see WristRehab/score_service.py)
+GAME_ID = "all"
+SCORES = None  # opened on first use, so a missing or locked database cannot stop the game
 
-def get_highscore_file_path():
-    return os.path.join(os.path.dirname(__file__), HIGHSCORE_FILE)
-
-# Load patient data from JSON
-def load_patient_data():
-    file_path = get_highscore_file_path()
-    full_data = {}
-
-    if os.path.exists(file_path):
+# Returns the score service, or None if the patient database cannot be opened.
+def get_scores():
+    global SCORES
+    if SCORES is None:
         try:
-            with open(file_path, "r") as f:
-                full_data = json.load(f)
+            SCORES = ScoreService()
         except Exception as e:
-            print("Error reading highscore file:", e)
-            full_data = {}
-
-    p_data = full_data.get(
-        PATIENT_ID,
-        {
-            "name": PATIENT_NAME,
-            "highscore": 0,
-            "session_highscore": 0,
-        },
-    )
-
-    return p_data.get("highscore", 0)
-
-# Reset session highscore at game launch
-def reset_session_highscore_for_patient():
-    file_path = get_highscore_file_path()
-    full_data = {}
-
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as f:
-                full_data = json.load(f)
-        except Exception:
-            full_data = {}
-
-    p_data = full_data.get(
-        PATIENT_ID,
-        {
-            "name": PATIENT_NAME,
-            "highscore": 0,
-            "session_highscore": 0,
-        },
-    )
-
-    p_data["session_highscore"] = 0
-    full_data[PATIENT_ID] = p_data
+            print("Error opening score database:", e)
+    return SCORES
 
+# Returns the all-time highscore of PATIENT_ID.
+def load_patient_data():
+    scores = get_scores()
+    if scores is None:
+        return 0
     try:
-        tmp_path = file_path + ".tmp"
-        with open(tmp_path, "w") as f:
-            json.dump(full_data, f, indent=2)
-        os.replace(tmp_path, file_path)
+        return scores.highscore(PATIENT_ID, GAME_ID)
     except Exception as e:
-        print("Error resetting session score:", e)
-
-# Update and save patient score data
-def save_score_data(current_score):
-    file_path = get_highscore_file_path()
-    full_data = {}
-
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as f:
-                full_data = json.load(f)
-        except Exception:
-            full_data = {}
-
-    p_data = full_data.get(
-        PATIENT_ID,
-        {
-            "name": PATIENT_NAME,
-            "highscore": 0,
-            "session_highscore": 0,
-        },
-    )
-
-    # Update all-time highscore
-    if current_score > p_data["highscore"]:
-        p_data["highscore"] = int(current_score)
-
-    # Update session highscore (track max of this session)
-    if current_score > p_data["session_highscore"]:
-        p_data["session_highscore"] = int(current_score)
-
-    p_data["name"] = PATIENT_NAME
-    full_data[PATIENT_ID] = p_data
-
+        print("Error loading highscore:", e)
+        return 0
+
+# Records one finished play of PATIENT_ID, returns the all-time highscore.
+def record_play(score, level=None, duration_s=None):
+    scores = get_scores()
+    if scores is None:
+        return max(highscore, int(score))
     try:
-        tmp_path = file_path + ".tmp"
-        with open(tmp_path, "w") as f:
-            json.dump(full_data, f, indent=2)
-        os.replace(tmp_path, file_path)
+        return scores.record_play(PATIENT_ID, GAME_ID, score, duration_s=duration_s, level=level)
     except Exception as e:
-        print("Error saving highscore:", e)
-
-    return p_data["highscore"]
+        print("Error saving play:", e)
+        return max(highscore, int(score))
 
 
 # Initialize scores
-reset_session_highscore_for_patient()
 highscore = load_patient_data()
 
 
@@ -174,13 +112,10 @@ highscore = load_patient_data()
 def load_calibration():
     global val_flexion, val_extension
     try:
-        game_dir = os.path.dirname(__file__)
-        main_dir = os.path.dirname(game_dir)
-        file_path = os.path.join(main_dir, "WristRehab", "calibration_data.json")
-        with open(file_path, "r") as f:
-            data = json.load(f)
-            val_flexion = data.get("flexion", -45)
-            val_extension = data.get("extension", 45)
+        # Profile given by the GUI (--calibration-profile), else calibration_data.json
+        data = read_calibration(sys.argv)
+        val_flexion = data.get("flexion", -45)
+        val_extension = data.get("extension", 45)
     except Exception:
         # default values, negatives are because we defined the middle of the potentiometer value as the 0.
         val_flexion = -45
@@ -347,8 +282,8 @@ def change_lives(amount):
     if lives == 0:
         game_active = False
         bar_obj.delete_basket()
+        finish_play()
         score_board("No lives left! Game Over!")
-        save_score_data(total_score)
         total_score = 0
         lives = 3
         speed_value = base_speed
@@ -367,6 +302,7 @@ def change_score(amount):
     if score == 0 and previous_score >= 0:
         game_active = False
         bar_obj.delete_basket()
+        finish_play()
         score_board("You reached 0 points again! Game Over!")
         total_score = 0
         level = 1
@@ -391,10 +327,17 @@ def on_key_press(event):
         dist = min(HEIGHT - 120, dist + 30)
         bar_obj.set_position(dist)
 
+# Records the play once when it ends (game over, or exit after a level)
+def finish_play():
+    global play_start, highscore
+    if play_start is None:
+        return
+    highscore = record_play(total_score, level=level, duration_s=time.time() - play_start)
+    play_start = None
+
 # Score board with the score and highscore display, and buttons of play again or exit
 def score_board(message="Game Over!"):
-    # Use new saving logic
-    new_hs = save_score_data(total_score)
+    new_hs = max(highscore, total_score)
 
     top = Toplevel(root)
     top.title("Game Over")
@@ -415,6 +358,7 @@ def score_board(message="Game Over!"):
         main()
 
     def _exit():
+        finish_play()
         top.destroy()
         root.destroy()
 
@@ -570,6 +514,11 @@ def update_from_arduino():
                     btn_state = data.get('button', 1.0)
                     ButtonPress = 1 if btn_state == 0 else 0
                     
+                    # Range refined by the GUI during play (see WristRehab/rom_tracker.py)
+                    rom = data.get('rom')
+                    if rom:
+                        val_flexion, val_extension = rom['flexion'], rom['extension']
+                    
                     # Normalize angle between flexion and extension
                     cal_min = min(val_flexion, val_extension)
                     cal_max = max(val_flexion, val_extension)
@@ -638,9 +587,12 @@ def update_from_arduino():
 
 
 def main():
-    global bar_obj, total_score, score, dist, Total_score_text, Level_score_text, Total_lives_text, game_active, highscore
+    global bar_obj, total_score, score, dist, Total_score_text, Level_score_text, Total_lives_text, game_active, highscore, play_start
         
     game_active = True
+    # A play runs from here until game over; levels continue it
+    if play_start is None:
+        play_start = time.time()
     score = 0
     dist = 350
     canvas.delete("all")
@@ -8,6 +8,12 @@ from PIL import Image, ImageTk, ImageDraw
 USE_SHARED_DATA = "--use-shared-data" in sys.argv
 SHARED_DATA_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WristRehab", "live_angle_data.json")
 
+# Score service shared with the GUI
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "WristRehab"))
+from score_service import ScoreService
+from calibration_profiles import read_calibration
+
 # --- CONFIG ---
 HEIGHT, WIDTH = 700, 600
 STAR_Y = 5
@@ -42,103 +48,44 @@ if len(sys.argv) >= 2:
 if len(sys.argv) >= 3:
     PATIENT_NAME = sys.argv[2]
 
-# --- Highscore handling ---
-HIGHSCORE_FILE = "highscore_extension.json"
-
-# path to highscore file
-def get_highscore_file_path():
-    return os.path.join(os.path.dirname(__file__), HIGHSCORE_FILE)
-
-# Loads the full JSON, returns the specific data for PATIENT_ID.
-def load_patient_data():
-    file_path = get_highscore_file_path()
-    full_data = {}
+# Scores live in the patient database (see WristRehab/score_service.py)
+GAME_ID = "extension"
+SCORES = None  # opened on first use, so a missing or locked database cannot stop the game
 
-    if os.path.exists(file_path):
+# Returns the score service, or None if the patient database cannot be opened.
+def get_scores():
+    global SCORES
+    if SCORES is None:
         try:
-            with open(file_path, "r") as f:
-                full_data = json.load(f)
+            SCORES = ScoreService()
         except Exception as e:
-            print("Error reading highscore file:", e)
-            full_data = {}
-
-    # Get patient entry or default
-    p_data = full_data.get(
-        PATIENT_ID,
-        {"name": PATIENT_NAME, "highscore": 0, "session_highscore": 0},
-    )
-
-    return p_data.get("highscore", 0)
-
-# Resets the session highscore for the current patient to 0 at game launch.
-def reset_session_highscore_for_patient():
-    file_path = get_highscore_file_path()
-    full_data = {}
-
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as f:
-                full_data = json.load(f)
-        except Exception:
-            full_data = {}
-
-    p_data = full_data.get(
-        PATIENT_ID,
-        {"name": PATIENT_NAME, "highscore": 0, "session_highscore": 0},
-    )
-
-    p_data["session_highscore"] = 0
-    full_data[PATIENT_ID] = p_data
+            print("Error opening score database:", e)
+    return SCORES
 
+# Returns the all-time highscore of PATIENT_ID.
+def load_patient_data():
+    scores = get_scores()
+    if scores is None:
+        return 0
     try:
-        tmp_path = file_path + ".tmp"
-        with open(tmp_path, "w") as f:
-            json.dump(full_data, f, indent=2)
-        os.replace(tmp_path, file_path)
+        return scores.highscore(PATIENT_ID, GAME_ID)
     except Exception as e:
-        print("Error resetting session score:", e)
-
-# Updates the JSON file for PATIENT_ID.
-def save_score_data(current_score):
-    file_path = get_highscore_file_path()
-    full_data = {}
-
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r") as f:
-                full_data = json.load(f)
-        except Exception:
-            full_data = {}
-
-    p_data = full_data.get(
-        PATIENT_ID,
-        {"name": PATIENT_NAME, "highscore": 0, "session_highscore": 0},
-    )
-
-    # Update all-time highscore
-    if current_score > p_data["highscore"]:
-        p_data["highscore"] = int(current_score)
-
-    # Update session highscore, we track the max score in this session
-    if current_score > p_data["session_highscore"]:
-        p_data["session_highscore"] = int(current_score)
-
-    p_data["name"] = PATIENT_NAME
-    full_data[PATIENT_ID] = p_data
-
+        print("Error loading highscore:", e)
+        return 0
+
+# Records one finished play of PATIENT_ID, returns the all-time highscore.
+def record_play(score, level=None, duration_s=None):
+    scores = get_scores()
+    if scores is None:
+        return max(highscore, int(score))
     try:
-        tmp_path = file_path + ".tmp"
-        with open(tmp_path, "w") as f:
-            json.dump(full_data, f, indent=2)
-        os.replace(tmp_path, file_path)
+        return scores.record_play(PATIENT_ID, GAME_ID, score, duration_s=duration_s, level=level)
     except Exception as e:
-        print("Error saving highscore:", e)
-
-    return p_data["highscore"]
+        print("Error saving play:", e)
+        return max(highscore, int(score))
 
 
 # Initialize scores
-reset_session_highscore_for_patient()
 highscore = load_patient_data()
 current_session_highscore = 0  # Tracked in memory
 
@@ -147,17 +94,13 @@ current_session_highscore = 0  # Tracked in memory
 def load_calibration():
     global val_recta, val_extension
     try:
-        game_dir = os.path.dirname(__file__)
-        main_dir = os.path.dirname(game_dir)
-        file_path = os.path.join(main_dir, "WristRehab", "calibration_data.json")
-        print(f"Looking for calibration at: {file_path}")
-        with open(file_path, "r") as f:
-            data = json.load(f)
-            val_recta = data.get("neutral", -40)
-            val_extension = data.get("extension", 120)
-            print(
-                f"Calibration Loaded: neutral={val_recta}, extension={val_extension}"
-            )
+        # Profile given by the GUI (--calibration-profile), else calibration_data.json
+        data = read_calibration(sys.argv)
+        val_recta = data.get("neutral", -40)
+        val_extension = data.get("extension", 120)
+        print(
+            f"Calibration Loaded: neutral={val_recta}, extension={val_extension}"
+        )
     except FileNotFoundError:
         print("Calibration file not found, using defaults.")
         val_recta = -40
@@ -273,6 +216,9 @@ class RocketGame:
 
         self.lives = 3
         self.current_score = 0
+        self.level = 1
+        self.play_start = time.time()
+        root.protocol("WM_DELETE_WINDOW", self.exit_and_save)
         self.score_text = self.canvas.create_text(
             25, 10, text="Score: 0", font=("Arial", 16), fill="white", anchor=NW
         )
@@ -520,6 +466,11 @@ class RocketGame:
 
                         self.prev_raw_angle = angle
 
+                        # Range refined by the GUI during play (see WristRehab/rom_tracker.py)
+                        rom = data.get('rom')
+                        if rom:
+                            val_recta, val_extension = rom['neutral'], rom['extension']
+
                         # Map angle -> extension_pct [0,1] using calibration data
                         cal_range = val_extension - val_recta
                         if cal_range == 0:
@@ -673,18 +624,33 @@ class RocketGame:
     def reset_game_full(self):
         self.lives = 3
         self.current_score = 0
+        self.level = 1
+        self.play_start = time.time()
         self.restart_count = 0
         self.canvas.itemconfig(self.lives_text, text=f"Lives: {self.lives}")
         self.canvas.itemconfig(self.score_text, text="Score: 0")
         self.reset_level()
 
+    def next_level(self):
+        self.level += 1
+        self.reset_level()
+
+    # records the play once when it ends (game over or exit), returns the highscore
+    def finish_play(self):
+        global highscore
+        if self.play_start is not None:
+            highscore = record_play(self.current_score, level=self.level,
+                                    duration_s=time.time() - self.play_start)
+            self.play_start = None
+        return highscore
+
     def exit_and_save(self):
-        save_score_data(self.current_score)
+        self.finish_play()
         self.root.destroy()
     # display game over menu with score and highscore
     def show_game_over_menu(self):
         global ButtonPress, extension_pct
-        new_hs = save_score_data(self.current_score)
+        new_hs = self.finish_play()
         win = Toplevel(self.root)
         win.title("Game Over")
         win.resizable(False, False)
@@ -744,7 +710,7 @@ class RocketGame:
     # display level complete menu with score and highscore
     def show_end_menu(self):
         global ButtonPress, extension_pct
-        new_hs = save_score_data(self.current_score)
+        new_hs = max(highscore, self.current_score)
         win = Toplevel(self.root)
         win.title("Level Complete!")
         win.resizable(False, False)
@@ -777,7 +743,7 @@ class RocketGame:
             bg="green",
             fg="white",
             font=("Arial", 14, "bold"),
-            command=lambda: (win.destroy(), self.reset_level()),
+            command=lambda: (win.destroy(), self.next_level()),
         ).place(x=70, y=230, width=120, height=40)
         Button(
             win,
@@ -795,7 +761,7 @@ class RocketGame:
                     self.exit_and_save()
                 elif extension_pct < 0.5:
                     win.destroy()
-                    self.reset_level()
+                    self.next_level()
             else:
                 win.after(50, poll_end_menu)
 
@@ -176,6 +176,8 @@ public:
 
 
   bool admIsEnabled() const { return adm_.enabled(); }
+  AdmParams admParams() const { return adm_.getParams(); }
+  float admThetaEq() const { return adm_.thetaEq(); }
 
   float getUserVel() const { return wUser_; }
 
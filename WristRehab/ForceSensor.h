@@ -45,6 +45,7 @@ public:
   float tauExt() const { return tauExt_; }
   float thetaTare() const { return thetaTareRad_; }
   float armLength() const { return armLengthM_; }
+  float totalMass() const { return totalMassKg_; }
 
 private:
   HX711 scale_;
@@ -101,6 +101,82 @@ void SerialParser::poll(){
     ctrl_.clearFault();
     Serial.println(F("# fault cleared"));
 
+  } else if (token.equalsIgnoreCase("get")){
+    String rest = Serial.readStringUntil('\n');
+    rest.trim();
+    if (rest.equalsIgnoreCase("state")){
+      // One frame with every live parameter; ms (uptime) going backwards means a reset
+      AdmParams p = ctrl_.admParams();
+      ForceSensor& fs = ctrl_.forceSensor();
+      Serial.print(F("# state ms=")); Serial.print(millis());
+      Serial.print(F(" adm=")); Serial.print(ctrl_.admIsEnabled() ? F("on") : F("off"));
+      Serial.print(F(" J=")); Serial.print(p.Jv, 6);
+      Serial.print(F(" B=")); Serial.print(p.Bv, 6);
+      Serial.print(F(" K=")); Serial.print(p.Kv, 6);
+      Serial.print(F(" eq=")); Serial.print(ctrl_.admThetaEq(), 6);
+      Serial.print(F(" mass=")); Serial.print(fs.totalMass(), 4);
+      Serial.print(F(" arm=")); Serial.print(fs.armLength(), 4);
+      Serial.print(F(" tareangle=")); Serial.print(fs.thetaTare(), 4);
+      Serial.print(F(" wuser=")); Serial.print(ctrl_.getUserVel(), 6);
+      Serial.print(F(" fault=")); Serial.println(ctrl_.isFault() ? 1 : 0);
+    }
+
+  } else if (token.equalsIgnoreCase("cfg")){
+    // cfg key=value ...  (keys: tare=1 mass arm tareangle J B K eq=hold adm=on|off)
+    // Everything is parsed and validated first, then applied within this poll(),
+    // so the control loop never runs with half a parameter set.
+    String rest = Serial.readStringUntil('\n');
+    rest.trim();
+    AdmParams p = ctrl_.admParams();
+    bool admChanged = false, doTare = false, doEq = false;
+    bool hasMass = false, hasArm = false, hasTareAngle = false;
+    float mass = 0.0f, arm = 0.0f, tareAngle = 0.0f;
+    int admOn = -1;
+    int count = 0;
+    String bad = "";
+
+    int start = 0;
+    while (start < (int)rest.length() && !bad.length()){
+      int end = rest.indexOf(' ', start);
+      if (end < 0) end = rest.length();
+      String kv = rest.substring(start, end);
+      start = end + 1;
+      if (!kv.length()) continue;
+      int eq = kv.indexOf('=');
+      if (eq <= 0){ bad = kv; break; }
+      String key = kv.substring(0, eq);
+      String val = kv.substring(eq + 1);
+
+      if (key.equalsIgnoreCase("J")){ p.Jv = val.toFloat(); admChanged = true; }
+      else if (key.equalsIgnoreCase("B")){ p.Bv = val.toFloat(); admChanged = true; }
+      else if (key.equalsIgnoreCase("K")){ p.Kv = val.toFloat(); admChanged = true; }
+      else if (key.equalsIgnoreCase("mass")){ mass = val.toFloat(); hasMass = true; }
+      else if (key.equalsIgnoreCase("arm")){ arm = val.toFloat(); hasArm = true; }
+      else if (key.equalsIgnoreCase("tareangle")){ tareAngle = val.toFloat(); hasTareAngle = true; }
+      else if (key.equalsIgnoreCase("tare")){ doTare = (val == "1"); }
+      else if (key.equalsIgnoreCase("eq")){ doEq = val.equalsIgnoreCase("hold"); }
+      else if (key.equalsIgnoreCase("adm")){
+        if (val.equalsIgnoreCase("on")) admOn = 1;
+        else if (val.equalsIgnoreCase("off")) admOn = 0;
+        else bad = kv;
+      }
+      else bad = kv;
+      count++;
+    }
+
+    if (bad.length()){
+      Serial.print(F("# cfg error ")); Serial.println(bad);
+    } else {
+      if (doTare) ctrl_.tareScale();
+      if (hasMass) ctrl_.setTotalMass(mass);
+      if (hasArm) ctrl_.setArmLength(arm);
+      if (hasTareAngle) ctrl_.setTareAngle(tareAngle);
+      if (admChanged) ctrl_.admSet(p.Jv, p.Bv, p.Kv);
+      if (doEq) ctrl_.admHoldEq();
+      if (admOn >= 0) ctrl_.admEnable(admOn == 1);
+      Serial.print(F("# cfg ok n=")); Serial.println(count);
+    }
+
   }
 
 
@@ -0,0 +1,114 @@
+"""
+Host-side admittance model - NumPy port of Admittance::update (Admittance.h).
+
+simulate() runs many (J, B, K) candidates at once against one recorded tau_ext
+trace: the time loop stays sequential (the filter is recursive) but every step
+updates all candidates in a single vectorized operation, so thousands of
+candidates over a minute of data take milliseconds.
+
+Note: the recorded torque was measured with the parameters that were active at
+the time, so replaying it open-loop against other parameters is a preview of the
+motion envelope, not an exact prediction.
+"""
+import math
+
+import numpy as np
+
+from firmware_config import (
+    POS_DT_S, POS_MIN_RAD, POS_MAX_RAD, W_ADM_MAX, DW_ADM_MAX, W_ADM_DEADBAND,
+)
+
+# Constants used by the MVC test to derive J, B, K from tau_ref
+MVC_J_DIVISOR = 27.9253        # tau_ref / J  [rad/s^2]
+MVC_K_DIVISOR = 1.0472         # tau_ref / K  [rad] (60 deg)
+MVC_DAMPING_RATIO = 1.0        # critical damping
+
+
+def params_from_tau_ref(tau_ref, zeta=MVC_DAMPING_RATIO):
+    """J, B, K as derived after the MVC test."""
+    J = tau_ref / MVC_J_DIVISOR
+    K = tau_ref / MVC_K_DIVISOR
+    B = 2 * zeta * math.sqrt(J * K)
+    return J, B, K
+
+
+def admittance_step(w_adm, theta, theta_eq, tau, J, B, K, dt=POS_DT_S):
+    """
+    One Admittance::update, the only host port of it (simulate() and the device
+    emulator both step through here). Works on scalars or arrays of candidates;
+    returns the new w_adm.
+    """
+    spring = K * (theta - theta_eq)
+    denom = np.maximum(J + B * dt, 1e-6)
+    w_next = (J * w_adm + (tau - spring) * dt) / denom
+    w_next = np.clip(w_next, -W_ADM_MAX, W_ADM_MAX)
+
+    # Rate limit: |dw/dt| <= DW_ADM_MAX
+    dw_max = DW_ADM_MAX * dt
+    w_next = np.clip(w_next, w_adm - dw_max, w_adm + dw_max)
+
+    # Deadband
+    return np.where(np.abs(w_next) < W_ADM_DEADBAND, 0.0, w_next)
+
+
+def resample_trace(t, x, dt=POS_DT_S):
+    """Resample a logged channel onto the admittance loop period."""
+    t = np.asarray(t, dtype=np.float64)
+    if len(t) < 2:
+        return np.asarray(x, dtype=np.float64)
+    grid = np.arange(t[0], t[-1], dt)
+    return np.interp(grid, t, x)
+
+
+def simulate(tau_ext, J, B, K, dt=POS_DT_S, theta0=0.0, theta_eq=0.0, w_user=0.0,
+             record=False):
+    """
+    Simulate M candidates against a torque trace sampled every dt.
+
+    J, B, K: scalars or arrays broadcastable to shape (M,).
+    Returns a dict with per-candidate envelopes (theta_min, theta_max, w_peak),
+    plus 'theta' and 'w' traces of shape (T, M) when record=True.
+    """
+    J, B, K = (np.asarray(v, dtype=np.float64) for v in np.broadcast_arrays(
+        np.atleast_1d(J), np.atleast_1d(B), np.atleast_1d(K)))
+    m = J.shape[0]
+    tau_ext = np.asarray(tau_ext, dtype=np.float64)
+
+    theta = np.full(m, float(theta0))
+    w = np.zeros(m)
+    theta_min = theta.copy()
+    theta_max = theta.copy()
+    w_peak = np.zeros(m)
+    if record:
+        theta_tr = np.empty((len(tau_ext), m))
+        w_tr = np.empty((len(tau_ext), m))
+
+    for k, tau in enumerate(tau_ext):
+        w = admittance_step(w, theta, theta_eq, tau, J, B, K, dt)
+
+        w_total = w + w_user
+        # Position limits (Control::update)
+        w_total[((theta >= POS_MAX_RAD) & (w_total > 0)) |
+                ((theta <= POS_MIN_RAD) & (w_total < 0))] = 0.0
+        theta += w_total * dt
+
+        np.minimum(theta_min, theta, out=theta_min)
+        np.maximum(theta_max, theta, out=theta_max)
+        np.maximum(w_peak, np.abs(w_total), out=w_peak)
+        if record:
+            theta_tr[k] = theta
+            w_tr[k] = w_total
+
+    result = {'J': J, 'B': B, 'K': K,
+              'theta_min': theta_min, 'theta_max': theta_max, 'w_peak': w_peak}
+    if record:
+        result['theta'] = theta_tr
+        result['w'] = w_tr
+    return result
+
+
+def candidate_grid(J, B, K, scales=(0.5, 0.75, 1.0, 1.5, 2.0)):
+    """All combinations of J, B, K each multiplied by every scale factor."""
+    s = np.asarray(scales, dtype=np.float64)
+    sj, sb, sk = np.meshgrid(s, s, s, indexing="ij")
+    return J * sj.ravel(), B * sb.ravel(), K * sk.ravel()
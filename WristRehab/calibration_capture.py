@@ -0,0 +1,100 @@
+"""
+Stability-gated angle capture for the calibration wizard.
+
+Instead of storing the single angle sample that happens to be current when the
+button is pressed, every angle sample goes into a window of the last
+CAPTURE_WINDOW_S seconds. The position is captured automatically once the
+window is full and its standard deviation drops below CAPTURE_STD_DEG (the wrist
+is being held still), and the value stored is the median of the window, so a
+single spike does not move it.
+
+A capture can also be required to lie at least min_distance_deg from earlier
+captures, so holding still at neutral right after that step is not taken as the
+flexion or extension end point, and on a given side of neutral, so extension
+cannot end up on the flexion side. Given a neutral, a hold is also only taken
+when it is within CAPTURE_PEAK_TOL_DEG of the furthest point (window median)
+reached on its side during the step, so a pause on the way back is not the limit.
+"""
+import numpy as np
+
+from firmware_config import LOG_PERIOD_MS
+from ring_buffer import RingBuffer
+
+CAPTURE_WINDOW_S = 1.5      # samples judged for stability
+CAPTURE_STD_DEG = 0.5       # window std dev below which the position counts as held
+CAPTURE_MIN_ROM_DEG = 5.0   # flexion / extension must be this far from earlier captures
+CAPTURE_MIN_SAMPLES = 3     # a manual capture needs at least this many samples
+CAPTURE_PEAK_TOL_DEG = 3.0  # end points must be held this close to the furthest point reached
+
+# Reasons placement() gives for not accepting a held position
+TOO_CLOSE, WRONG_SIDE, SHORT_OF_PEAK = "too close", "wrong side", "short of peak"
+
+CAPTURE_WINDOW = max(CAPTURE_MIN_SAMPLES, int(round(CAPTURE_WINDOW_S * 1000 / LOG_PERIOD_MS)))
+
+
+class StableCapture:
+    def __init__(self, window=CAPTURE_WINDOW, std_limit=CAPTURE_STD_DEG):
+        self.samples = RingBuffer(window)
+        self.std_limit = std_limit
+        self.away_from = []         # earlier captures this one must differ from
+        self.min_distance = 0.0
+        self.neutral = None
+        self.side = 0
+        self.peak = {1: 0.0, -1: 0.0}   # furthest window median reached on each side of neutral
+
+    def reset(self, away_from=(), min_distance_deg=0.0, neutral=None, side=0):
+        """
+        Start a new capture, optionally at least min_distance_deg from each of away_from.
+        neutral: angle the end point is measured from; side: +1 / -1 to require the
+        capture above / below neutral (0: either side).
+        """
+        self.samples.clear()
+        self.away_from = list(away_from)
+        self.min_distance = min_distance_deg
+        self.neutral = neutral
+        self.side = side
+        self.peak = {1: 0.0, -1: 0.0}
+
+    def add(self, theta_deg):
+        """Add one angle sample. Returns the captured value once the position is held, else None."""
+        self.samples.append(theta_deg)
+        value = self.value()
+        if value is not None and self.neutral is not None:
+            offset = value - self.neutral
+            side = 1 if offset >= 0 else -1
+            self.peak[side] = max(self.peak[side], abs(offset))
+        return value if self.stable() else None
+
+    def std(self):
+        return float(np.std(self.samples.view())) if len(self.samples) > 1 else float("inf")
+
+    def value(self):
+        """Median of the window (None if fewer than CAPTURE_MIN_SAMPLES samples)."""
+        if len(self.samples) < CAPTURE_MIN_SAMPLES:
+            return None
+        return float(np.median(self.samples.view()))
+
+    def placement(self):
+        """None if the current position may be captured, else TOO_CLOSE / WRONG_SIDE / SHORT_OF_PEAK."""
+        value = self.value()
+        if value is None or any(abs(value - v) < self.min_distance for v in self.away_from):
+            return TOO_CLOSE
+        if self.neutral is None:
+            return None
+        offset = value - self.neutral
+        if self.side and offset * self.side <= 0:
+            return WRONG_SIDE
+        if abs(offset) < self.peak[1 if offset >= 0 else -1] - CAPTURE_PEAK_TOL_DEG:
+            return SHORT_OF_PEAK
+        return None
+
+    def stable(self):
+        return self.samples.is_full() and self.std() < self.std_limit and self.placement() is None
+
+    def progress(self):
+        """0..1 for the stability indicator: window fill times how close the spread is to the limit."""
+        if not len(self.samples) or self.placement() is not None:
+            return 0.0
+        fill = len(self.samples) / self.samples.capacity
+        spread = min(1.0, self.std_limit / max(self.std(), 1e-9))
+        return fill * spread
@@ -0,0 +1,139 @@
+"""
+Calibration profiles: the wizard's neutral / flexion / extension angles, kept per
+patient and per device in the patient database.
+
+Every completed calibration is one row of the calibrations table in patients.db
+(patient, device, the three angles, time) and its row id is the profile id. When
+a patient is selected the GUI loads their newest valid profile, preferring one
+made on the connected device, and passes its id to the games as
+--calibration-profile <id>; a game started without one falls back to
+calibration_data.json, the last calibration made.
+
+The device is identified by the USB serial number of its port when the OS
+reports one, so a profile follows the device across port names.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from patient_database_sqlite import PATIENT_SQLITE_FILE
+
+CALIBRATION_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "calibration_data.json")
+PROFILE_ARG = "--calibration-profile"
+PROFILE_MIN_ROM_DEG = 5.0   # flexion and extension must be this far from neutral to be valid
+CALIBRATION_KEYS = ("neutral", "flexion", "extension")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS calibrations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT NOT NULL,
+    device TEXT,
+    neutral REAL,
+    flexion REAL,
+    extension REAL,
+    valid INTEGER NOT NULL,
+    created TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calibrations_patient_time ON calibrations(patient_id, created);
+"""
+COLUMNS = ("id", "patient_id", "device", "neutral", "flexion", "extension", "valid", "created")
+
+
+def is_valid(cal):
+    """All three angles present, with flexion and extension clear of neutral and on opposite sides."""
+    try:
+        neutral, flexion, extension = (float(cal[k]) for k in CALIBRATION_KEYS)
+    except (KeyError, TypeError, ValueError):
+        return False
+    return (abs(flexion - neutral) >= PROFILE_MIN_ROM_DEG
+            and abs(extension - neutral) >= PROFILE_MIN_ROM_DEG
+            and (flexion - neutral) * (extension - neutral) < 0)
+
+
+def device_id(port):
+    """Stable name of the device on a serial port: USB serial number if known, else the port."""
+    if not port:
+        return None
+    try:
+        import serial.tools.list_ports
+        for info in serial.tools.list_ports.comports():
+            if info.device == port and info.serial_number:
+                return f"usb:{info.serial_number}"
+    except Exception:
+        pass
+    return port
+
+
+def profile_arg(argv):
+    """Profile id given on a game's command line, or None."""
+    if PROFILE_ARG in argv:
+        i = argv.index(PROFILE_ARG)
+        if i + 1 < len(argv):
+            try:
+                return int(argv[i + 1])
+            except ValueError:
+                pass
+    return None
+
+
+class CalibrationStore:
+    def __init__(self, db_file=PATIENT_SQLITE_FILE):
+        # Written by the GUI, read by the game processes
+        self.conn = sqlite3.connect(db_file, timeout=5.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _profile(self, row):
+        return None if row is None else dict(zip(COLUMNS, row))
+
+    def save(self, p_id, cal, device=None):
+        """Store a calibration as a new profile. Returns the profile dict (with its id)."""
+        created = datetime.now().isoformat()
+        with self.conn:
+            cur = self.conn.execute(
+                "INSERT INTO calibrations (patient_id, device, neutral, flexion, extension, valid, created) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (p_id, device, cal.get("neutral"), cal.get("flexion"), cal.get("extension"),
+                 int(is_valid(cal)), created))
+        return self.get(cur.lastrowid)
+
+    def get(self, profile_id):
+        return self._profile(self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM calibrations WHERE id = ?", (profile_id,)).fetchone())
+
+    def latest(self, p_id, device=None):
+        """Newest valid profile of a patient, one made on device first (None if there is none)."""
+        return self._profile(self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM calibrations WHERE patient_id = ? AND valid "
+            "ORDER BY device IS ? DESC, created DESC, id DESC LIMIT 1", (p_id, device)).fetchone())
+
+    def profiles(self, p_id):
+        """All profiles of a patient, newest first."""
+        rows = self.conn.execute(
+            f"SELECT {', '.join(COLUMNS)} FROM calibrations WHERE patient_id = ? "
+            "ORDER BY created DESC, id DESC", (p_id,)).fetchall()
+        return [self._profile(r) for r in rows]
+
+
+def read_calibration(argv, db_file=PATIENT_SQLITE_FILE):
+    """
+    Calibration a game should use: the profile named by --calibration-profile in
+    argv, else calibration_data.json. Returns a dict with the angles present.
+    """
+    profile_id = profile_arg(argv)
+    if profile_id is not None:
+        store = CalibrationStore(db_file)
+        try:
+            profile = store.get(profile_id)
+        finally:
+            store.close()
+        if profile is not None:
+            print(f"Calibration profile {profile_id} of {profile['patient_id']} ({profile['created']})")
+            return {k: profile[k] for k in CALIBRATION_KEYS if profile[k] is not None}
+        print(f"Calibration profile {profile_id} not found, using {CALIBRATION_FILE}")
+    with open(CALIBRATION_FILE, "r") as f:
+        return json.load(f)
@@ -0,0 +1,113 @@
+"""
+Supervised serial link: reconnects with backoff when the link drops.
+
+The GUI calls tick() from its poll loop and on_line() for every received line.
+Once the link has been up, a dead worker thread (read error, USB unplugged) or
+LINK_SILENCE_S without any line counts as an outage: the worker is replaced
+after 0.5, 1, 2, 4 ... s (capped at RECONNECT_MAX_S) until a new one delivers
+data again. A ready banner that was not caused by opening the port means the
+firmware reset on its own (brown-out, watchdog) while the link stayed up.
+
+Callbacks (all on the caller's thread):
+    on_lost(reason)                 link declared dead, reconnecting
+    on_restored(outage_s, attempts) data flowing again after an outage
+    on_reset(gap_s)                 silent firmware reset on a live link
+    on_failed(reason)               the initial connect never delivered data
+"""
+import time
+
+from firmware_config import READY_BANNER
+
+RECONNECT_BACKOFF_S = 0.5  # first retry delay, doubled per failed attempt
+RECONNECT_MAX_S = 8.0      # retry delay cap
+LINK_SILENCE_S = 3.0       # telemetry runs at ~10 Hz; boot after a DTR reset takes ~2 s
+BOOT_BANNER_S = 3.0        # a banner this soon after opening the port is the DTR reset
+
+DOWN, CONNECTING, UP, RECONNECTING = "down", "connecting", "up", "reconnecting"
+
+
+class ConnectionManager:
+    def __init__(self, make_worker, on_lost, on_restored, on_reset, on_failed,
+                 silence_s=LINK_SILENCE_S, clock=time.monotonic):
+        self.make_worker = make_worker      # () -> started thread with .stop() and .is_alive()
+        self.on_lost = on_lost
+        self.on_restored = on_restored
+        self.on_reset = on_reset
+        self.on_failed = on_failed
+        self.silence_s = silence_s
+        self.clock = clock
+        self.state = DOWN
+        self.worker = None
+        self.opened_at = 0.0
+        self.last_data = 0.0
+        self.lost_at = None
+        self.attempts = 0
+        self.next_attempt = 0.0
+
+    @property
+    def up(self):
+        return self.state == UP
+
+    def start(self):
+        self.stop()
+        self.state = CONNECTING
+        self._open(self.clock())
+
+    def stop(self):
+        self._close_worker()
+        self.state = DOWN
+        self.lost_at = None
+
+    def _open(self, now):
+        self.worker = self.make_worker()
+        self.opened_at = now
+        self.last_data = now
+
+    def _close_worker(self):
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+
+    def tick(self):
+        """Detect a dead or silent link and drive the reconnect attempts."""
+        if self.state == DOWN:
+            return
+        now = self.clock()
+        w = self.worker
+        if w is None:
+            if now >= self.next_attempt:
+                self.attempts += 1
+                self._open(now)
+            return
+        silent_for = now - self.last_data
+        if w.is_alive() and silent_for < self.silence_s:
+            return
+        reason = f"no data for {silent_for:.1f} s" if w.is_alive() else "serial link closed"
+        self._close_worker()
+        if self.state == CONNECTING:
+            self.state = DOWN
+            self.on_failed(reason)
+            return
+        if self.state == UP:
+            self.state = RECONNECTING
+            self.lost_at = self.last_data
+            self.attempts = 0
+            self.on_lost(reason)
+        self.next_attempt = now + min(RECONNECT_BACKOFF_S * 2 ** self.attempts, RECONNECT_MAX_S)
+
+    def on_line(self, line):
+        """Feed every line received from the current worker."""
+        if self.state == DOWN:
+            return
+        now = self.clock()
+        gap = now - self.last_data
+        self.last_data = now
+        if self.state == CONNECTING:
+            self.state = UP
+        elif self.state == RECONNECTING and self.worker is not None:
+            self.state = UP
+            outage = now - self.lost_at
+            self.lost_at = None
+            self.on_restored(outage, self.attempts)
+        elif line == READY_BANNER and now - self.opened_at > BOOT_BANNER_S:
+            self.on_reset(gap)
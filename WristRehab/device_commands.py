@@ -0,0 +1,161 @@
+"""
+Acknowledged command pipeline to the firmware.
+
+Commands are queued from any thread and written by the serial thread, one at a
+time: SerialParser::poll flushes the input buffer after every command, so a
+second command sent before the first is answered would be lost. The next command
+goes out as soon as the '# ...' acknowledgement of the current one arrives (or it
+times out and is retried). submit() returns a concurrent.futures.Future that
+resolves to the acknowledgement line.
+"""
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from firmware_config import READY_BANNER
+
+CMD_TIMEOUT_S = 0.5      # time to wait for an acknowledgement before retrying
+CMD_RETRIES = 2          # retries after the first attempt
+CMD_GAP_S = 0.02         # spacing after commands without a reply ('w', 'vd')
+
+# Acknowledgement prefix per command token (SerialParser.cpp). None = no reply.
+ACK_PREFIXES = {
+    "w": None,
+    "vd": None,
+    "tare": "# scale tared",
+    "totalmass": "# total mass set to",
+    "tareangle": "# tare angle set to",
+    "armlength": "# arm length set to",
+    "eq": "# theta_eq updated",
+    "pwm": "# override PWM=",
+    "mode": "# override OFF",
+    "test": "# test sequence done",
+    "clearfault": "# fault cleared",
+    "cfg": "# cfg",              # '# cfg ok n=..' or '# cfg error <key=value>'
+    "get": "# state",
+}
+# 'tare' averages 20 HX711 readings; 'test' runs for ~2.1 s and must not be repeated
+TARE_TIMEOUT_S = 3.0
+COMMAND_TIMEOUTS = {"tare": TARE_TIMEOUT_S, "test": 3.0}
+COMMAND_RETRIES = {"test": 0}
+
+
+def ack_for(cmd):
+    """Acknowledgement prefix expected for a command line, or None."""
+    parts = cmd.split()
+    if not parts:
+        return None
+    token = parts[0].lower()
+    if token == "adm":
+        arg = parts[1].lower() if len(parts) > 1 else ""
+        return {"on": "# adm ON", "off": "# adm OFF"}.get(arg, "# adm set")
+    return ACK_PREFIXES.get(token)
+
+
+def wire_format(cmd):
+    """
+    Bytes to write for a command. SerialParser reads the token with
+    readStringUntil(' '), so a bare token ('tare') would only be parsed after the
+    1 s Stream timeout; a trailing space ends the token immediately.
+    """
+    cmd = cmd.strip()
+    if " " not in cmd:
+        cmd += " "
+    return (cmd + "\n").encode("utf-8")
+
+
+class PendingCommand:
+    def __init__(self, cmd, timeout, retries):
+        self.cmd = cmd
+        self.ack = ack_for(cmd)
+        self.timeout = timeout
+        self.retries = retries
+        self.attempts = 0
+        self.deadline = 0.0
+        self.future = Future()
+
+
+class CommandQueue:
+    """
+    Thread safe. Producers call submit(); the serial thread calls service() in its
+    read loop and on_line() for every received line.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = deque()
+        self._inflight = None
+
+    def submit(self, cmd, timeout=None, retries=None):
+        token = cmd.split()[0].lower() if cmd.split() else ""
+        if timeout is None:
+            timeout = COMMAND_TIMEOUTS.get(token, CMD_TIMEOUT_S)
+        if retries is None:
+            retries = COMMAND_RETRIES.get(token, CMD_RETRIES)
+        pending = PendingCommand(cmd, timeout, retries)
+        with self._lock:
+            self._queue.append(pending)
+        return pending.future
+
+    def __len__(self):
+        with self._lock:
+            return len(self._queue) + (self._inflight is not None)
+
+    def _write(self, ser, pending, now):
+        pending.attempts += 1
+        pending.deadline = now + (pending.timeout if pending.ack else CMD_GAP_S)
+        ser.write(wire_format(pending.cmd))
+
+    def service(self, ser, now=None):
+        """Write the next command if none is in flight, handle timeouts and retries."""
+        now = time.monotonic() if now is None else now
+        resolved = None
+        with self._lock:
+            inflight = self._inflight
+            if inflight is not None and now >= inflight.deadline:
+                if inflight.ack is None:
+                    self._inflight = None
+                    resolved = (inflight, None)
+                elif inflight.attempts <= inflight.retries:
+                    self._write(ser, inflight, now)
+                else:
+                    self._inflight = None
+                    resolved = (inflight, TimeoutError(
+                        f"no acknowledgement for '{inflight.cmd}' after {inflight.attempts} attempt(s)"))
+            if self._inflight is None and self._queue:
+                self._inflight = self._queue.popleft()
+                self._write(ser, self._inflight, now)
+        # Resolve outside the lock: done callbacks may submit new commands
+        if resolved:
+            pending, exc = resolved
+            if exc is None:
+                pending.future.set_result(None)
+            else:
+                pending.future.set_exception(exc)
+
+    def on_line(self, line, ser=None):
+        """Match a received line against the command in flight."""
+        with self._lock:
+            inflight = self._inflight
+            if inflight is None:
+                return
+            if line == READY_BANNER and ser is not None:
+                # The device just (re)booted and dropped the command: send it again now
+                self._write(ser, inflight, time.monotonic())
+                return
+            if inflight.ack is None or not line.startswith(inflight.ack):
+                return
+            self._inflight = None
+        inflight.future.set_result(line)
+
+    def fail_all(self, exc):
+        """Fail every queued and in-flight command (link closed)."""
+        with self._lock:
+            pending = list(self._queue)
+            if self._inflight is not None:
+                pending.insert(0, self._inflight)
+            self._queue.clear()
+            self._inflight = None
+        for p in pending:
+            if not p.future.done():
+                p.future.set_exception(exc)
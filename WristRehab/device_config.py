@@ -0,0 +1,122 @@
+"""
+Desired vs. acknowledged device configuration.
+
+DeviceConfig remembers the last parameter values the firmware acknowledged and
+turns a desired parameter set into a single 'cfg key=value ...' line containing
+only what changed. The firmware applies the whole line at once (SerialParser.cpp),
+so a reconnect or session start is one round trip instead of six commands.
+
+Keys: mass [kg], arm [m], tareangle [rad], J, B, K, adm (True/False).
+One-shot actions (always sent when requested): tare, eq hold.
+"""
+import re
+from concurrent.futures import Future
+
+from device_commands import CMD_TIMEOUT_S, TARE_TIMEOUT_S
+from firmware_config import READY_BANNER
+
+CONFIG_KEYS = ("mass", "arm", "tareangle", "J", "B", "K", "adm")
+# Decimals the firmware prints each value with, in acknowledgements and 'get state'
+READBACK_DECIMALS = {"mass": 4, "arm": 4, "tareangle": 4, "J": 6, "B": 6, "K": 6}
+
+# Acknowledgements of the single-parameter commands, so changes made with them
+# (MVC test, manual commands) keep the acknowledged state current too
+_ACK_PATTERNS = [
+    (re.compile(r"# total mass set to ([-\d.]+)"), ("mass",)),
+    (re.compile(r"# arm length set to ([-\d.]+)"), ("arm",)),
+    (re.compile(r"# tare angle set to ([-\d.]+)"), ("tareangle",)),
+    (re.compile(r"# adm set Jv=([-\d.]+) Bv=([-\d.]+) Kv=([-\d.]+)"), ("J", "B", "K")),
+]
+
+
+def format_value(key, value):
+    if key == "adm":
+        return "on" if value else "off"
+    return f"{value:.6g}"
+
+
+def same_value(key, desired, acked):
+    """
+    True if an acknowledged value already is the desired one. Acknowledged values
+    come back rounded to READBACK_DECIMALS (from a float32), so they are compared
+    within half a unit of the last printed digit, not at wire precision.
+    """
+    if key == "adm":
+        return bool(desired) == bool(acked)
+    tol = 0.5 * 10.0 ** -READBACK_DECIMALS[key]
+    return abs(float(desired) - float(acked)) <= tol * (1 + 1e-6) + 1e-7 * abs(float(desired))
+
+
+class DeviceConfig:
+    def __init__(self):
+        self.desired = {}
+        self.acked = {}
+
+    def set(self, **values):
+        for k in values:
+            if k not in CONFIG_KEYS:
+                raise KeyError(f"unknown config key '{k}'")
+        self.desired.update(values)
+
+    def invalidate(self):
+        """Forget the acknowledged state (device reset or reconnected): resend everything."""
+        self.acked.clear()
+
+    def sync(self, values):
+        """Replace the acknowledged state with values read back from the device."""
+        self.acked = dict(values)
+
+    def diff(self):
+        """Desired values that differ from the acknowledged ones (at readback precision)."""
+        return {k: v for k, v in self.desired.items()
+                if k not in self.acked or not same_value(k, v, self.acked[k])}
+
+    def command(self, changes, tare=False, eq_hold=False):
+        """cfg line for the given changes and actions, or None if there is nothing to send."""
+        parts = ["tare=1"] if tare else []
+        parts += [f"{k}={format_value(k, v)}" for k, v in changes.items() if k != "adm"]
+        if eq_hold:
+            parts.append("eq=hold")
+        # Enable/disable last, after the new parameters are in place
+        if "adm" in changes:
+            parts.append(f"adm={format_value('adm', changes['adm'])}")
+        return "cfg " + " ".join(parts) if parts else None
+
+    def apply(self, send, tare=False, eq_hold=False, **values):
+        """
+        Set desired values and send what changed with send(cmd, timeout=...) -> Future.
+        Returns a Future resolved with the acknowledgement line (None if nothing was sent).
+        """
+        self.set(**values)
+        changes = self.diff()
+        cmd = self.command(changes, tare, eq_hold)
+        if cmd is None:
+            done = Future()
+            done.set_result(None)
+            return done
+        future = send(cmd, timeout=TARE_TIMEOUT_S if tare else CMD_TIMEOUT_S)
+        if future is None:
+            raise ConnectionError("device not connected")
+
+        def _acked(f):
+            if not f.exception() and f.result().startswith("# cfg ok"):
+                self.acked.update(changes)
+        future.add_done_callback(_acked)
+        return future
+
+    def observe(self, line):
+        """Update the acknowledged state from any '# ...' line of the firmware."""
+        if line == READY_BANNER:
+            # Power-on defaults, whatever was configured before is gone
+            self.invalidate()
+        elif line.startswith("# adm ON"):
+            self.acked["adm"] = True
+        elif line.startswith("# adm OFF"):
+            self.acked["adm"] = False
+        else:
+            for pattern, keys in _ACK_PATTERNS:
+                m = pattern.match(line)
+                if m:
+                    for k, v in zip(keys, m.groups()):
+                        self.acked[k] = float(v)
+                    return
@@ -0,0 +1,318 @@
+"""
+Virtual wrist device - emulates the Arduino firmware on a pseudo-terminal.
+
+It answers the SerialParser::poll command set with the same '# ...' replies and
+streams telemetry in the Control.h column format. Point the GUI (or any pyserial
+client) at the printed /dev/pts/N path and it behaves like the real device.
+
+Usage (Linux/macOS):
+    python device_emulator.py                          # 100 Hz, synthetic sine torque
+    python device_emulator.py --rate 2000              # 2 kHz telemetry
+    python device_emulator.py --replay ../Bjarke_session004_20251205_130920.csv
+"""
+import argparse
+import errno
+import math
+import os
+import threading
+import time
+
+from admittance_model import admittance_step
+from firmware_config import (
+    READY_BANNER, POS_MIN_RAD, POS_MAX_RAD, POS_DT_S, LOG_PERIOD_MS,
+    Jv_INIT, Bv_INIT, Kv_INIT,
+    DEFAULT_TOTAL_MASS_KG, DEFAULT_TARE_ANGLE_RAD, ARM_LENGTH_M, TAU_FAULT_LIMIT,
+    TAU_DEADBAND,
+)
+from session_io import load_session_csv
+
+DEFAULT_RATE_HZ = 1000.0 / LOG_PERIOD_MS
+NEUTRAL_POT_RAD = math.pi / 2     # theta_pot = 0 deg in the firmware output
+
+
+class SyntheticPatient:
+    """Patient torque as a slow sine plus optional periodic button presses."""
+    def __init__(self, amplitude=0.3, freq_hz=0.2, button_period=0.0):
+        self.amplitude = amplitude
+        self.freq_hz = freq_hz
+        self.button_period = button_period
+
+    def torque(self, t):
+        return self.amplitude * math.sin(2.0 * math.pi * self.freq_hz * t)
+
+    def button(self, t):
+        if self.button_period <= 0:
+            return 1
+        return 0 if (t % self.button_period) < 0.2 else 1
+
+
+class WristEmulator:
+    """Firmware state + command handling. Thread safe via a single lock."""
+    def __init__(self, rate_hz=DEFAULT_RATE_HZ, patient=None, replay_csv=None):
+        self.rate_hz = float(rate_hz)
+        self.patient = patient or SyntheticPatient()
+        self.replay = None
+        if replay_csv:
+            columns, data = load_session_csv(replay_csv)
+            self.replay = {c: data[:, i] for i, c in enumerate(columns)}
+            self.replay_len = len(data)
+        self.lock = threading.Lock()
+        self.master_fd = None
+        self.slave_fd = None
+        self.port = None
+        self.stop_event = threading.Event()
+        self.reset()
+
+    # ---------- FIRMWARE STATE ----------
+    def reset(self):
+        """Equivalent of a power cycle: defaults from begin() + ready banner."""
+        with self.lock:
+            self.t0 = time.perf_counter()
+            self.w_user = 0.0
+            self.adm_enabled = True          # Admittance::begin() enables it
+            self.J, self.B, self.K = Jv_INIT, Bv_INIT, Kv_INIT
+            self.theta_eq = 0.0
+            self.w_adm = 0.0
+            self.theta_enc = 0.0
+            self.w_meas = 0.0
+            self.tau_ext = 0.0
+            self.tau_offset = 0.0
+            self.total_mass = DEFAULT_TOTAL_MASS_KG
+            self.tare_angle = DEFAULT_TARE_ANGLE_RAD
+            self.arm_length = ARM_LENGTH_M
+            self.fault = False
+            self.next_adm_t = 0.0
+            self.replay_idx = 0
+        self.println(READY_BANNER)
+
+    def step(self, t):
+        """Advance the plant to time t (seconds since reset) at the admittance rate."""
+        while self.next_adm_t <= t:
+            dt = POS_DT_S
+            self.next_adm_t += dt
+            tau = self.patient.torque(self.next_adm_t) - self.tau_offset
+            if abs(tau) < TAU_DEADBAND:
+                tau = 0.0
+            self.tau_ext = tau
+            if self.fault:
+                self.w_meas = 0.0
+                continue
+            self.w_adm = float(admittance_step(self.w_adm, self.theta_enc, self.theta_eq, tau,
+                                               self.J, self.B, self.K, dt))
+            w_total = self.w_user + (self.w_adm if self.adm_enabled else 0.0)
+            if (self.theta_enc >= POS_MAX_RAD and w_total > 0) or \
+               (self.theta_enc <= POS_MIN_RAD and w_total < 0):
+                w_total = 0.0
+            self.theta_enc += w_total * dt
+            self.w_meas = w_total
+            if abs(tau) > TAU_FAULT_LIMIT:
+                self.fault = True
+
+    def telemetry_line(self, t):
+        if self.replay is not None:
+            i = self.replay_idx % self.replay_len
+            self.replay_idx += 1
+            r = self.replay
+            theta_pot = r["theta_pot"][i]
+            button = int(r["button_state"][i])
+            theta_pot_rad = r["theta_pot_rad"][i]
+            w_meas = r["w_meas"][i]
+            tau = r["tau_ext"][i]
+        else:
+            self.step(t)
+            theta_pot_rad = NEUTRAL_POT_RAD + self.theta_enc
+            theta_pot = math.degrees(theta_pot_rad) - 90.0
+            button = self.patient.button(t)
+            w_meas = self.w_meas
+            tau = self.tau_ext
+        # Same precision as the Serial.print calls in Control.h
+        return (f"{theta_pot:.2f},{button},{theta_pot_rad:.2f},"
+                f"{self.w_user:.6f},{w_meas:.6f},{tau:.5f}")
+
+    # ---------- COMMANDS (SerialParser::poll) ----------
+    def handle_command(self, line):
+        line = line.strip()
+        if not line:
+            return
+        token, _, rest = line.partition(" ")
+        token = token.lower()
+        rest = rest.strip()
+        with self.lock:
+            if token == "w":
+                self.w_user = _to_float(rest)
+            elif token == "vd":
+                self.w_user = math.radians(_to_float(rest))
+            elif token == "tare":
+                self.tau_offset = self.patient.torque(time.perf_counter() - self.t0)
+                self.println("# scale tared")
+            elif token == "totalmass":
+                self.total_mass = _to_float(rest)
+                self.println(f"# total mass set to {self.total_mass:.4f} kg")
+            elif token == "tareangle":
+                self.tare_angle = _to_float(rest)
+                self.println(f"# tare angle set to {self.tare_angle:.4f} rad")
+            elif token == "armlength":
+                self.arm_length = _to_float(rest)
+                self.println(f"# arm length set to {self.arm_length:.4f} m")
+            elif token == "adm":
+                if rest.lower() == "on":
+                    self.adm_enabled = True
+                    self.println("# adm ON")
+                elif rest.lower() == "off":
+                    self.adm_enabled = False
+                    self.w_adm = 0.0
+                    self.println("# adm OFF")
+                else:
+                    vals = rest.split()
+                    if len(vals) >= 3:
+                        self.J, self.B, self.K = (_to_float(v) for v in vals[:3])
+                        self.println(f"# adm set Jv={self.J:.6f} Bv={self.B:.6f} Kv={self.K:.6f}")
+            elif token == "eq":
+                if rest.lower() == "hold":
+                    self.theta_eq = self.theta_enc
+                    self.println("# theta_eq updated")
+            elif token == "pwm":
+                vals = rest.split()
+                pwm = _to_float(vals[0]) if vals else 0.0
+                ms = int(_to_float(vals[1])) if len(vals) > 1 else 0
+                tail = f" for {ms} ms" if ms > 0 else " indefinitely"
+                self.println(f"# override PWM={pwm:.2f}{tail}")
+            elif token == "mode":
+                if rest.lower() == "pid":
+                    self.println("# override OFF (PID mode)")
+            elif token == "test":
+                self.println("# test sequence done")
+            elif token == "clearfault":
+                self.fault = False
+                self.println("# fault cleared")
+            elif token == "cfg":
+                self._cfg(rest)
+            elif token == "get":
+                if rest.lower() == "state":
+                    ms = int((time.perf_counter() - self.t0) * 1000)
+                    self.println(f"# state ms={ms} adm={'on' if self.adm_enabled else 'off'} "
+                                 f"J={self.J:.6f} B={self.B:.6f} K={self.K:.6f} "
+                                 f"eq={self.theta_eq:.6f} mass={self.total_mass:.4f} "
+                                 f"arm={self.arm_length:.4f} tareangle={self.tare_angle:.4f} "
+                                 f"wuser={self.w_user:.6f} fault={int(self.fault)}")
+
+    def _cfg(self, rest):
+        # Same validate-then-apply order as the firmware 'cfg' command
+        values = {}
+        for kv in rest.split():
+            key, sep, val = kv.partition("=")
+            key = key.lower()
+            if not sep or not key or key not in ("j", "b", "k", "mass", "arm", "tareangle",
+                                                 "tare", "eq", "adm"):
+                self.println(f"# cfg error {kv}")
+                return
+            if key == "adm" and val.lower() not in ("on", "off"):
+                self.println(f"# cfg error {kv}")
+                return
+            values[key] = val
+        if values.get("tare") == "1":
+            self.tau_offset = self.patient.torque(time.perf_counter() - self.t0)
+        if "mass" in values:
+            self.total_mass = _to_float(values["mass"])
+        if "arm" in values:
+            self.arm_length = _to_float(values["arm"])
+        if "tareangle" in values:
+            self.tare_angle = _to_float(values["tareangle"])
+        self.J = _to_float(values["j"]) if "j" in values else self.J
+        self.B = _to_float(values["b"]) if "b" in values else self.B
+        self.K = _to_float(values["k"]) if "k" in values else self.K
+        if values.get("eq", "").lower() == "hold":
+            self.theta_eq = self.theta_enc
+        if "adm" in values:
+            self.adm_enabled = values["adm"].lower() == "on"
+            if not self.adm_enabled:
+                self.w_adm = 0.0
+        self.println(f"# cfg ok n={len(rest.split())}")
+
+    # ---------- PTY I/O ----------
+    def open_pty(self):
+        import tty
+        self.master_fd, self.slave_fd = os.openpty()
+        tty.setraw(self.slave_fd)
+        os.set_blocking(self.master_fd, False)
+        self.port = os.ttyname(self.slave_fd)
+        return self.port
+
+    def println(self, s):
+        if self.master_fd is None:
+            return
+        try:
+            os.write(self.master_fd, (s + "\r\n").encode("utf-8"))
+        except (BlockingIOError, OSError):
+            pass  # nobody reading: drop, like a full USB buffer
+
+    def _read_commands(self, buf):
+        try:
+            chunk = os.read(self.master_fd, 1024)
+        except BlockingIOError:
+            return buf
+        except OSError as e:
+            if e.errno == errno.EIO:
+                return buf
+            raise
+        buf += chunk
+        while b"\n" in buf:
+            line, buf = buf.split(b"\n", 1)
+            self.handle_command(line.decode("utf-8", errors="ignore"))
+        return buf
+
+    def serve_forever(self):
+        """Stream telemetry at rate_hz and answer commands until stop() is called."""
+        period = 1.0 / self.rate_hz
+        next_t = time.perf_counter()
+        buf = b""
+        while not self.stop_event.is_set():
+            buf = self._read_commands(buf)
+            now = time.perf_counter()
+            if now < next_t:
+                time.sleep(min(next_t - now, 0.001))
+                continue
+            with self.lock:
+                lines = []
+                # Catch up in one write if we fell behind (high rates)
+                while next_t <= now:
+                    lines.append(self.telemetry_line(next_t - self.t0))
+                    next_t += period
+            self.println("\r\n".join(lines))
+
+    def stop(self):
+        self.stop_event.set()
+
+
+def _to_float(s):
+    # Arduino parseFloat() returns 0 on garbage instead of raising
+    try:
+        return float(s.split()[0])
+    except (ValueError, IndexError):
+        return 0.0
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Emulate the wrist rehab device on a pseudo-terminal.")
+    ap.add_argument("--rate", type=float, default=DEFAULT_RATE_HZ, help="telemetry rate in Hz")
+    ap.add_argument("--replay", help="session CSV to stream instead of synthetic motion")
+    ap.add_argument("--amplitude", type=float, default=0.3, help="synthetic patient torque [Nm]")
+    ap.add_argument("--freq", type=float, default=0.2, help="synthetic torque frequency [Hz]")
+    ap.add_argument("--button-period", type=float, default=0.0,
+                    help="press the button every N seconds (0 = never)")
+    args = ap.parse_args(argv)
+
+    emu = WristEmulator(args.rate,
+                        SyntheticPatient(args.amplitude, args.freq, args.button_period),
+                        replay_csv=args.replay)
+    port = emu.open_pty()
+    print(f"Wrist emulator on {port} @ {args.rate:g} Hz (Ctrl+C to stop)")
+    emu.reset()
+    try:
+        emu.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Host-side mirror of the live firmware parameters, refreshed by 'get state'.
+
+The firmware answers 'get state' with one frame:
+    # state ms=123456 adm=on J=0.017900 B=0.184920 K=0.477460 eq=0.000000
+            mass=0.4920 arm=0.0900 tareangle=1.5400 wuser=0.000000 fault=0
+The mirror keeps the last frame and notices when the device was reset without the
+host noticing (uptime going backwards, or the ready banner) or when the torque
+fault latched.
+"""
+import time
+
+from device_config import CONFIG_KEYS
+
+RESET, FAULT_LATCHED, FAULT_CLEARED = "reset", "fault_latched", "fault_cleared"
+
+
+def parse_state_line(line):
+    """'# state k=v ...' -> dict with ms as int, adm/fault as bool, the rest as float."""
+    state = {}
+    for kv in line[len("# state"):].split():
+        key, sep, val = kv.partition("=")
+        if not sep:
+            continue
+        try:
+            if key == "ms":
+                state[key] = int(val)
+            elif key == "adm":
+                state[key] = val.lower() == "on"
+            elif key == "fault":
+                state[key] = val == "1"
+            else:
+                state[key] = float(val)
+        except ValueError:
+            continue
+    return state
+
+
+class DeviceStateMirror:
+    def __init__(self):
+        self.state = {}
+        self.updated_at = None      # host time of the last frame
+        self.resets = 0
+
+    def clear(self):
+        self.state = {}
+        self.updated_at = None
+
+    @property
+    def valid(self):
+        return bool(self.state)
+
+    @property
+    def fault(self):
+        return self.state.get("fault", False)
+
+    def on_banner(self):
+        """The firmware printed its ready banner: it has just (re)booted."""
+        had_state = self.valid
+        self.clear()
+        if had_state:
+            self.resets += 1
+            return {RESET}
+        return set()
+
+    def update(self, line):
+        """Apply a '# state' frame. Returns the set of events it revealed."""
+        new = parse_state_line(line)
+        if "ms" not in new:
+            return set()
+        events = set()
+        old = self.state
+        if old and new["ms"] < old.get("ms", 0):
+            self.resets += 1
+            events.add(RESET)
+        if new.get("fault") and not old.get("fault"):
+            events.add(FAULT_LATCHED)
+        elif old.get("fault") and not new.get("fault"):
+            events.add(FAULT_CLEARED)
+        self.state = new
+        self.updated_at = time.time()
+        return events
+
+    def config_values(self):
+        """The subset of the state that DeviceConfig manages."""
+        return {k: self.state[k] for k in CONFIG_KEYS if k in self.state}
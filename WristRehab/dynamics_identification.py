@@ -0,0 +1,147 @@
+"""
+Batch identification of the dynamics a patient actually felt.
+
+For each session the model
+    tau_ext = J * dw/dt + B * w_meas + K * theta + c
+is fitted by least squares in sliding windows (c absorbs the equilibrium offset).
+All windows of a session are solved together: per-sample normal-equation terms are
+cumulatively summed, window sums are differences of the cumsum, and the 4x4
+systems are solved in one batched np.linalg.solve call.
+
+Sessions are processed in parallel on a process pool; the per-session medians are
+written to the patient database next to the commanded J/B/K as 'identified_dynamics'.
+
+Usage:  python dynamics_identification.py [--window 4] [--hop 1] [--dry-run]
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from patient_database import open_patient_database
+from session_io import device_time, find_session_files, parse_session_filename, session_columns
+
+ID_WINDOW_S = 4.0          # window length [s]
+ID_HOP_S = 1.0             # window step [s]
+ID_MIN_W_STD = 0.05        # windows with less velocity excitation are skipped [rad/s]
+ID_MIN_R2 = 0.3            # windows that explain less variance are skipped
+ID_RIDGE = 1e-9            # keeps near-singular windows solvable
+
+
+def identify_windows(t, tau, w, theta, window_s=ID_WINDOW_S, hop_s=ID_HOP_S):
+    """
+    Fit J, B, K, c per window.
+    Returns a dict of arrays (one entry per window): t, J, B, K, c, r2, w_std, valid.
+    """
+    t = device_time(t)
+    if len(t) < 3 or t[-1] <= t[0]:
+        return None
+    dt = t[1] - t[0]
+    tau, w, theta = (np.asarray(x, dtype=np.float64) for x in (tau, w, theta))
+    n = len(tau)
+    win = max(4, int(round(window_s / dt)))
+    hop = max(1, int(round(hop_s / dt)))
+    if n < win:
+        return None
+
+    alpha = np.gradient(w, dt)
+    X = np.column_stack((alpha, w, theta, np.ones(n)))          # (n, 4)
+
+    # Per-sample terms of X^T X, X^T y and y^T y, then window sums via cumsum
+    xx = np.einsum("ni,nj->nij", X, X)
+    xy = X * tau[:, None]
+    yy = tau * tau
+    cxx = np.concatenate((np.zeros((1, 4, 4)), np.cumsum(xx, axis=0)))
+    cxy = np.concatenate((np.zeros((1, 4)), np.cumsum(xy, axis=0)))
+    cyy = np.concatenate(([0.0], np.cumsum(yy)))
+    cy = np.concatenate(([0.0], np.cumsum(tau)))
+    cw = np.concatenate(([0.0], np.cumsum(w)))
+    cww = np.concatenate(([0.0], np.cumsum(w * w)))
+
+    starts = np.arange(0, n - win + 1, hop)
+    ends = starts + win
+    A = cxx[ends] - cxx[starts]
+    b = cxy[ends] - cxy[starts]
+    A = A + ID_RIDGE * np.eye(4)
+    theta_hat = np.linalg.solve(A, b[..., None])[..., 0]        # (nwin, 4)
+
+    # Goodness of fit from the same sums: SSE = y'y - 2 th'X'y + th'X'X th
+    syy = cyy[ends] - cyy[starts]
+    sy = cy[ends] - cy[starts]
+    sse = (syy - 2 * np.einsum("ki,ki->k", theta_hat, b)
+           + np.einsum("ki,kij,kj->k", theta_hat, A, theta_hat))
+    sst = syy - sy * sy / win
+    r2 = np.where(sst > 0, 1.0 - sse / np.where(sst > 0, sst, 1.0), 0.0)
+
+    w_mean = (cw[ends] - cw[starts]) / win
+    w_std = np.sqrt(np.maximum((cww[ends] - cww[starts]) / win - w_mean ** 2, 0.0))
+
+    valid = (w_std >= ID_MIN_W_STD) & (r2 >= ID_MIN_R2)
+    return {
+        't': t[0] + (starts + win / 2) * dt,
+        'J': theta_hat[:, 0], 'B': theta_hat[:, 1], 'K': theta_hat[:, 2], 'c': theta_hat[:, 3],
+        'r2': r2, 'w_std': w_std, 'valid': valid,
+    }
+
+
+def identify_session(csv_path, window_s=ID_WINDOW_S, hop_s=ID_HOP_S):
+    """Summary for one session (picklable, runs in a worker process)."""
+    t, tau, w, theta = session_columns(csv_path, ["timestamp", "tau_ext", "w_meas", "theta_pot_rad"])
+    res = identify_windows(t, tau, w, theta, window_s, hop_s)
+    summary = {'file': os.path.basename(csv_path), 'window_s': window_s, 'hop_s': hop_s,
+               'windows': 0, 'valid_windows': 0}
+    if res is None:
+        return summary
+    v = res['valid']
+    summary['windows'] = int(len(v))
+    summary['valid_windows'] = int(v.sum())
+    if v.any():
+        for k in ('J', 'B', 'K'):
+            summary[k] = float(np.median(res[k][v]))
+            summary[f"{k}_iqr"] = float(np.subtract(*np.percentile(res[k][v], [75, 25])))
+        summary['r2_median'] = float(np.median(res['r2'][v]))
+    return summary
+
+
+def run_corpus(paths=None, db_file=None, window_s=ID_WINDOW_S, hop_s=ID_HOP_S,
+               workers=None, dry_run=False):
+    """Identify every session on a process pool and store the results in the patient DB."""
+    paths = paths or find_session_files()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(identify_session, paths,
+                                [window_s] * len(paths), [hop_s] * len(paths)))
+
+    db = None if dry_run else open_patient_database(db_file)
+    for path, summary in zip(paths, results):
+        name, num = parse_session_filename(path)
+        p_id = name.lower()
+        line = f"{summary['file']}: {summary['valid_windows']}/{summary['windows']} windows"
+        if 'J' in summary:
+            line += f", J={summary['J']:.4f} B={summary['B']:.4f} K={summary['K']:.4f}"
+        print(line)
+        if db is None:
+            continue
+        patient = db.get_patient(p_id)
+        if not patient or not (1 <= num <= len(patient['sessions'])):
+            print(f"  no session {num} for patient '{p_id}' in the database - not stored")
+            continue
+        # Sessions are numbered from 1 in the CSV name (see RehabGUI.run_mvc)
+        db.update_session(p_id, num - 1, {'identified_dynamics': summary})
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Identify effective J, B, K from session logs.")
+    ap.add_argument("csv", nargs="*", help="session CSVs (default: all sessions in the project root)")
+    ap.add_argument("--window", type=float, default=ID_WINDOW_S, help="window length [s]")
+    ap.add_argument("--hop", type=float, default=ID_HOP_S, help="window step [s]")
+    ap.add_argument("--workers", type=int, default=None, help="process pool size")
+    ap.add_argument("--dry-run", action="store_true", help="print results without writing the DB")
+    args = ap.parse_args(argv)
+    run_corpus(args.csv or None, window_s=args.window, hop_s=args.hop,
+               workers=args.workers, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Predicts the firmware torque fault before it latches.
+
+The firmware latches a fault as soon as |tau_ext| > TAU_FAULT_LIMIT (Control.h) and
+stays latched until 'clearfault'. A constant-velocity Kalman filter tracks tau_ext
+and its rate from the telemetry stream; when the torque extrapolated over a short
+horizon crosses a fraction of the limit the GUI can warn the therapist or soften
+the admittance parameters before the session is interrupted.
+"""
+import numpy as np
+
+from firmware_config import TAU_FAULT_LIMIT, LOG_PERIOD_MS
+
+FAULT_WARN_FRACTION = 0.8       # warn when the predicted |tau| reaches this part of the limit
+FAULT_CLEAR_FRACTION = 0.6      # ... and clear the warning again below this part
+FAULT_HORIZON_S = 0.25          # prediction horizon [s]
+FAULT_ACCEL_NOISE = 2.0         # process noise: std of the torque acceleration [Nm/s^2]
+FAULT_MEAS_NOISE = 0.02         # measurement noise: std of tau_ext [Nm]
+SOFTEN_FACTOR = 0.7             # J, B, K multiplier applied by auto-soften
+SOFTEN_COOLDOWN_S = 5.0         # minimum time between two auto-soften steps
+
+
+class TorqueKalman:
+    """Constant-velocity Kalman filter on tau_ext with state [tau, dtau/dt]."""
+    def __init__(self, dt=LOG_PERIOD_MS / 1000.0, accel_noise=FAULT_ACCEL_NOISE,
+                 meas_noise=FAULT_MEAS_NOISE):
+        self.dt = dt
+        self.F = np.array([[1.0, dt], [0.0, 1.0]])
+        g = np.array([[0.5 * dt * dt], [dt]])
+        self.Q = g @ g.T * accel_noise ** 2
+        self.R = meas_noise ** 2
+        self.reset()
+
+    def reset(self):
+        self.x = np.zeros(2)
+        self.P = np.eye(2)
+        self.initialized = False
+
+    def update(self, tau):
+        if not self.initialized:
+            self.x[:] = (tau, 0.0)
+            self.initialized = True
+            return self.x
+        # Predict
+        self.x = self.F @ self.x
+        self.P = self.F @ self.P @ self.F.T + self.Q
+        # Correct (H = [1, 0])
+        s = self.P[0, 0] + self.R
+        k = self.P[:, 0] / s
+        self.x = self.x + k * (tau - self.x[0])
+        self.P = self.P - np.outer(k, self.P[0, :])
+        return self.x
+
+    def predict(self, horizon):
+        """Torque extrapolated `horizon` seconds ahead."""
+        return self.x[0] + self.x[1] * horizon
+
+
+class FaultPredictor:
+    """
+    Feed one tau_ext sample per telemetry line (the firmware prints at a fixed
+    period, so dt is constant). update() returns "warn" when the predicted torque
+    enters the warning zone, "clear" when it leaves it again, otherwise None.
+    """
+    def __init__(self, limit=TAU_FAULT_LIMIT, horizon=FAULT_HORIZON_S,
+                 warn_fraction=FAULT_WARN_FRACTION, clear_fraction=FAULT_CLEAR_FRACTION,
+                 dt=LOG_PERIOD_MS / 1000.0):
+        self.limit = limit
+        self.horizon = horizon
+        self.warn_level = warn_fraction * limit
+        self.clear_level = clear_fraction * limit
+        self.kf = TorqueKalman(dt)
+        self.warning = False
+        self.tau_pred = 0.0
+        self.warnings = 0
+
+    def reset(self):
+        self.kf.reset()
+        self.warning = False
+        self.tau_pred = 0.0
+
+    def time_to_limit(self):
+        """Seconds until |tau| reaches the limit at the current rate (inf if moving away)."""
+        tau, rate = self.kf.x
+        if tau * rate <= 0:
+            return float("inf")
+        return max(0.0, (self.limit - abs(tau)) / abs(rate))
+
+    def update(self, tau):
+        self.kf.update(tau)
+        # Never predict below the measured value: a falling rate must not hide a high torque
+        self.tau_pred = max(abs(self.kf.predict(self.horizon)), abs(tau))
+        if not self.warning and self.tau_pred >= self.warn_level:
+            self.warning = True
+            self.warnings += 1
+            return "warn"
+        if self.warning and self.tau_pred < self.clear_level:
+            self.warning = False
+            return "clear"
+        return None
+
+
+def softened(J, B, K, factor=SOFTEN_FACTOR, floor=None):
+    """
+    Softer admittance parameters: the patient needs less torque for the same motion.
+    floor: (J, B, K) minimum; a parameter is never softened below it (nor raised to it).
+    """
+    params = (J * factor, B * factor, K * factor)
+    if floor is None:
+        return params
+    return tuple(min(old, max(new, low)) for old, new, low in zip((J, B, K), params, floor))
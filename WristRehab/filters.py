@@ -0,0 +1,233 @@
+"""
+Host-side port of the firmware filter chain (Utils.h, Encoder.h, ForceSensor.h).
+
+Every filter runs in float32 with the same operation order as the C++ code, so
+feeding it the same input gives the same bits as the device (assuming the
+compiler does not contract a*b+c into FMA instructions). The recursive filters
+loop over time but update all candidate parameter sets in one vectorized step:
+x has shape (T,) and the coefficients shape (M,), the output is (T, M).
+
+compare_sessions() re-filters a logged channel with every candidate across all
+session CSVs on a process pool and reports the latency / noise tradeoff.
+
+Usage:  python filters.py --cutoff 0.05 0.1 0.2 --alpha 1 0.5 [--column tau_ext]
+"""
+import argparse
+import math
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from firmware_config import (
+    BUTTER_B0, BUTTER_B1, BUTTER_B2, BUTTER_A1, BUTTER_A2,
+    W_MED_WIN, FORCE_EMA_ALPHA, OMEGA_EMA_ALPHA, TAU_DEADBAND, TORQUE_SIGN, ARM_LENGTH_M,
+)
+from session_io import device_time, find_session_files, session_columns
+
+F32 = np.float32
+FIRMWARE_BUTTER = (BUTTER_B0, BUTTER_B1, BUTTER_B2, BUTTER_A1, BUTTER_A2)
+FIRMWARE_CUTOFF_RATIO = 0.1     # fc / fs the config.h coefficients were designed for
+MAX_LAG_S = 2.0                 # search range of the cross-correlation lag
+
+
+# ---------- COEFFICIENTS ----------
+def butter_coefficients(cutoff_ratio):
+    """
+    2nd-order Butterworth low-pass (bilinear transform) for fc/fs = cutoff_ratio.
+    Accepts a scalar or an array and returns an array of shape (M, 5): b0, b1, b2, a1, a2.
+    """
+    r = np.atleast_1d(np.asarray(cutoff_ratio, dtype=np.float64))
+    k = np.tan(np.pi * r)
+    norm = 1.0 / (1.0 + math.sqrt(2.0) * k + k * k)
+    b0 = k * k * norm
+    a1 = 2.0 * (k * k - 1.0) * norm
+    a2 = (1.0 - math.sqrt(2.0) * k + k * k) * norm
+    return np.column_stack((b0, 2.0 * b0, b0, a1, a2))
+
+
+def butter_dc_delay(coeffs):
+    """Group delay at DC in samples for each coefficient set (M, 5)."""
+    c = np.atleast_2d(np.asarray(coeffs, dtype=np.float64))
+    b, a1, a2 = c[:, :3], c[:, 3], c[:, 4]
+    num = (b[:, 1] + 2.0 * b[:, 2]) / b.sum(axis=1)
+    den = (a1 + 2.0 * a2) / (1.0 + a1 + a2)
+    return num - den
+
+
+# ---------- FILTERS ----------
+def _as_columns(x, m):
+    """x as float32 of shape (T, M): 1-D input is shared by all M candidates."""
+    x = np.asarray(x, dtype=F32)
+    if x.ndim == 1:
+        x = np.broadcast_to(x[:, None], (len(x), m))
+    return x
+
+
+def butter_lp2(x, coeffs=FIRMWARE_BUTTER):
+    """ButterworthLP2::update over a signal, state starting at 0 as after begin()."""
+    c = np.atleast_2d(np.asarray(coeffs, dtype=F32))
+    b0, b1, b2, a1, a2 = (c[:, i] for i in range(5))
+    x = _as_columns(x, len(b0))
+    y = np.empty(x.shape, dtype=F32)
+    x1 = np.zeros(len(b0), dtype=F32)
+    x2 = np.zeros_like(x1)
+    y1 = np.zeros_like(x1)
+    y2 = np.zeros_like(x1)
+    for k in range(len(x)):
+        xk = x[k]
+        # b0 * x + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2, evaluated left to right
+        yk = b0 * xk + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+        x2 = x1
+        x1 = xk
+        y2 = y1
+        y1 = yk
+        y[k] = yk
+    return y
+
+
+def ema(x, alpha, init=0.0):
+    """emaStep over a signal for one or more alphas (shape (M,))."""
+    alpha = np.atleast_1d(np.asarray(alpha, dtype=F32))
+    x = _as_columns(x, len(alpha))
+    y = np.empty(x.shape, dtype=F32)
+    prev = np.full(len(alpha), init, dtype=F32)
+    for k in range(len(x)):
+        prev = prev + alpha * (x[k] - prev)
+        y[k] = prev
+    return y
+
+
+def median_window(x, n=W_MED_WIN):
+    """
+    Encoder::median_ over a signal, including the start-up behaviour where only
+    the samples received so far are used. Even counts average the middle pair.
+    """
+    x = np.asarray(x, dtype=F32)
+    out = np.empty_like(x)
+    if n <= 1 or len(x) == 0:
+        out[:] = x
+        return out
+
+    def med(win):
+        s = np.sort(win, axis=-1)
+        m = s.shape[-1]
+        if m & 1:
+            return s[..., m >> 1]
+        return F32(0.5) * (s[..., (m >> 1) - 1] + s[..., m >> 1])
+
+    head = min(n - 1, len(x))
+    for k in range(head):
+        out[k] = med(x[:k + 1])
+    if len(x) >= n:
+        out[n - 1:] = med(np.lib.stride_tricks.sliding_window_view(x, n))
+    return out
+
+
+def deadband(x, threshold=TAU_DEADBAND):
+    """fabs(x) < threshold -> 0. The literal is a double, so the compare is too."""
+    x = np.asarray(x, dtype=F32)
+    return np.where(np.abs(x.astype(np.float64)) < threshold, F32(0.0), x)
+
+
+# ---------- FIRMWARE CHAINS ----------
+def force_to_tau(f_ext, coeffs=FIRMWARE_BUTTER, arm_length=ARM_LENGTH_M,
+                 threshold=TAU_DEADBAND):
+    """ForceSensor::updateAndGetTau from the gravity-compensated force F_ext [N]."""
+    filtered = butter_lp2(f_ext, coeffs)
+    tau = F32(TORQUE_SIGN) * filtered * F32(arm_length)
+    return deadband(tau, threshold)
+
+
+def omega_filter(w_inst, n=W_MED_WIN, alpha=OMEGA_EMA_ALPHA):
+    """Encoder::updateSpeed from the instantaneous speeds wInst [rad/s]."""
+    if n == 1:
+        return _as_columns(w_inst, np.size(alpha))
+    return ema(median_window(w_inst, n), alpha)
+
+
+# ---------- CANDIDATE COMPARISON ----------
+def filter_candidates(x, coeffs, alphas, n=W_MED_WIN):
+    """Median (shared) -> Butterworth -> EMA for M candidates. Returns (T, M)."""
+    return ema(butter_lp2(median_window(x, n), coeffs), alphas)
+
+
+def tradeoff_metrics(x, y, dt, max_lag_s=MAX_LAG_S):
+    """
+    Per candidate:
+      lag_s       delay that best aligns the output with the input (cross-correlation)
+      noise_ratio std of the sample-to-sample change, output / input (1 = no smoothing)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    xc = x - x.mean()
+    yc = y - y.mean(axis=0)
+    max_lag = max(1, min(int(max_lag_s / dt), len(x) // 2))
+    lags = np.arange(max_lag + 1)
+    corr = np.stack([xc[:len(xc) - l] @ yc[l:] for l in lags])      # (L, M)
+    lag_s = lags[np.argmax(corr, axis=0)] * dt
+
+    dx = np.std(np.diff(x))
+    noise = np.std(np.diff(y, axis=0), axis=0) / dx if dx > 0 else np.ones(y.shape[1])
+    return lag_s, noise
+
+
+def compare_session(csv_path, coeffs, alphas, column="tau_ext", n=W_MED_WIN):
+    """Metrics of every candidate on one session (runs in a worker process)."""
+    t, x = session_columns(csv_path, ["timestamp", column])
+    if len(t) < 4:
+        return None
+    t = device_time(t)
+    dt = t[1] - t[0]
+    y = filter_candidates(x, coeffs, alphas, n)
+    lag_s, noise = tradeoff_metrics(x, y, dt)
+    return {'file': csv_path, 'dt': dt, 'lag_s': lag_s, 'noise_ratio': noise}
+
+
+def compare_sessions(paths, coeffs, alphas, column="tau_ext", n=W_MED_WIN, workers=None):
+    """compare_session over many CSVs on a process pool. Failed sessions are skipped."""
+    m = len(paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(compare_session, paths, [coeffs] * m, [alphas] * m,
+                           [column] * m, [n] * m)
+        return [r for r in results if r is not None]
+
+
+def candidate_set(cutoff_ratios, alphas):
+    """Cross product of Butterworth cutoffs (fc/fs) and EMA alphas -> labels, coeffs, alphas."""
+    r, a = np.meshgrid(np.asarray(cutoff_ratios, dtype=np.float64),
+                       np.asarray(alphas, dtype=np.float64), indexing="ij")
+    r, a = r.ravel(), a.ravel()
+    labels = [f"fc/fs={ri:g} alpha={ai:g}" for ri, ai in zip(r, a)]
+    return labels, butter_coefficients(r), a
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Re-filter session logs with candidate filter settings.")
+    ap.add_argument("csv", nargs="*", help="session CSVs (default: all sessions in the project root)")
+    ap.add_argument("--column", default="tau_ext", help="logged channel to re-filter")
+    ap.add_argument("--cutoff", type=float, nargs="+", default=[FIRMWARE_CUTOFF_RATIO],
+                    help="Butterworth cutoff as a fraction of the sample rate")
+    ap.add_argument("--alpha", type=float, nargs="+", default=[FORCE_EMA_ALPHA], help="EMA alphas")
+    ap.add_argument("--median", type=int, default=1, help="median window length")
+    ap.add_argument("--workers", type=int, default=None, help="process pool size")
+    args = ap.parse_args(argv)
+
+    labels, coeffs, alphas = candidate_set(args.cutoff, args.alpha)
+    results = compare_sessions(args.csv or find_session_files(), coeffs, alphas,
+                               args.column, args.median, args.workers)
+    if not results:
+        print("No sessions to compare.")
+        return
+    lag = np.stack([r['lag_s'] for r in results])
+    noise = np.stack([r['noise_ratio'] for r in results])
+    delay = butter_dc_delay(coeffs)
+
+    print(f"{len(results)} sessions, column '{args.column}', median window {args.median}")
+    print(f"{'candidate':<28}{'dc delay [smp]':>15}{'lag [s]':>10}{'noise':>8}")
+    for i, label in enumerate(labels):
+        print(f"{label:<28}{delay[i]:>15.2f}{np.median(lag[:, i]):>10.3f}"
+              f"{np.median(noise[:, i]):>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
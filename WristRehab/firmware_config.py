@@ -0,0 +1,59 @@
+"""
+Python mirror of the firmware constants in config.h / Control.h.
+Keep in sync when the firmware changes - host-side models (emulator, filters,
+admittance simulation, fault prediction) read their defaults from here.
+"""
+import math
+
+# ----------------- Serial -----------------
+FIRMWARE_BAUD = 460800
+READY_BANNER = "# wrist controller ready"
+
+# ----------------- Position clamps (encoder space) -----------------
+POS_MIN_RAD = -1.0
+POS_MAX_RAD = 1.0
+
+# ----------------- Geometry -----------------
+ARM_LENGTH_M = 0.09
+TORQUE_SIGN = -1.0
+DEFAULT_TOTAL_MASS_KG = 0.072 + 0.420   # ForceSensor::begin()
+DEFAULT_TARE_ANGLE_RAD = 1.54
+
+# ----------------- Potentiometer -----------------
+THETA_MIN_RAD = math.radians(0.0)
+THETA_MAX_RAD = math.radians(270.0)
+POT_OFFSET_RAD = -2.0300 + 1.57
+
+# ----------------- Filters & timing -----------------
+W_MED_WIN = 3
+FORCE_EMA_ALPHA = 1.0
+OMEGA_EMA_ALPHA = 1.0
+TAU_DEADBAND = 0.02        # ForceSensor: |tau_ext| below this is reported as 0
+
+BUTTER_B0 = 0.0675
+BUTTER_B1 = 0.1349
+BUTTER_B2 = 0.0675
+BUTTER_A1 = -1.1430
+BUTTER_A2 = 0.4128
+
+# ----------------- Loop rates -----------------
+LOOP_HZ = 1000.0
+POS_DT_US = 10000          # admittance update period (~100 Hz)
+POS_DT_S = POS_DT_US * 1e-6
+LOG_PERIOD_MS = 100
+
+# ----------------- Admittance limits -----------------
+W_ADM_MAX = 6.0
+DW_ADM_MAX = 30.0
+W_ADM_DEADBAND = 0.05      # Admittance::update: |w| below this is snapped to 0
+
+Jv_INIT = 0.01790
+Bv_INIT = 0.18492
+Kv_INIT = 0.47746
+
+# Control.h shadows config.h's TAU_FAULT_LIMIT (50.3) with a local 5.0 Nm limit;
+# 5.0 is the value that actually latches the fault.
+TAU_FAULT_LIMIT = 5.0
+
+# ----------------- Telemetry -----------------
+TELEMETRY_COLS = ["theta_pot", "button_state", "theta_pot_rad", "wUser_", "w_meas", "tau_ext"]
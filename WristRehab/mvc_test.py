@@ -0,0 +1,206 @@
+"""
+MVC (maximum voluntary contraction) test as an event-driven state machine.
+
+Nothing here blocks: every wait is a scheduled callback (Tk's root.after in the
+GUI) and torque samples arrive through on_sample() from the normal telemetry
+pipeline, so the UI stays responsive and every sample is still logged.
+
+    IDLE -> PREPARE (adm off) -> HOLD (eq hold) -> RECORD -> REST -> RECORD ... -> DONE
+                       \\--------------------- abort() ---------------------/-> ABORTED
+
+Each trial is scored by its best MVC_PLATEAU_S moving average (after a 3-sample
+median to drop single-sample spikes), trials that disagree with the others are
+rejected by a median absolute deviation test and the MVC is the best remaining
+trial.
+"""
+import time
+
+import numpy as np
+
+MVC_DURATION_S = 5.0        # recording window per trial
+MVC_TRIALS = 3              # default number of trials
+MVC_REST_S = 5.0            # default rest between trials
+MVC_PLATEAU_S = 0.5         # moving-average window used to score a trial
+MVC_MAD_K = 3.0             # reject trials further than this many scaled MADs from the median
+MVC_ADM_OFF_MS = 500        # settle time after 'adm off'
+MVC_EQ_HOLD_MS = 200        # settle time after 'eq hold'
+MVC_TICK_MS = 100           # countdown / live peak update period
+MVC_BUFFER_HZ = 2000        # trial buffer is sized for telemetry up to this rate
+
+IDLE, PREPARE, HOLD, RECORD, REST, DONE, ABORTED = (
+    "idle", "prepare", "hold", "record", "rest", "done", "aborted")
+
+
+# ---------- SCORING ----------
+def score_trials(trials, durations, plateau_s=MVC_PLATEAU_S):
+    """
+    Score all trials at once.
+    trials: list of 1-D tau_ext arrays, durations: recording time of each [s].
+    Returns (peak, plateau) arrays: the largest sample and the best moving average.
+    """
+    n = len(trials)
+    lengths = np.array([len(t) for t in trials])
+    width = max(3, int(lengths.max())) if n else 3
+    data = np.full((n, width), np.nan)
+    for i, t in enumerate(trials):
+        data[i, :len(t)] = t
+
+    # 3-sample median (edges keep the raw value), NaN past the end of each trial
+    med = data.copy()
+    if width >= 3:
+        win = np.lib.stride_tricks.sliding_window_view(data, 3, axis=1)
+        m = np.median(win, axis=2)
+        med[:, 1:-1] = np.where(np.isnan(m), data[:, 1:-1], m)
+
+    # Moving average over the plateau window, sized from each trial's sample rate
+    rates = lengths / np.maximum(np.asarray(durations, dtype=np.float64), 1e-9)
+    k = np.clip(np.round(plateau_s * rates).astype(int), 1, np.maximum(lengths, 1))
+    csum = np.concatenate((np.zeros((n, 1)), np.cumsum(np.nan_to_num(med), axis=1)), axis=1)
+    idx = np.arange(width + 1)
+    ends = idx[None, :]                                       # window [end-k, end)
+    starts = ends - k[:, None]
+    valid = (starts >= 0) & (ends <= lengths[:, None])
+    sums = np.take_along_axis(csum, np.clip(ends, 0, width), axis=1) - \
+        np.take_along_axis(csum, np.clip(starts, 0, width), axis=1)
+    means = np.where(valid, sums / k[:, None], -np.inf)
+
+    plateau = means.max(axis=1)
+    plateau[lengths == 0] = 0.0
+    peak = np.where(lengths > 0, np.nanmax(np.where(np.isnan(data), -np.inf, data), axis=1), 0.0)
+    return peak, plateau
+
+
+def reject_outliers(values, k=MVC_MAD_K):
+    """Boolean mask of values kept by a median absolute deviation test."""
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 3:
+        return np.ones(len(values), dtype=bool)
+    med = np.median(values)
+    mad = 1.4826 * np.median(np.abs(values - med))
+    if mad <= 0:
+        return np.ones(len(values), dtype=bool)
+    return np.abs(values - med) <= k * mad
+
+
+# ---------- STATE MACHINE ----------
+class MvcTest:
+    """
+    schedule(ms, fn) -> id and cancel(id) are the timer functions (root.after / after_cancel).
+    send(cmd) writes a device command.
+    on_progress(state, trial, remaining_s, peak) is called every tick while recording or resting.
+    on_done(tau_max, trials) is called once after the last trial; trials is a list of
+    dicts (one per trial) suitable for storing with the session.
+    """
+    def __init__(self, schedule, cancel, send, on_progress=None, on_done=None,
+                 duration_s=MVC_DURATION_S, trials=MVC_TRIALS, rest_s=MVC_REST_S):
+        self.schedule = schedule
+        self.cancel = cancel
+        self.send = send
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.duration_s = duration_s
+        self.n_trials = max(1, int(trials))
+        self.rest_s = rest_s
+        self.state = IDLE
+        self.trial = 0
+        self.tau_max = 0.0
+        self.results = []
+        self.t_end = 0.0
+        self._pending = None
+        # One preallocated buffer reused by every trial
+        self._buf = np.empty(int(MVC_BUFFER_HZ * duration_s) + 1)
+        self._n = 0
+        self._t_start = 0.0
+        self._trials = []
+        self._durations = []
+
+    @property
+    def running(self):
+        return self.state in (PREPARE, HOLD, RECORD, REST)
+
+    def _after(self, ms, fn):
+        self._pending = self.schedule(ms, fn)
+
+    # ---------- STATES ----------
+    def start(self):
+        if self.running:
+            return
+        self.trial = 0
+        self.tau_max = 0.0
+        self.results = []
+        self._trials = []
+        self._durations = []
+        self.state = PREPARE
+        self.send("adm off")
+        self._after(MVC_ADM_OFF_MS, self._hold)
+
+    def _hold(self):
+        self.state = HOLD
+        self.send("eq hold")
+        self._after(MVC_EQ_HOLD_MS, self._record)
+
+    def _record(self):
+        self.state = RECORD
+        self.trial += 1
+        self._n = 0
+        self._t_start = time.monotonic()
+        self.t_end = self._t_start + self.duration_s
+        self._tick()
+
+    def _rest(self):
+        self.state = REST
+        self.t_end = time.monotonic() + self.rest_s
+        self._tick()
+
+    def _tick(self):
+        remaining = self.t_end - time.monotonic()
+        if remaining <= 0:
+            if self.state == RECORD:
+                self._end_trial()
+            else:
+                self._record()
+            return
+        if self.on_progress:
+            peak = float(self._buf[:self._n].max()) if self._n and self.state == RECORD else 0.0
+            self.on_progress(self.state, self.trial, remaining, peak)
+        self._after(MVC_TICK_MS, self._tick)
+
+    def _end_trial(self):
+        self._trials.append(self._buf[:self._n].copy())
+        self._durations.append(time.monotonic() - self._t_start)
+        if self.trial < self.n_trials:
+            self._rest()
+        else:
+            self._finish()
+
+    def _finish(self):
+        self._pending = None
+        peak, plateau = score_trials(self._trials, self._durations)
+        keep = reject_outliers(plateau)
+        self.tau_max = float(plateau[keep].max()) if keep.any() else 0.0
+        self.results = [{'trial': i + 1,
+                         'samples': int(len(t)),
+                         'duration_s': round(float(d), 3),
+                         'peak': float(peak[i]),
+                         'plateau': float(plateau[i]),
+                         'rejected': bool(not keep[i])}
+                        for i, (t, d) in enumerate(zip(self._trials, self._durations))]
+        self.state = DONE
+        if self.on_done:
+            self.on_done(self.tau_max, self.results)
+
+    def abort(self):
+        if not self.running:
+            return
+        if self._pending is not None:
+            self.cancel(self._pending)
+            self._pending = None
+        self.state = ABORTED
+
+    # ---------- TELEMETRY ----------
+    def on_sample(self, vals):
+        """Telemetry subscriber: vals is one parsed line in COLS order."""
+        if self.state != RECORD or self._n >= len(self._buf):
+            return
+        self._buf[self._n] = vals[5]
+        self._n += 1
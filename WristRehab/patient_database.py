@@ -0,0 +1,210 @@
+"""
+Patient database stored in a json file (patients_db.json in the project root).
+
+Changes are not written by rewriting the file: every mutation appends one small
+operation to patients_db.json.journal (json lines) and the full file is rebuilt
+in the background every COMPACT_EVERY operations. On load the snapshot is read
+and the journal replayed on top of it. Operations carry absolute indices and
+values, so replaying one twice gives the same result, and a torn last line (crash
+while appending) is ignored: a crash can lose at most the operation being written.
+
+open_patient_database() picks the backend from the file name: *.json uses this
+class, anything else the SQLite store in patient_database_sqlite.py.
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+PATIENT_DB_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "patients_db.json")
+COMPACT_EVERY = 100  # journal operations between snapshot rebuilds
+
+
+class PatientDatabase:
+    def __init__(self, db_file=PATIENT_DB_FILE, read_only=False):
+        """read_only: load snapshot + journal into memory only; no file is created or changed."""
+        self.db_file = db_file
+        self.read_only = read_only
+        self.journal_file = db_file + ".journal"
+        # Journal being folded into the snapshot by a running compaction
+        self.compacting_file = db_file + ".journal.compacting"
+        self._lock = threading.Lock()
+        self._compactor = None
+        print(f"[DEBUG] Loading database from: {os.path.abspath(self.db_file)}")
+        self.patients = self._load_db()
+        replayed = self._replay(self.compacting_file) + self._replay(self.journal_file)
+        print(f"[DEBUG] Loaded {len(self.patients)} patients: {list(self.patients.keys())}")
+        self._ops = replayed
+        if read_only:
+            self._journal = None
+            return
+        self._journal = open(self.journal_file, 'a')
+        if replayed:
+            # Also moves a torn last line out of the way before anything is appended to it
+            self.compact()
+
+    def _load_db(self):
+        if os.path.exists(self.db_file):
+            try:
+                with open(self.db_file, 'r') as f:
+                    data = json.load(f)
+                    print(f"[DEBUG] Successfully loaded database with {len(data)} patients")
+                    return data
+            except Exception as e:
+                print(f"[ERROR] Failed to load database: {e}")
+                return {}
+        else:
+            print(f"[WARNING] Database file not found: {self.db_file}")
+        return {}
+
+    # ---------- JOURNAL ----------
+    def _replay(self, path):
+        """Apply the operations of a journal file. Returns its line count (torn ones included)."""
+        if not os.path.exists(path):
+            return 0
+        n = 0
+        with open(path, 'r') as f:
+            for line in f:
+                n += 1
+                try:
+                    op = json.loads(line)
+                except ValueError:
+                    print(f"[WARNING] Ignoring torn journal entry in {path}")
+                    continue
+                self._apply(op)
+        return n
+
+    def _apply(self, op):
+        kind, p_id = op['op'], op['id']
+        if kind == 'add_patient':
+            self.patients[p_id] = op['patient']
+            return
+        p = self.patients.get(p_id)
+        if p is None:
+            return
+        if kind == 'update_patient':
+            p.update(op['fields'])
+        elif kind == 'new_session':
+            del p['sessions'][op['index']:]
+            p['sessions'].append(op['session'])
+        elif kind == 'update_session' and 0 <= op['index'] < len(p['sessions']):
+            p['sessions'][op['index']].update(op['fields'])
+
+    def _log(self, **op):
+        """Apply an operation and append it to the journal."""
+        if self.read_only:
+            raise IOError(f"{self.db_file} is opened read-only")
+        with self._lock:
+            line = json.dumps(op)
+            self._apply(json.loads(line))  # memory gets its own copy, equal to the journal's
+            self._journal.write(line + "\n")
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._ops += 1
+        if self._ops >= COMPACT_EVERY:
+            self.compact()
+
+    def compact(self, wait=False):
+        """Rebuild the snapshot from memory in a background thread and drop the folded journal."""
+        if self.read_only:
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            if wait:
+                self._compactor.join()
+            return
+        with self._lock:
+            if os.path.exists(self.compacting_file):
+                # A previous compaction died: keep its operations in the journal
+                self._journal.close()
+                with open(self.compacting_file, 'r') as f:
+                    folded = f.read()
+                with open(self.journal_file, 'r') as f:
+                    folded += f.read()
+                with open(self.compacting_file, 'w') as f:
+                    f.write(folded)
+            else:
+                self._journal.close()
+                os.replace(self.journal_file, self.compacting_file)
+            self._journal = open(self.journal_file, 'w')
+            self._ops = 0
+            snapshot = json.dumps(self.patients, indent=2)
+        self._compactor = threading.Thread(target=self._write_snapshot, args=(snapshot,), daemon=True)
+        self._compactor.start()
+        if wait:
+            self._compactor.join()
+
+    def _write_snapshot(self, snapshot):
+        tmp = self.db_file + ".tmp"
+        try:
+            with open(tmp, 'w') as f:
+                f.write(snapshot)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.db_file)
+            os.remove(self.compacting_file)
+        except OSError as e:
+            print(f"[ERROR] Database compaction failed: {e}")
+
+    def close(self):
+        """Fold the journal into the snapshot and close it."""
+        if self.read_only:
+            return
+        if self._ops or os.path.exists(self.compacting_file):
+            self.compact(wait=True)
+        elif self._compactor is not None:
+            self._compactor.join()
+        self._journal.close()
+
+    # ---------- API ----------
+    def add_patient(self, name, weight, difficulty):
+        p_id = name.lower().replace(' ', '_')
+        self._log(op='add_patient', id=p_id, patient={
+            'name': name,
+            'weight': weight,
+            'difficulty': difficulty,
+            'created': datetime.now().isoformat(),
+            'sessions': []
+        })
+        return p_id
+
+    def get_patient(self, p_id):
+        return self.patients.get(p_id)
+
+    def get_all_patients(self):
+        return self.patients
+
+    def get_patient_index(self):
+        """p_id -> patient fields and 'session_count' (same as the SQLite store)."""
+        return {p_id: dict({k: v for k, v in p.items() if k != 'sessions'},
+                           session_count=len(p['sessions']))
+                for p_id, p in self.patients.items()}
+
+    def session_count(self, p_id):
+        return len(self.patients[p_id]['sessions']) if p_id in self.patients else 0
+
+    def update_patient(self, p_id, **kwargs):
+        if p_id in self.patients:
+            self._log(op='update_patient', id=p_id, fields=kwargs)
+
+    def create_new_session(self, p_id, initial_data):
+        if p_id in self.patients:
+            self._log(op='new_session', id=p_id, index=len(self.patients[p_id]['sessions']),
+                      session=initial_data)
+
+    def update_active_session(self, p_id, update_data):
+        if p_id in self.patients and self.patients[p_id]['sessions']:
+            self.update_session(p_id, len(self.patients[p_id]['sessions']) - 1, update_data)
+
+    def update_session(self, p_id, index, update_data):
+        """Update fields of a specific (0-based) session of a patient."""
+        if p_id in self.patients and 0 <= index < len(self.patients[p_id]['sessions']):
+            self._log(op='update_session', id=p_id, index=index, fields=update_data)
+
+
+def open_patient_database(db_file=None):
+    """Patient database for db_file (default: patients.db, imported from patients_db.json once)."""
+    from patient_database_sqlite import SqlitePatientDatabase, PATIENT_SQLITE_FILE
+    if db_file and db_file.endswith(".json"):
+        return PatientDatabase(db_file)
+    return SqlitePatientDatabase(db_file or PATIENT_SQLITE_FILE, import_from=PATIENT_DB_FILE)
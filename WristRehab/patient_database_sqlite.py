@@ -0,0 +1,239 @@
+"""
+Patient database stored in SQLite (patients.db in the project root).
+
+Same API as the json PatientDatabase, but every call touches only the rows it
+changes instead of rewriting the whole file. Patient fields beyond name, weight,
+difficulty and created, and the session records themselves, are stored as json
+so the free-form session dicts written by the GUI and the tools keep working.
+
+Session lists are only read when a patient is opened: get_patient_index() lists
+patients with their session counts for the patient page, and the session lists of
+the last SESSION_CACHE_SIZE patients opened are kept in an LRU cache.
+
+The database runs in WAL mode, so the games and analysis tools can read it while
+the GUI writes. On first use an existing patients_db.json is imported once (the
+json file is left in place as a backup).
+
+Usage:  python patient_database_sqlite.py [--import patients_db.json] [--db patients.db]
+"""
+import argparse
+import copy
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+from datetime import datetime
+
+PATIENT_SQLITE_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   "patients.db")
+
+PATIENT_COLUMNS = ("name", "weight", "difficulty", "created")
+SESSION_CACHE_SIZE = 8     # patients whose session lists are kept in memory
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS patients (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    weight REAL,
+    difficulty REAL,
+    created TEXT,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT NOT NULL REFERENCES patients(id) ON DELETE CASCADE,
+    idx INTEGER NOT NULL,
+    timestamp TEXT,
+    data TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS sessions_patient_idx ON sessions(patient_id, idx);
+CREATE INDEX IF NOT EXISTS sessions_patient_time ON sessions(patient_id, timestamp);
+CREATE INDEX IF NOT EXISTS sessions_time ON sessions(timestamp);
+"""
+
+
+class SqlitePatientDatabase:
+    def __init__(self, db_file=PATIENT_SQLITE_FILE, import_from=None):
+        self.db_file = db_file
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._sessions = OrderedDict()   # p_id -> session list, least recently used first
+        if import_from and os.path.exists(import_from) and not self._count("patients"):
+            n = self.import_json(import_from)
+            print(f"[INFO] Imported {n} patients from {import_from}")
+
+    def close(self):
+        self.conn.close()
+
+    def _count(self, table):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    # ---------- IMPORT ----------
+    def import_json(self, json_file):
+        """Copy every patient and session of a patients_db.json file. Returns the patient count."""
+        from patient_database import PatientDatabase
+        # Snapshot + journal, replayed in memory without opening the journal for writing
+        patients = PatientDatabase(json_file, read_only=True).get_all_patients()
+        with self.conn:
+            for p_id, p in patients.items():
+                self._insert_patient(p_id, p)
+                self.conn.executemany(
+                    "INSERT INTO sessions (patient_id, idx, timestamp, data) VALUES (?, ?, ?, ?)",
+                    [(p_id, i, s.get('timestamp'), json.dumps(s))
+                     for i, s in enumerate(p.get('sessions', []))])
+        return len(patients)
+
+    def _insert_patient(self, p_id, p):
+        extra = {k: v for k, v in p.items() if k not in PATIENT_COLUMNS and k != 'sessions'}
+        self.conn.execute(
+            "INSERT OR REPLACE INTO patients (id, name, weight, difficulty, created, extra) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (p_id, p.get('name'), p.get('weight'), p.get('difficulty'), p.get('created'),
+             json.dumps(extra)))
+
+    # ---------- READ ----------
+    def _patient_dict(self, row, sessions):
+        p_id, name, weight, difficulty, created, extra = row
+        p = {'name': name, 'weight': weight, 'difficulty': difficulty, 'created': created}
+        p.update(json.loads(extra))
+        p['sessions'] = sessions
+        return p
+
+    def get_sessions(self, p_id, since=None, until=None):
+        """Session records of a patient in order, optionally limited to a timestamp range."""
+        sql = "SELECT data FROM sessions WHERE patient_id = ?"
+        args = [p_id]
+        if since is not None:
+            sql += " AND timestamp >= ?"
+            args.append(since)
+        if until is not None:
+            sql += " AND timestamp < ?"
+            args.append(until)
+        rows = self.conn.execute(sql + " ORDER BY idx", args).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def _cached_sessions(self, p_id):
+        sessions = self._sessions.get(p_id)
+        if sessions is None:
+            sessions = self._sessions[p_id] = self.get_sessions(p_id)
+            if len(self._sessions) > SESSION_CACHE_SIZE:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(p_id)
+        return sessions
+
+    def session_count(self, p_id):
+        return self.conn.execute("SELECT COUNT(*) FROM sessions WHERE patient_id = ?",
+                                 (p_id,)).fetchone()[0]
+
+    def get_patient(self, p_id):
+        row = self.conn.execute("SELECT * FROM patients WHERE id = ?", (p_id,)).fetchone()
+        if row is None:
+            return None
+        # Copies: callers may edit the result, the cached sessions must not change with it
+        return self._patient_dict(row, copy.deepcopy(self._cached_sessions(p_id)))
+
+    def get_patient_index(self):
+        """p_id -> patient fields and 'session_count', without loading any session."""
+        rows = self.conn.execute(
+            "SELECT p.*, (SELECT COUNT(*) FROM sessions s WHERE s.patient_id = p.id) "
+            "FROM patients p ORDER BY p.rowid").fetchall()
+        index = {}
+        for row in rows:
+            entry = self._patient_dict(row[:-1], None)
+            del entry['sessions']
+            entry['session_count'] = row[-1]
+            index[row[0]] = entry
+        return index
+
+    def get_all_patients(self):
+        sessions = {}
+        for p_id, data in self.conn.execute(
+                "SELECT patient_id, data FROM sessions ORDER BY patient_id, idx"):
+            sessions.setdefault(p_id, []).append(json.loads(data))
+        rows = self.conn.execute("SELECT * FROM patients ORDER BY rowid").fetchall()
+        return {row[0]: self._patient_dict(row, sessions.get(row[0], [])) for row in rows}
+
+    # ---------- WRITE ----------
+    def add_patient(self, name, weight, difficulty):
+        p_id = name.lower().replace(' ', '_')
+        self._sessions.pop(p_id, None)
+        with self.conn:
+            # Registering an existing name starts the patient over, as with the json store
+            self.conn.execute("DELETE FROM sessions WHERE patient_id = ?", (p_id,))
+            self._insert_patient(p_id, {'name': name, 'weight': weight, 'difficulty': difficulty,
+                                        'created': datetime.now().isoformat()})
+        return p_id
+
+    def update_patient(self, p_id, **kwargs):
+        with self.conn:
+            row = self.conn.execute("SELECT extra FROM patients WHERE id = ?", (p_id,)).fetchone()
+            if row is None:
+                return
+            extra = json.loads(row[0])
+            for k, v in kwargs.items():
+                if k in PATIENT_COLUMNS:
+                    self.conn.execute(f"UPDATE patients SET {k} = ? WHERE id = ?", (v, p_id))
+                else:
+                    extra[k] = v
+            self.conn.execute("UPDATE patients SET extra = ? WHERE id = ?",
+                              (json.dumps(extra), p_id))
+
+    def create_new_session(self, p_id, initial_data):
+        data = json.dumps(initial_data)
+        with self.conn:
+            if not self.conn.execute("SELECT 1 FROM patients WHERE id = ?", (p_id,)).fetchone():
+                return
+            self.conn.execute(
+                "INSERT INTO sessions (patient_id, idx, timestamp, data) "
+                "VALUES (?, (SELECT COUNT(*) FROM sessions WHERE patient_id = ?), ?, ?)",
+                (p_id, p_id, initial_data.get('timestamp'), data))
+        if p_id in self._sessions:
+            self._sessions[p_id].append(json.loads(data))
+
+    def _update_session_row(self, p_id, row, update_data):
+        # Keeps a cached session list current instead of reloading it
+        session_id, idx, data = row
+        session = json.loads(data)
+        session.update(update_data)
+        data = json.dumps(session)
+        self.conn.execute("UPDATE sessions SET data = ?, timestamp = ? WHERE id = ?",
+                          (data, session.get('timestamp'), session_id))
+        if p_id in self._sessions:
+            self._sessions[p_id][idx] = json.loads(data)
+
+    def update_active_session(self, p_id, update_data):
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT id, idx, data FROM sessions WHERE patient_id = ? ORDER BY idx DESC LIMIT 1",
+                (p_id,)).fetchone()
+            if row is not None:
+                self._update_session_row(p_id, row, update_data)
+
+    def update_session(self, p_id, index, update_data):
+        """Update fields of a specific (0-based) session of a patient."""
+        with self.conn:
+            row = self.conn.execute(
+                "SELECT id, idx, data FROM sessions WHERE patient_id = ? AND idx = ?",
+                (p_id, index)).fetchone()
+            if row is not None:
+                self._update_session_row(p_id, row, update_data)
+
+
+def main(argv=None):
+    from patient_database import PATIENT_DB_FILE
+    ap = argparse.ArgumentParser(description="Create the SQLite patient database.")
+    ap.add_argument("--import", dest="json_file", default=PATIENT_DB_FILE,
+                    help="patients_db.json to import into an empty database")
+    ap.add_argument("--db", default=PATIENT_SQLITE_FILE, help="SQLite database file")
+    args = ap.parse_args(argv)
+    db = SqlitePatientDatabase(args.db, import_from=args.json_file)
+    print(f"{args.db}: {db._count('patients')} patients, {db._count('sessions')} sessions")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Incremental patient search over names, kept in memory for the patient page.
+
+Built once from get_patient_index() when the list is refreshed, then queried on
+every keystroke. A query matches a patient when each of its words is either the
+start of a word of the name (sorted word list + bisect) or, for words of three
+letters or more, anywhere inside the name (trigram postings intersected, then
+checked). Names and queries are compared case- and accent-insensitively, so
+"jose" finds "José Álvarez".
+
+Results keep the index order, with names matching every word by a word prefix
+listed before the ones matched inside a word.
+"""
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+
+TRIGRAM = 3   # shortest query word looked up inside names
+
+
+def normalize(text):
+    """Lower-case text with accents removed."""
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _trigrams(text):
+    return {text[i:i + TRIGRAM] for i in range(len(text) - TRIGRAM + 1)}
+
+
+class PatientSearchIndex:
+    def __init__(self, patients):
+        """patients: p_id -> dict with at least 'name' (e.g. get_patient_index())."""
+        self.ids = list(patients)
+        self._names = [normalize(patients[p_id].get("name") or p_id) for p_id in self.ids]
+        self._words = sorted((word, i) for i, name in enumerate(self._names)
+                             for word in set(name.split()))
+        self._postings = defaultdict(set)   # trigram -> positions in self.ids
+        for i, name in enumerate(self._names):
+            for gram in _trigrams(name):
+                self._postings[gram].add(i)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _prefix_hits(self, term):
+        hits = set()
+        pos = bisect_left(self._words, (term,))
+        while pos < len(self._words) and self._words[pos][0].startswith(term):
+            hits.add(self._words[pos][1])
+            pos += 1
+        return hits
+
+    def _substring_hits(self, term):
+        if len(term) < TRIGRAM:
+            return set()
+        grams = sorted(_trigrams(term), key=lambda g: len(self._postings.get(g, ())))
+        candidates = set(self._postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not candidates:
+                break
+            candidates &= self._postings.get(gram, set())
+        return {i for i in candidates if term in self._names[i]}
+
+    def search(self, query):
+        """p_ids matching query; every patient for an empty query."""
+        terms = normalize(query).split()
+        if not terms:
+            return list(self.ids)
+        prefix_all = matched = None
+        for term in terms:
+            prefix = self._prefix_hits(term)
+            hits = prefix | self._substring_hits(term)
+            prefix_all = prefix if prefix_all is None else prefix_all & prefix
+            matched = hits if matched is None else matched & hits
+            if not matched:
+                return []
+        prefix_all &= matched
+        order = sorted(matched, key=lambda i: (i not in prefix_all, i))
+        return [self.ids[i] for i in order]
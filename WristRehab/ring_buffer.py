@@ -0,0 +1,78 @@
+"""
+Fixed-size NumPy ring buffer for telemetry samples.
+Memory is allocated once, so long sessions never grow the buffer.
+"""
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed capacity circular buffer of float samples.
+    Each sample can be a scalar (width=None) or a row of `width` channels.
+    """
+    def __init__(self, capacity, width=None, dtype=np.float64):
+        self.capacity = int(capacity)
+        shape = (self.capacity,) if width is None else (self.capacity, int(width))
+        self._data = np.zeros(shape, dtype=dtype)
+        self._head = 0        # index of the next write
+        self._count = 0       # number of valid samples
+        self.total = 0        # samples ever appended (used by readers to find new data)
+
+    def __len__(self):
+        return self._count
+
+    def is_full(self):
+        return self._count == self.capacity
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+        self.total = 0
+
+    def append(self, value):
+        """Add one sample, overwriting the oldest when full. O(1)."""
+        self._data[self._head] = value
+        self._head = (self._head + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        self.total += 1
+
+    def extend(self, values):
+        """Add a block of samples in one copy (keeps only the newest `capacity`)."""
+        values = np.asarray(values, dtype=self._data.dtype)
+        n = len(values)
+        if n == 0:
+            return
+        self.total += n
+        if n >= self.capacity:
+            self._data[:] = values[-self.capacity:]
+            self._head = 0
+            self._count = self.capacity
+            return
+        first = min(n, self.capacity - self._head)
+        self._data[self._head:self._head + first] = values[:first]
+        if first < n:
+            self._data[:n - first] = values[first:]
+        self._head = (self._head + n) % self.capacity
+        self._count = min(self._count + n, self.capacity)
+
+    def last(self, default=None):
+        if self._count == 0:
+            return default
+        return self._data[(self._head - 1) % self.capacity]
+
+    def view(self):
+        """Return the valid samples oldest -> newest (a copy)."""
+        if self._count < self.capacity:
+            return self._data[:self._count].copy()
+        return np.concatenate((self._data[self._head:], self._data[:self._head]))
+
+    def latest(self, n):
+        """Return the newest n samples oldest -> newest (a copy)."""
+        n = min(int(n), self._count)
+        if n <= 0:
+            return self._data[:0].copy()
+        start = (self._head - n) % self.capacity
+        if start + n <= self.capacity:
+            return self._data[start:start + n].copy()
+        return np.concatenate((self._data[start:], self._data[:self._head]))
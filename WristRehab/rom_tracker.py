@@ -0,0 +1,108 @@
+"""
+Online range-of-motion tracking from the live angle.
+
+The games map the angle between the calibrated neutral and end points, which
+are fixed when the wizard runs. RomTracker follows how far the patient actually
+reaches during the session: every angle sample beyond ROM_MIN_EXCURSION_DEG from
+neutral goes into a window of the last ROM_WINDOW_S seconds for its direction
+(flexion or extension side, from the calibration), and the reach in each
+direction is the ROM_PERCENTILE percentile of that window, so a single spike or
+a slipped sensor does not stretch the range.
+
+The refined end points are kept within ROM_SCALE_LIMITS of the calibrated ones
+and recomputed once per ROM_UPDATE_S of samples. rom() returns them in the same
+units and keys as the calibration (neutral / flexion / extension); the GUI
+publishes them to the games as the 'rom' field of the shared data.
+"""
+import numpy as np
+
+from firmware_config import LOG_PERIOD_MS
+from ring_buffer import RingBuffer
+
+ROM_WINDOW_S = 60.0             # reach is judged over this much recent movement
+ROM_PERCENTILE = 95.0           # robust "maximum" of the window
+ROM_MIN_EXCURSION_DEG = 2.0     # samples closer to neutral are rest, not reach
+ROM_MIN_SAMPLES_S = 3.0         # movement needed in a direction before it is refined
+ROM_UPDATE_S = 1.0              # recompute period (in samples' worth of time)
+ROM_SCALE_LIMITS = (0.5, 1.5)   # refined reach stays within these factors of the calibrated one
+
+DIRECTIONS = ("flexion", "extension")
+
+
+def _samples(seconds):
+    return max(1, int(round(seconds * 1000 / LOG_PERIOD_MS)))
+
+
+class RomTracker:
+    def __init__(self, window_s=ROM_WINDOW_S, percentile=ROM_PERCENTILE):
+        self.percentile = percentile
+        self.window = _samples(window_s)
+        self.min_samples = _samples(ROM_MIN_SAMPLES_S)
+        self.update_every = _samples(ROM_UPDATE_S)
+        self.neutral = None
+        self.sign = {}          # direction -> +1 / -1, side of neutral it lies on
+        self.calibrated = {}    # direction -> calibrated reach [deg from neutral]
+        self.reach = {}         # direction -> refined reach
+        self.excursions = {d: RingBuffer(self.window) for d in DIRECTIONS}
+        self._since_update = 0
+        self._rom = None
+
+    def reset(self, calibration):
+        """Start over from a calibration dict (neutral / flexion / extension); None stops tracking."""
+        for buf in self.excursions.values():
+            buf.clear()
+        self._since_update = 0
+        self._rom = None
+        self.neutral = None
+        if not calibration:
+            return
+        try:
+            neutral = float(calibration["neutral"])
+            ends = {d: float(calibration[d]) for d in DIRECTIONS}
+        except (KeyError, TypeError, ValueError):
+            return
+        if any(end == neutral for end in ends.values()):
+            return
+        self.neutral = neutral
+        self.sign = {d: 1.0 if end > neutral else -1.0 for d, end in ends.items()}
+        self.calibrated = {d: abs(end - neutral) for d, end in ends.items()}
+        self.reach = dict(self.calibrated)
+        self._rom = self._ends()
+
+    @property
+    def active(self):
+        return self.neutral is not None
+
+    def update(self, theta_deg):
+        """Add one angle sample."""
+        if self.neutral is None:
+            return
+        offset = theta_deg - self.neutral
+        for d in DIRECTIONS:
+            excursion = offset * self.sign[d]
+            if excursion >= ROM_MIN_EXCURSION_DEG:
+                self.excursions[d].append(excursion)
+        self._since_update += 1
+        if self._since_update >= self.update_every:
+            self._since_update = 0
+            self._refine()
+
+    def _refine(self):
+        low, high = ROM_SCALE_LIMITS
+        for d in DIRECTIONS:
+            buf = self.excursions[d]
+            if len(buf) < self.min_samples:
+                continue
+            reach = float(np.percentile(buf.view(), self.percentile))
+            self.reach[d] = min(max(reach, low * self.calibrated[d]), high * self.calibrated[d])
+        self._rom = self._ends()
+
+    def _ends(self):
+        rom = {"neutral": round(self.neutral, 2)}
+        for d in DIRECTIONS:
+            rom[d] = round(self.neutral + self.sign[d] * self.reach[d], 2)
+        return rom
+
+    def rom(self):
+        """Refined neutral / flexion / extension angles, or None when not tracking."""
+        return self._rom
@@ -0,0 +1,136 @@
+"""
+Score service: every game play recorded in the patient database.
+
+Each finished play is one row of the plays table in patients.db (patient, game,
+score, level reached, duration, time). Highscores are queries over those rows,
+so the games keep no score files of their own: a game calls record_play() once
+when a play ends, and the GUI asks for the best play since it launched the game.
+
+The highscores the games used to keep (highscore_*.json, {p_id: {"highscore": n}})
+are imported once per game as plays without a time; the files are left in place.
+Only the GUI, which owns the database, runs that import (import_legacy()); the
+game processes just open the database.
+"""
+import json
+import os
+import sqlite3
+from datetime import datetime
+
+from patient_database_sqlite import PATIENT_SQLITE_FILE
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# game id -> title, script, key of the session record holding the session best, old score file
+GAMES = {
+    "flexion": {
+        "title": "Game 1: Flexion",
+        "script": os.path.join(PROJECT_ROOT, "Game 1 - Flexion", "flexion_game.py"),
+        "session_key": "session_highscore_flex",
+        "legacy_file": os.path.join(PROJECT_ROOT, "Game 1 - Flexion", "Highscore_flex.json"),
+    },
+    "all": {
+        "title": "Game 2: Mixed",
+        "script": os.path.join(PROJECT_ROOT, "Game 2 - All", "Flex_and_ext_game.py"),
+        "session_key": "session_highscore_all",
+        "legacy_file": os.path.join(PROJECT_ROOT, "Game 2 - All", "highscore_all.json"),
+    },
+    "extension": {
+        "title": "Game 3: Extension",
+        "script": os.path.join(PROJECT_ROOT, "Game 3 - Extension", "extension.py"),
+        "session_key": "session_highscore_ext",
+        "legacy_file": os.path.join(PROJECT_ROOT, "Game 3 - Extension", "highscore_extension.json"),
+    },
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    patient_id TEXT NOT NULL,
+    game TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    level INTEGER,
+    duration_s REAL,
+    played_at TEXT
+);
+CREATE INDEX IF NOT EXISTS plays_patient_game_score ON plays(patient_id, game, score);
+CREATE INDEX IF NOT EXISTS plays_patient_time ON plays(patient_id, played_at);
+"""
+
+
+def game_for_script(script_path):
+    """Game id of a game script, or None."""
+    path = os.path.normcase(os.path.abspath(script_path))
+    for game, info in GAMES.items():
+        if os.path.normcase(info["script"]) == path:
+            return game
+    return None
+
+
+class ScoreService:
+    def __init__(self, db_file=PATIENT_SQLITE_FILE):
+        # The GUI and a game process write the same file: wait for each other's locks
+        self.conn = sqlite3.connect(db_file, timeout=5.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def import_legacy(self):
+        """Import the old per-game highscore files once (games without any play yet)."""
+        for game, info in GAMES.items():
+            if not os.path.exists(info["legacy_file"]):
+                continue
+            if self.conn.execute("SELECT 1 FROM plays WHERE game = ? LIMIT 1", (game,)).fetchone():
+                continue
+            try:
+                with open(info["legacy_file"], "r") as f:
+                    scores = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"[WARNING] Could not import {info['legacy_file']}: {e}")
+                continue
+            with self.conn:
+                self.conn.executemany(
+                    "INSERT INTO plays (patient_id, game, score) VALUES (?, ?, ?)",
+                    [(p_id, game, int(p.get("highscore", 0))) for p_id, p in scores.items()
+                     if isinstance(p, dict) and p.get("highscore", 0) > 0])
+
+    def record_play(self, p_id, game, score, duration_s=None, level=None, played_at=None):
+        """Store one finished play. Returns the patient's highscore in this game."""
+        if game not in GAMES:
+            raise KeyError(f"unknown game '{game}'")
+        played_at = played_at or datetime.now().isoformat()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO plays (patient_id, game, score, level, duration_s, played_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (p_id, game, int(score), level, duration_s, played_at))
+        return self.highscore(p_id, game)
+
+    def highscore(self, p_id, game):
+        row = self.conn.execute("SELECT MAX(score) FROM plays WHERE patient_id = ? AND game = ?",
+                                (p_id, game)).fetchone()
+        return row[0] or 0
+
+    def best_since(self, p_id, game, since):
+        """Best play of a patient in a game since an ISO timestamp, as a dict (None if no play)."""
+        row = self.conn.execute(
+            "SELECT score, level, duration_s, played_at FROM plays "
+            "WHERE patient_id = ? AND game = ? AND played_at >= ? ORDER BY score DESC LIMIT 1",
+            (p_id, game, since)).fetchone()
+        if row is None:
+            return None
+        return dict(zip(("score", "level", "duration_s", "played_at"), row))
+
+    def plays(self, p_id, game=None, since=None):
+        """All plays of a patient, oldest first, optionally for one game / since a timestamp."""
+        sql = "SELECT game, score, level, duration_s, played_at FROM plays WHERE patient_id = ?"
+        args = [p_id]
+        if game is not None:
+            sql += " AND game = ?"
+            args.append(game)
+        if since is not None:
+            sql += " AND played_at >= ?"
+            args.append(since)
+        rows = self.conn.execute(sql + " ORDER BY id", args).fetchall()
+        return [dict(zip(("game", "score", "level", "duration_s", "played_at"), r)) for r in rows]
@@ -0,0 +1,68 @@
+"""
+Helpers for reading the session CSV logs written by the GUI
+(timestamp + telemetry COLS, one row per sample).
+"""
+import csv
+import glob
+import os
+import re
+
+import numpy as np
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# <Name>_session<NNN>_<YYYYmmdd>_<HHMMSS>.csv
+SESSION_NAME_RE = re.compile(r"^(?P<name>.+)_session(?P<num>\d+)_(?P<ts>\d{8}_\d{6})\.csv$")
+
+
+def load_session_csv(path):
+    """
+    Read a session log.
+    Returns (columns, data) where data is a float64 array of shape (n_samples, len(columns)).
+    Rows that do not parse (truncated last line, garbage) are skipped.
+    """
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        columns = next(reader, [])
+        rows = []
+        for row in reader:
+            if len(row) != len(columns):
+                continue
+            try:
+                rows.append([float(x) for x in row])
+            except ValueError:
+                continue
+    data = np.array(rows, dtype=np.float64).reshape(-1, len(columns))
+    return columns, data
+
+
+def session_columns(path, names):
+    """Load a session and return the requested columns as separate 1-D arrays."""
+    columns, data = load_session_csv(path)
+    return [data[:, columns.index(n)] for n in names]
+
+
+def device_time(t):
+    """
+    Sample times on the device clock.
+    The logged timestamp is the host arrival time, which comes in bursts (several
+    lines per serial read), while the firmware prints at a fixed period. Returns
+    evenly spaced times over the same span.
+    """
+    t = np.asarray(t, dtype=np.float64)
+    if len(t) < 2:
+        return t.copy()
+    return np.linspace(t[0], t[-1], len(t))
+
+
+def parse_session_filename(path):
+    """Return (patient_name, session_number) or None if the name does not match."""
+    m = SESSION_NAME_RE.match(os.path.basename(path))
+    if not m:
+        return None
+    return m.group("name"), int(m.group("num"))
+
+
+def find_session_files(directory=PROJECT_ROOT):
+    return sorted(p for p in glob.glob(os.path.join(directory, "*.csv"))
+                  if parse_session_filename(p))
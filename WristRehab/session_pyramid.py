@@ -0,0 +1,139 @@
+"""
+Min/max decimation pyramids for session logs.
+
+For a session CSV `X.csv` the pyramid is stored next to it in `X.pyramid/`:
+    meta.json           columns, levels, sample count
+    raw.npy             all samples (n, 1 + len(columns)) incl. timestamp
+    L<f>_t.npy          start timestamp of each block of f raw samples
+    L<f>_min.npy        per-column block minimum (n/f, len(columns))
+    L<f>_max.npy        per-column block maximum
+All arrays are opened memory-mapped, so a viewer only touches the slice it draws:
+drawing any time range costs O(screen pixels) regardless of session length.
+
+Usage:  python session_pyramid.py [session.csv ...]   (default: all sessions)
+"""
+import json
+import os
+import sys
+
+import numpy as np
+
+from session_io import load_session_csv, find_session_files
+
+PYRAMID_LEVELS = (16, 256, 4096)   # raw samples per block, finest first (each divides the next)
+
+
+def pyramid_dir(csv_path):
+    return os.path.splitext(csv_path)[0] + ".pyramid"
+
+
+def _reduce(lo, hi, factor):
+    """Block min/max over `factor` consecutive rows (last block may be partial)."""
+    n = len(lo)
+    nb = -(-n // factor)
+    pad = nb * factor - n
+    if pad:
+        lo = np.concatenate((lo, np.repeat(lo[-1:], pad, axis=0)))
+        hi = np.concatenate((hi, np.repeat(hi[-1:], pad, axis=0)))
+    ncols = lo.shape[1]
+    return (lo.reshape(nb, factor, ncols).min(axis=1),
+            hi.reshape(nb, factor, ncols).max(axis=1))
+
+
+def build_pyramid(csv_path, levels=PYRAMID_LEVELS):
+    """Build (or rebuild) the pyramid for one session. Returns the pyramid directory."""
+    columns, data = load_session_csv(csv_path)
+    out = pyramid_dir(csv_path)
+    os.makedirs(out, exist_ok=True)
+
+    t = data[:, 0]
+    vals = data[:, 1:]
+    np.save(os.path.join(out, "raw.npy"), data)
+
+    lo, hi, prev = vals, vals, 1
+    built = []
+    for f in levels:
+        if len(t) == 0:
+            break
+        step = f // prev if f % prev == 0 else None
+        if step:
+            lo, hi = _reduce(lo, hi, step)
+        else:
+            lo, hi = _reduce(vals, vals, f)
+        np.save(os.path.join(out, f"L{f}_t.npy"), t[::f])
+        np.save(os.path.join(out, f"L{f}_min.npy"), lo)
+        np.save(os.path.join(out, f"L{f}_max.npy"), hi)
+        built.append(f)
+        prev = f
+
+    with open(os.path.join(out, "meta.json"), "w") as fh:
+        json.dump({"columns": columns[1:], "levels": built, "samples": int(len(t)),
+                   "source": os.path.basename(csv_path)}, fh, indent=2)
+    return out
+
+
+class SessionPyramid:
+    """Read side: pick the right level for a time range and pixel budget."""
+    def __init__(self, csv_path):
+        self.dir = pyramid_dir(csv_path)
+        with open(os.path.join(self.dir, "meta.json")) as fh:
+            meta = json.load(fh)
+        self.columns = meta["columns"]
+        self.levels = meta["levels"]
+        self.samples = meta["samples"]
+        self._raw = np.load(os.path.join(self.dir, "raw.npy"), mmap_mode="r")
+        self._lvl = {}
+        for f in self.levels:
+            self._lvl[f] = tuple(np.load(os.path.join(self.dir, f"L{f}_{k}.npy"), mmap_mode="r")
+                                 for k in ("t", "min", "max"))
+
+    def time_range(self):
+        if not self.samples:
+            return 0.0, 0.0
+        return float(self._raw[0, 0]), float(self._raw[-1, 0])
+
+    def envelope(self, column, t0=None, t1=None, max_points=1000):
+        """
+        Return (t, lo, hi) for `column` between t0 and t1 with at most `max_points` entries.
+        Uses the finest level that fits; raw samples come back with lo == hi.
+        """
+        c = self.columns.index(column)
+        if t0 is None or t1 is None:
+            a, b = self.time_range()
+            t0 = a if t0 is None else t0
+            t1 = b if t1 is None else t1
+
+        raw_t = self._raw[:, 0]
+        i0, i1 = np.searchsorted(raw_t, [t0, t1], side="left")
+        i1 = min(i1 + 1, self.samples)
+        if i1 - i0 <= max_points:
+            v = np.asarray(self._raw[i0:i1, c + 1])
+            return np.asarray(raw_t[i0:i1]), v, v
+
+        for f in self.levels:
+            lt, lmin, lmax = self._lvl[f]
+            j0 = max(0, i0 // f)
+            j1 = min(len(lt), -(-i1 // f))
+            if j1 - j0 <= max_points or f == self.levels[-1]:
+                t = np.asarray(lt[j0:j1])
+                lo = np.asarray(lmin[j0:j1, c])
+                hi = np.asarray(lmax[j0:j1, c])
+                if len(t) > max_points:
+                    # Coarsest level still too dense: merge neighbours on the fly
+                    step = -(-len(t) // max_points)
+                    lo2, hi2 = _reduce(lo[:, None], hi[:, None], step)
+                    return t[::step], lo2[:, 0], hi2[:, 0]
+                return t, lo, hi
+        v = np.asarray(self._raw[i0:i1, c + 1])
+        return np.asarray(raw_t[i0:i1]), v, v
+
+
+def main(argv):
+    paths = argv or find_session_files()
+    for p in paths:
+        out = build_pyramid(p)
+        print(f"{os.path.basename(p)} -> {os.path.basename(out)}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,102 @@
+"""
+Session replay - plays a recorded session CSV back into the live data channel.
+
+theta_pot/button_state are republished to live_angle_data.json exactly like the GUI
+does, so games started with --use-shared-data can be tested without the device.
+This is a standalone tool run instead of the GUI: it does not emulate the
+command side of the device (for that use device_emulator.py).
+
+Usage:
+    python session_replay.py ../Bjarke_session004_20251205_130920.csv            # 1x
+    python session_replay.py <csv> --speed 4                                    # 4x
+    python session_replay.py <csv> --speed 0                                    # as fast as possible
+"""
+import argparse
+import sys
+import threading
+import time
+
+from firmware_config import TELEMETRY_COLS
+from session_io import load_session_csv, PROJECT_ROOT
+
+sys.path.append(PROJECT_ROOT)
+from shared_serial_reader import publish_shared_data
+
+def format_telemetry_line(row):
+    """Format one telemetry row as the firmware would print it."""
+    return ",".join(f"{v:g}" for v in row)
+
+
+class SessionReplay:
+    """
+    speed: 1.0 = recorded timing, N = N times faster, 0 = as fast as possible.
+    publish: write every sample to the shared data file.
+    raw_queue: if given, firmware-style telemetry lines are put on it.
+    """
+    def __init__(self, csv_path, speed=1.0, loop=False, publish=True, raw_queue=None):
+        self.csv_path = csv_path
+        self.speed = float(speed)
+        self.loop = loop
+        self.publish = publish
+        self.raw_queue = raw_queue
+
+        columns, data = load_session_csv(csv_path)
+        self.t = data[:, columns.index("timestamp")]
+        self.rows = data[:, [columns.index(c) for c in TELEMETRY_COLS]]
+        self.samples_sent = 0
+
+    def duration(self):
+        return float(self.t[-1] - self.t[0]) if len(self.t) else 0.0
+
+    def run(self, stop_event=None):
+        """Blocking playback. Returns the number of samples sent."""
+        if not len(self.t):
+            return 0
+        stop_event = stop_event or threading.Event()
+        while True:
+            self._play_once(stop_event)
+            if not self.loop or stop_event.is_set():
+                return self.samples_sent
+
+    def _play_once(self, stop_event):
+        t0 = self.t[0]
+        wall0 = time.perf_counter()
+        angle_i = 0
+        button_i = 1
+        for t, row in zip(self.t, self.rows):
+            if stop_event.is_set():
+                return
+            if self.speed > 0:
+                # Sleep until this sample is due on the scaled recorded clock
+                delay = (t - t0) / self.speed - (time.perf_counter() - wall0)
+                if delay > 0:
+                    time.sleep(delay)
+            if self.publish:
+                publish_shared_data(float(row[angle_i]), float(row[button_i]))
+            if self.raw_queue is not None:
+                self.raw_queue.put(format_telemetry_line(row))
+            self.samples_sent += 1
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Replay a recorded session into the game data channel.")
+    ap.add_argument("csv", help="session CSV written by the GUI")
+    ap.add_argument("--speed", type=float, default=1.0,
+                    help="playback speed (1 = recorded timing, 0 = as fast as possible)")
+    ap.add_argument("--loop", action="store_true", help="restart at the end of the session")
+    args = ap.parse_args(argv)
+
+    replay = SessionReplay(args.csv, speed=args.speed, loop=args.loop)
+    print(f"Replaying {len(replay.t)} samples ({replay.duration():.1f} s recorded) "
+          f"@ {'max' if args.speed <= 0 else f'{args.speed:g}x'}")
+    start = time.perf_counter()
+    try:
+        n = replay.run()
+    except KeyboardInterrupt:
+        n = replay.samples_sent
+    elapsed = time.perf_counter() - start
+    print(f"Sent {n} samples in {elapsed:.2f} s ({n / max(elapsed, 1e-9):.0f} samples/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""
+Spectral analysis of w_meas / tau_ext to spot patient tremor and controller oscillation.
+
+StreamingSpectrum keeps the newest samples in a RingBuffer. analyze() (called at
+display rate, not per sample) runs Hann-windowed FFTs over every new overlapping
+window, averages them into a running power spectrum and reports the dominant
+frequency and the power in each band.
+
+spectrogram() is the batch version for whole sessions: all windows are taken as
+strided views of one array and transformed in a single rfft call.
+
+Usage:  python spectral_analysis.py [csv ...] [--nfft 64] [--save]
+"""
+import argparse
+import os
+
+import numpy as np
+
+from firmware_config import LOG_PERIOD_MS
+from ring_buffer import RingBuffer
+from session_io import device_time, find_session_files, session_columns
+
+SPECTRUM_NFFT = 64            # window length in samples (6.4 s at 10 Hz)
+SPECTRUM_OVERLAP = 0.75       # fraction of a window shared with the previous one
+SPECTRUM_AVG_ALPHA = 0.3      # weight of a new window in the running spectrum
+# Frequency bands [Hz]; bands above the Nyquist frequency are clipped or left empty
+SPECTRUM_BANDS = {
+    "voluntary": (0.0, 1.0),
+    "oscillation": (1.0, 4.0),
+    "tremor": (4.0, 12.0),
+}
+SPECTRUM_COLS = ["w_meas", "tau_ext"]
+
+
+def _hann(n):
+    return np.hanning(n)
+
+
+def power_spectrum(frames, fs, window=None):
+    """
+    One-sided power spectral density of each row of frames (..., nfft).
+    The mean of every frame is removed first so DC offsets do not dominate.
+    """
+    frames = np.asarray(frames, dtype=np.float64)
+    nfft = frames.shape[-1]
+    if window is None:
+        window = _hann(nfft)
+    frames = (frames - frames.mean(axis=-1, keepdims=True)) * window
+    spec = np.abs(np.fft.rfft(frames, axis=-1)) ** 2 / (fs * np.sum(window ** 2))
+    spec[..., 1:-1] *= 2.0   # fold negative frequencies
+    return np.fft.rfftfreq(nfft, 1.0 / fs), spec
+
+
+def band_power(freqs, psd, bands=SPECTRUM_BANDS):
+    """Integrated power per band. psd (..., F) -> {name: (...)}."""
+    df = freqs[1] - freqs[0] if len(freqs) > 1 else 1.0
+    out = {}
+    for name, (lo, hi) in bands.items():
+        mask = (freqs >= lo) & (freqs < hi)
+        out[name] = psd[..., mask].sum(axis=-1) * df
+    return out
+
+
+def dominant_frequency(freqs, psd):
+    """Frequency of the largest non-DC bin. psd (..., F) -> (...)."""
+    if psd.shape[-1] < 2:
+        return np.zeros(psd.shape[:-1])
+    return freqs[1:][np.argmax(psd[..., 1:], axis=-1)]
+
+
+# ---------- STREAMING ----------
+class StreamingSpectrum:
+    """
+    Overlapping-window spectrum of a few telemetry channels.
+    update() is O(1) per sample; the FFT work happens in analyze().
+    """
+    def __init__(self, channels=SPECTRUM_COLS, nfft=SPECTRUM_NFFT, overlap=SPECTRUM_OVERLAP,
+                 bands=SPECTRUM_BANDS, avg_alpha=SPECTRUM_AVG_ALPHA):
+        self.channels = list(channels)
+        self.nfft = int(nfft)
+        self.hop = max(1, int(round(self.nfft * (1.0 - overlap))))
+        self.bands = bands
+        self.avg_alpha = avg_alpha
+        self.window = _hann(self.nfft)
+        # Room for a few hops between analyze() calls
+        capacity = self.nfft + 8 * self.hop
+        self.samples = RingBuffer(capacity, width=len(self.channels))
+        self.times = RingBuffer(capacity)
+        self.reset()
+
+    def reset(self):
+        self.samples.clear()
+        self.times.clear()
+        self.next_frame_end = self.nfft    # sample count at which the next window is complete
+        self.psd = None
+        self.freqs = None
+        self.frames = 0
+
+    def update(self, t, vals):
+        self.samples.append(vals)
+        self.times.append(t)
+
+    def sample_rate(self):
+        """Device rate from the sample count over the buffered span (arrival times are bursty)."""
+        t = self.times.view()
+        if len(t) < 2 or t[-1] <= t[0]:
+            return 1000.0 / LOG_PERIOD_MS
+        return (len(t) - 1) / (t[-1] - t[0])
+
+    def analyze(self):
+        """
+        Process all windows completed since the last call.
+        Returns {channel: {'dominant_hz', 'bands': {name: power}}} or None before the first window.
+        """
+        total = self.samples.total
+        if total < self.next_frame_end:
+            return self.result() if self.psd is not None else None
+
+        # Windows that scrolled out of the buffer are skipped
+        oldest_end = total - len(self.samples) + self.nfft
+        if self.next_frame_end < oldest_end:
+            skip = -(-(oldest_end - self.next_frame_end) // self.hop)
+            self.next_frame_end += skip * self.hop
+        ends = np.arange(self.next_frame_end, total + 1, self.hop)
+        if not len(ends):
+            return self.result() if self.psd is not None else None
+        self.next_frame_end = int(ends[-1]) + self.hop
+
+        data = self.samples.view()                       # (n, C), oldest -> newest
+        start0 = len(data) - (total - ends)               # end index of each window within data
+        idx = start0[:, None] - self.nfft + np.arange(self.nfft)
+        frames = np.moveaxis(data[idx], 2, 1)             # (W, C, nfft)
+
+        fs = self.sample_rate()
+        self.freqs, psd = power_spectrum(frames, fs, self.window)
+        for p in psd:
+            if self.psd is None or self.psd.shape != p.shape:
+                self.psd = p
+            else:
+                self.psd += self.avg_alpha * (p - self.psd)
+        self.frames += len(psd)
+        return self.result()
+
+    def result(self):
+        dom = dominant_frequency(self.freqs, self.psd)
+        bp = band_power(self.freqs, self.psd, self.bands)
+        return {c: {'dominant_hz': float(dom[i]),
+                    'bands': {name: float(v[i]) for name, v in bp.items()}}
+                for i, c in enumerate(self.channels)}
+
+
+# ---------- BATCH ----------
+def spectrogram(x, fs, nfft=SPECTRUM_NFFT, overlap=SPECTRUM_OVERLAP):
+    """
+    Spectrogram of a 1-D signal. All windows are strided views, transformed at once.
+    Returns (frame_centers_s, freqs, psd) with psd of shape (frames, nfft // 2 + 1).
+    """
+    x = np.asarray(x, dtype=np.float64)
+    hop = max(1, int(round(nfft * (1.0 - overlap))))
+    if len(x) < nfft:
+        return np.empty(0), np.fft.rfftfreq(nfft, 1.0 / fs), np.empty((0, nfft // 2 + 1))
+    frames = np.lib.stride_tricks.sliding_window_view(x, nfft)[::hop]
+    freqs, psd = power_spectrum(frames, fs)
+    centers = (np.arange(len(frames)) * hop + nfft / 2) / fs
+    return centers, freqs, psd
+
+
+def session_spectrogram(csv_path, columns=SPECTRUM_COLS, nfft=SPECTRUM_NFFT,
+                        overlap=SPECTRUM_OVERLAP):
+    """Spectrograms of the given columns of a session CSV on the device clock."""
+    t, *chans = session_columns(csv_path, ["timestamp"] + list(columns))
+    t = device_time(t)
+    fs = (len(t) - 1) / (t[-1] - t[0]) if len(t) > 1 and t[-1] > t[0] else 1000.0 / LOG_PERIOD_MS
+    out = {'fs': fs}
+    for name, x in zip(columns, chans):
+        centers, freqs, psd = spectrogram(x, fs, nfft, overlap)
+        out[name] = {'t': centers, 'freqs': freqs, 'psd': psd}
+    return out
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Spectrograms of w_meas / tau_ext for session logs.")
+    ap.add_argument("csv", nargs="*", help="session CSVs (default: all sessions in the project root)")
+    ap.add_argument("--nfft", type=int, default=SPECTRUM_NFFT, help="window length in samples")
+    ap.add_argument("--overlap", type=float, default=SPECTRUM_OVERLAP, help="window overlap (0-1)")
+    ap.add_argument("--save", action="store_true", help="write <csv>.spectrogram.npz next to each log")
+    args = ap.parse_args(argv)
+
+    for path in args.csv or find_session_files():
+        res = session_spectrogram(path, nfft=args.nfft, overlap=args.overlap)
+        parts = []
+        for c in SPECTRUM_COLS:
+            s = res[c]
+            if not len(s['psd']):
+                parts.append(f"{c}: too short")
+                continue
+            mean_psd = s['psd'].mean(axis=0)
+            bp = band_power(s['freqs'], mean_psd)
+            bands = " ".join(f"{k}={v:.3g}" for k, v in bp.items())
+            parts.append(f"{c}: peak {dominant_frequency(s['freqs'], mean_psd):.2f} Hz, {bands}")
+        print(f"{os.path.basename(path)} ({res['fs']:.1f} Hz)")
+        for p in parts:
+            print("   " + p)
+        if args.save:
+            np.savez_compressed(os.path.splitext(path)[0] + ".spectrogram.npz",
+                                **{f"{c}_{k}": v for c in SPECTRUM_COLS for k, v in res[c].items()})
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Scrolling strip chart for live telemetry.
+Samples go into a fixed-size RingBuffer; the canvas is redrawn on a timer capped
+at STRIP_MAX_FPS. Each frame shifts the existing line items with one canvas.move
+and only draws a new line chunk for the samples that arrived since the last frame,
+so the drawing cost follows the frame rate, not the sample rate.
+"""
+import tkinter as tk
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+# --- STRIP CHART CONFIG ---
+STRIP_SPAN = 1000          # samples visible across the chart (also the ring size)
+STRIP_MAX_FPS = 20         # redraw cap
+STRIP_BG = "#1e1e1e"
+STRIP_GRID = "#444444"
+
+
+class StripChart(tk.Canvas):
+    """
+    traces: list of (label, color, (ymin, ymax)), one per column of the source buffer.
+    source: RingBuffer(width=len(traces)) shared with the producer. If omitted the
+            chart owns one and samples are added with push().
+    """
+    def __init__(self, parent, traces, source=None, span=STRIP_SPAN,
+                 max_fps=STRIP_MAX_FPS, height=140, **kwargs):
+        super().__init__(parent, height=height, bg=STRIP_BG, highlightthickness=0, **kwargs)
+        self.traces = list(traces)
+        self.span = int(span)
+        self.source = source if source is not None else RingBuffer(self.span, width=len(self.traces))
+        self.frame_ms = max(1, int(1000 / max_fps))
+
+        self._drawn_total = 0     # source.total at the last frame
+        self._chunks = []         # [(source.total when drawn, [item ids])] oldest first
+        self._needs_full = True
+        self._after_id = None
+
+        self.bind("<Configure>", self._on_resize)
+        self._after_id = self.after(self.frame_ms, self._tick)
+
+    def push(self, values):
+        self.source.append(values)
+
+    def clear(self):
+        self.source.clear()
+        self._drawn_total = 0
+        self._needs_full = True
+
+    def destroy(self):
+        if self._after_id:
+            self.after_cancel(self._after_id)
+            self._after_id = None
+        super().destroy()
+
+    # ---------- DRAWING ----------
+    def _dx(self):
+        return max(1, self.winfo_width()) / max(1, self.span - 1)
+
+    def _to_y(self, vals, ch):
+        h = max(1, self.winfo_height())
+        lo, hi = self.traces[ch][2]
+        y = h - (vals - lo) / (hi - lo) * h
+        return np.clip(y, 1, h - 1)
+
+    def _line_coords(self, block, ch, x_last):
+        n = len(block)
+        xs = x_last - (n - 1 - np.arange(n)) * self._dx()
+        return np.column_stack((xs, self._to_y(block[:, ch], ch))).ravel().tolist()
+
+    def _draw_chunk(self, block):
+        x_last = max(1, self.winfo_width()) - 1
+        ids = []
+        for ch, (_, color, _) in enumerate(self.traces):
+            ids.append(self.create_line(*self._line_coords(block, ch, x_last),
+                                        fill=color, width=1.5, tags=("trace",)))
+        self._chunks.append((self.source.total, ids))
+
+    def _draw_axes(self):
+        self.delete("axis")
+        w, h = max(1, self.winfo_width()), max(1, self.winfo_height())
+        self.create_line(0, h / 2, w, h / 2, fill=STRIP_GRID, dash=(2, 4), tags=("axis",))
+        for ch, (label, color, (lo, hi)) in enumerate(self.traces):
+            self.create_text(6, 4 + 14 * ch, anchor="nw", fill=color, font=("Arial", 8),
+                             text=f"{label} [{lo:g}, {hi:g}]", tags=("axis",))
+        self.tag_lower("axis")
+
+    def _full_redraw(self):
+        self.delete("trace")
+        self._chunks.clear()
+        self._draw_axes()
+        block = self.source.latest(self.span)
+        if len(block) >= 2:
+            self._draw_chunk(block)
+        self._drawn_total = self.source.total
+        self._needs_full = False
+
+    def _tick(self):
+        self._after_id = self.after(self.frame_ms, self._tick)
+        if not self.winfo_ismapped():
+            return  # hidden page: keep buffering, draw when shown again
+
+        new = self.source.total - self._drawn_total
+        if self._needs_full or new >= self.span or self._drawn_total == 0 or new < 0:
+            self._full_redraw()
+            return
+        if new == 0:
+            return
+
+        # Shift what is already on screen, then draw only the new samples
+        # (plus the previous point so the chunks join up).
+        self.move("trace", -new * self._dx(), 0)
+        self._draw_chunk(self.source.latest(new + 1))
+        self._drawn_total = self.source.total
+
+        # Drop chunks that have scrolled fully off the left edge.
+        while self._chunks and self.source.total - self._chunks[0][0] >= self.span:
+            _, ids = self._chunks.pop(0)
+            for item in ids:
+                self.delete(item)
+
+    def _on_resize(self, event):
+        self._needs_full = True
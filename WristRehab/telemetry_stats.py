@@ -0,0 +1,100 @@
+"""
+Running statistics for the telemetry stream.
+Every sample is folded in with O(1) work (Welford mean/variance, min/max, EMA,
+ring buffer push). Percentiles are only computed when the display asks for them.
+"""
+import math
+
+import numpy as np
+
+from ring_buffer import RingBuffer
+
+# --- STATS CONFIG ---
+STATS_WINDOW = 512         # samples kept per channel for windowed percentiles
+STATS_EMA_ALPHA = 0.05     # EMA smoothing factor (lower = smoother)
+STATS_PERCENTILES = (5, 50, 95)
+
+
+class RunningStats:
+    """Statistics for a single channel."""
+    def __init__(self, window=STATS_WINDOW, ema_alpha=STATS_EMA_ALPHA):
+        self.ema_alpha = ema_alpha
+        self.window = RingBuffer(window)
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.ema = None
+        self.window.clear()
+
+    def update(self, x):
+        # Welford's online mean/variance
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+
+        if x < self.min:
+            self.min = x
+        if x > self.max:
+            self.max = x
+
+        if self.ema is None:
+            self.ema = x
+        else:
+            self.ema += self.ema_alpha * (x - self.ema)
+
+        self.window.append(x)
+
+    @property
+    def variance(self):
+        return self._m2 / (self.n - 1) if self.n > 1 else 0.0
+
+    @property
+    def std(self):
+        return math.sqrt(self.variance)
+
+    def percentiles(self, qs=STATS_PERCENTILES):
+        """Percentiles over the last `window` samples."""
+        if not len(self.window):
+            return [0.0 for _ in qs]
+        return [float(v) for v in np.percentile(self.window.view(), qs)]
+
+    def snapshot(self, qs=STATS_PERCENTILES):
+        """Summary dict for display or logging."""
+        return {
+            'n': self.n,
+            'mean': self.mean,
+            'std': self.std,
+            'min': self.min if self.n else 0.0,
+            'max': self.max if self.n else 0.0,
+            'ema': self.ema if self.ema is not None else 0.0,
+            'percentiles': dict(zip(qs, self.percentiles(qs))),
+        }
+
+
+class TelemetryStats:
+    """One RunningStats per telemetry column."""
+    def __init__(self, columns, window=STATS_WINDOW, ema_alpha=STATS_EMA_ALPHA):
+        self.columns = list(columns)
+        self.channels = {c: RunningStats(window, ema_alpha) for c in self.columns}
+        self.dirty = False   # set on new samples, cleared by the display refresh
+
+    def reset(self):
+        for stats in self.channels.values():
+            stats.reset()
+        self.dirty = True
+
+    def update(self, vals):
+        """Fold one telemetry row (ordered like `columns`) into the stats."""
+        for c, x in zip(self.columns, vals):
+            self.channels[c].update(x)
+        self.dirty = True
+
+    def snapshot(self, qs=STATS_PERCENTILES):
+        self.dirty = False
+        return {c: s.snapshot(qs) for c, s in self.channels.items()}
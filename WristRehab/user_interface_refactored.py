@@ -10,8 +10,32 @@ import serial
 import serial.tools.list_ports
 import tkinter as tk
 from tkinter import ttk, messagebox
-import math
-from datetime import datetime
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from admittance_model import params_from_tau_ref, candidate_grid, resample_trace, simulate
+from calibration_capture import (StableCapture, CAPTURE_MIN_ROM_DEG, TOO_CLOSE, WRONG_SIDE,
+                                 SHORT_OF_PEAK)
+from calibration_profiles import CalibrationStore, CALIBRATION_FILE, PROFILE_ARG, device_id
+from device_commands import CommandQueue
+from device_config import DeviceConfig
+from device_state import DeviceStateMirror, RESET, FAULT_LATCHED
+from connection_manager import ConnectionManager
+from fault_predictor import FaultPredictor, softened, SOFTEN_COOLDOWN_S
+from firmware_config import POS_DT_S, READY_BANNER
+from mvc_test import MvcTest, MVC_TRIALS, MVC_REST_S, RECORD
+from patient_database import open_patient_database
+from patient_search import PatientSearchIndex
+from ring_buffer import RingBuffer
+from rom_tracker import RomTracker
+from score_service import ScoreService, GAMES, game_for_script
+from session_io import device_time, session_columns
+from session_pyramid import build_pyramid
+from spectral_analysis import StreamingSpectrum
+from strip_chart import StripChart, STRIP_SPAN
+from telemetry_stats import TelemetryStats
+from virtual_list import VirtualList
 
 # --- CONFIGURATION ---
 DEFAULT_BAUD = 460800
@@ -21,17 +45,30 @@ DEFAULT_PORT = None
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.dirname(SCRIPT_DIR)
 
-PATIENT_DB_FILE = os.path.join(PROJECT_ROOT, "patients_db.json")
-CALIBRATION_FILE = os.path.join(SCRIPT_DIR, "calibration_data.json")
+PATIENT_DB_FILE = os.path.join(PROJECT_ROOT, "patients.db")
+
+# Shared data channel for games (live_angle_data.json), see shared_serial_reader.py
+sys.path.append(PROJECT_ROOT)
+from shared_serial_reader import publish_shared_data
 
 # --- GAME PATHS ---
-GAME_1_PATH = os.path.join(PROJECT_ROOT, "Game 1 - Flexion", "flexion_game.py")
-GAME_2_PATH = os.path.join(PROJECT_ROOT, "Game 2 - All", "Flex_and_ext_game.py")
-GAME_3_PATH = os.path.join(PROJECT_ROOT, "Game 3 - Extension", "extension.py")
+GAME_1_PATH = GAMES["flexion"]["script"]
+GAME_2_PATH = GAMES["all"]["script"]
+GAME_3_PATH = GAMES["extension"]["script"]
 
 # --- TELEMETRY CONFIG ---
 COLS = ["theta_pot", "button_state","theta_pot_rad", "wUser_", "w_meas", "tau_ext"]
 MIN_TAU_REF = 0.05  # Minimum torque reference for safety
+STATS_REFRESH_MS = 250  # Telemetry statistics display rate (independent of sample rate)
+SPECTRUM_REFRESH_MS = 1000  # w_meas / tau_ext spectrum update rate
+STATE_POLL_MS = 2000  # 'get state' readback period while connected and idle
+SHARED_PUBLISH_HZ = 50  # Max shared data file writes per second (games poll at ~50 Hz)
+ADM_PREVIEW_SECONDS = 60.0  # Length of recorded tau_ext used for the parameter preview
+ADM_PREVIEW_SCALES = (0.5, 0.75, 1.0, 1.5, 2.0)  # J/B/K multipliers swept by the preview
+
+# Live plot traces: (label, color, (ymin, ymax)) for theta_pot and tau_ext
+STRIP_TRACES = [("Angle (deg)", "#4fc3f7", (-90.0, 90.0)),
+                ("tau (Nm)", "#ffb74d", (-2.0, 2.0))]
 
 
 # ============================================================================
@@ -46,18 +83,25 @@ class SerialWorker(threading.Thread):
         self.raw_queue = raw_queue
         self.stop_event = stop_event
         self.ser = None
+        # Commands are written from this thread only, one at a time (see device_commands.py)
+        self.commands = CommandQueue()
+
+    def stop(self):
+        self.stop_event.set()
 
     def run(self):
         try:
-            self.ser = serial.Serial(self.port, self.baud, timeout=0.2)
+            self.ser = serial.Serial(self.port, self.baud, timeout=0.01)
         except Exception as e:
             self.line_queue.put(("#ERROR", f"Serial open failed: {e}"))
+            self.commands.fail_all(ConnectionError(f"serial open failed: {e}"))
             return
         self.line_queue.put(("#INFO", f"Connected to {self.port} @ {self.baud}"))
         
         buf = b""
         while not self.stop_event.is_set():
             try:
+                self.commands.service(self.ser)
                 chunk = self.ser.read(1024)
                 if chunk:
                     buf += chunk
@@ -67,6 +111,8 @@ class SerialWorker(threading.Thread):
                             s = line.decode("utf-8", errors="ignore").strip()
                         except:
                             s = str(line)
+                        if s.startswith("#"):
+                            self.commands.on_line(s, self.ser)
                         self.raw_queue.put(s)
             except Exception as e:
                 self.line_queue.put(("#ERROR", f"Serial read error: {e}"))
@@ -77,74 +123,10 @@ class SerialWorker(threading.Thread):
                 self.ser.close()
         except:
             pass
+        self.commands.fail_all(ConnectionError("serial link closed"))
         self.line_queue.put(("#INFO", "Disconnected"))
 
 
-# ============================================================================
-# PATIENT DATABASE
-# ============================================================================
-class PatientDatabase:
-    def __init__(self, db_file=PATIENT_DB_FILE):
-        self.db_file = db_file
-        print(f"[DEBUG] Loading database from: {os.path.abspath(self.db_file)}")
-        self.patients = self._load_db()
-        print(f"[DEBUG] Loaded {len(self.patients)} patients: {list(self.patients.keys())}")
-    
-    def _load_db(self):
-        if os.path.exists(self.db_file):
-            try:
-                with open(self.db_file, 'r') as f:
-                    data = json.load(f)
-                    print(f"[DEBUG] Successfully loaded database with {len(data)} patients")
-                    return data
-            except Exception as e:
-                print(f"[ERROR] Failed to load database: {e}")
-                return {}
-        else:
-            print(f"[WARNING] Database file not found: {self.db_file}")
-        return {}
-    
-    def _save_db(self):
-        with open(self.db_file, 'w') as f:
-            json.dump(self.patients, f, indent=2)
-    
-    def add_patient(self, name, weight, difficulty):
-        p_id = name.lower().replace(' ', '_')
-        self.patients[p_id] = {
-            'name': name,
-            'weight': weight,
-            'difficulty': difficulty,
-            'created': datetime.now().isoformat(),
-            'sessions': []
-        }
-        self._save_db()
-        return p_id
-    
-    def get_patient(self, p_id):
-        return self.patients.get(p_id)
-    
-    def get_all_patients(self):
-        return self.patients
-
-    def update_patient(self, p_id, **kwargs):
-        if p_id in self.patients:
-            for k, v in kwargs.items():
-                self.patients[p_id][k] = v
-            self._save_db()
-
-    def create_new_session(self, p_id, initial_data):
-        if p_id in self.patients:
-            self.patients[p_id]['sessions'].append(initial_data)
-            self._save_db()
-
-    def update_active_session(self, p_id, update_data):
-        if p_id in self.patients and self.patients[p_id]['sessions']:
-            last_session = self.patients[p_id]['sessions'][-1]
-            for key, value in update_data.items():
-                last_session[key] = value
-            self._save_db()
-
-
 # ============================================================================
 # BASE PAGE CLASS
 # ============================================================================
@@ -170,6 +152,9 @@ class BasePage(ttk.Frame):
 class PatientPage(BasePage):
     def __init__(self, parent, app):
         super().__init__(parent, app)
+        self.patient_index = {}
+        self.patient_search = PatientSearchIndex({})
+        self.patient_ids = []   # ids of the rows currently listed (search results)
         self._build_ui()
     
     def _build_ui(self):
@@ -194,30 +179,46 @@ class PatientPage(BasePage):
     def _build_patient_selector(self, parent):
         select_frm = ttk.LabelFrame(parent, text="Select Existing Patient", padding=10)
         select_frm.grid(row=0, column=0, sticky="nsew", padx=(0, 10))
-        select_frm.rowconfigure(1, weight=1)
-        
-        # Listbox with scrollbar
+        select_frm.columnconfigure(0, weight=1)
+        
+        # Search box, filters the list as you type
+        search_frame = ttk.Frame(select_frm)
+        search_frame.grid(row=0, column=0, sticky="ew", pady=(0, 5))
+        ttk.Label(search_frame, text="Search:").pack(side="left")
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self._apply_search())
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side="left", fill="x", expand=True, padx=(5, 0))
+        search_entry.bind('<Return>', lambda e: self._load_selected_patient())
+        search_entry.bind('<Down>', lambda e: self._focus_patient_list())
+        self.search_count_var = tk.StringVar()
+        ttk.Label(search_frame, textvariable=self.search_count_var, width=12,
+                  anchor="e").pack(side="left", padx=(5, 0))
+        
+        # Patient list with scrollbar; only the visible rows are drawn
         list_frame = ttk.Frame(select_frm)
-        list_frame.grid(row=0, column=0, sticky="nsew", pady=5)
-        select_frm.rowconfigure(0, weight=1)
+        list_frame.grid(row=1, column=0, sticky="nsew", pady=5)
+        select_frm.rowconfigure(1, weight=1)
         
         scrollbar = ttk.Scrollbar(list_frame)
         scrollbar.pack(side="right", fill="y")
         
-        self.patient_listbox = tk.Listbox(list_frame, height=10, yscrollcommand=scrollbar.set)
+        self.patient_listbox = VirtualList(list_frame, height=10, yscrollcommand=scrollbar.set)
         self.patient_listbox.pack(side="left", fill="both", expand=True)
         scrollbar.config(command=self.patient_listbox.yview)
         self.patient_listbox.bind('<<ListboxSelect>>', self._on_patient_select)
+        self.patient_listbox.bind('<Double-Button-1>', lambda e: self._load_selected_patient())
+        self.patient_listbox.bind('<Return>', lambda e: self._load_selected_patient())
         
         # Info display
         self.patient_info_var = tk.StringVar(value="No patient selected")
         info_lbl = ttk.Label(select_frm, textvariable=self.patient_info_var, 
                             relief="sunken", padding=10)
-        info_lbl.grid(row=1, column=0, sticky="ew", pady=10)
+        info_lbl.grid(row=2, column=0, sticky="ew", pady=10)
         
         # Load button
         ttk.Button(select_frm, text="Load Patient", 
-                  command=self._load_selected_patient).grid(row=2, column=0, pady=5)
+                  command=self._load_selected_patient).grid(row=3, column=0, pady=5)
     
     def _build_patient_registration(self, parent):
         register_frm = ttk.LabelFrame(parent, text="Register New Patient", padding=10)
@@ -265,20 +266,20 @@ class PatientPage(BasePage):
         if not selection:
             return
         idx = selection[0]
-        p_ids = list(self.app.patient_db.get_all_patients().keys())
-        if idx < len(p_ids):
-            p = self.app.patient_db.get_patient(p_ids[idx])
+        if idx < len(self.patient_ids):
+            p = self.patient_index[self.patient_ids[idx]]
             self.patient_info_var.set(
-                f"Name: {p['name']}\nWeight: {p['weight']} kg\nSessions: {len(p['sessions'])}")
+                f"Name: {p['name']}\nWeight: {p['weight']} kg\nSessions: {p['session_count']}")
     
     def _load_selected_patient(self):
         selection = self.patient_listbox.curselection()
+        if not selection and len(self.patient_ids) == 1:
+            selection = (0,)   # Enter in the search box with a single match
         if not selection:
             return
         idx = selection[0]
-        p_ids = list(self.app.patient_db.get_all_patients().keys())
-        if idx < len(p_ids):
-            self.app.load_patient(p_ids[idx])
+        if idx < len(self.patient_ids):
+            self.app.load_patient(self.patient_ids[idx])
     
     def _register_new_patient(self):
         name = self.new_name_var.get().strip()
@@ -299,10 +300,25 @@ class PatientPage(BasePage):
         self.refresh_patient_list()
     
     def refresh_patient_list(self):
-        self.patient_listbox.delete(0, tk.END)
-        patients = self.app.patient_db.get_all_patients()
-        for p_id, data in patients.items():
-            self.patient_listbox.insert(tk.END, f"{data['name']} (W:{data['weight']}kg)")
+        # Names and session counts only; sessions are loaded when a patient is opened
+        self.patient_index = self.app.patient_db.get_patient_index()
+        self.patient_search = PatientSearchIndex(self.patient_index)
+        self._apply_search()
+    
+    def _apply_search(self):
+        self.patient_ids = self.patient_search.search(self.search_var.get())
+        self.patient_listbox.set_rows(
+            f"{self.patient_index[p_id]['name']} (W:{self.patient_index[p_id]['weight']}kg)"
+            for p_id in self.patient_ids)
+        self.search_count_var.set(f"{len(self.patient_ids)} of {len(self.patient_search)}")
+        self.patient_info_var.set("No patient selected")
+    
+    def _focus_patient_list(self):
+        self.patient_listbox.focus_set()
+        if self.patient_ids and not self.patient_listbox.curselection():
+            self.patient_listbox.selection_set(0)
+            self._on_patient_select(None)
+        return "break"
 
 
 # ============================================================================
@@ -360,7 +376,8 @@ class TherapyPage(BasePage):
         con.grid(row=1, column=0, sticky="ew", pady=5)
         
         ttk.Label(con, text="Port:").grid(row=0, column=0, padx=5)
-        self.port_cmb = ttk.Combobox(con, width=15, state="readonly")
+        # Editable so a pseudo-terminal (device_emulator.py) path can be typed in
+        self.port_cmb = ttk.Combobox(con, width=15)
         self.port_cmb.grid(row=0, column=1, padx=3)
         
         ttk.Label(con, text="Baud:").grid(row=0, column=2, padx=5)
@@ -428,13 +445,36 @@ class TherapyPage(BasePage):
         
         ttk.Button(btn_frame2, text="Clear Fault", command=self.app.clear_fault,
                   width=20).pack(side="left", padx=5)
+        
+        # Row 3: Predicted torque fault
+        fault_frame = ttk.Frame(params)
+        fault_frame.grid(row=3, column=0, columnspan=6, pady=5, padx=10)
+        
+        self.lbl_fault_risk = ttk.Label(fault_frame, text="Fault risk: OK", foreground="green", width=40)
+        self.lbl_fault_risk.pack(side="left", padx=5)
+        
+        self.auto_soften_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(fault_frame, text="Auto-soften J/B/K on fault risk",
+                       variable=self.auto_soften_var).pack(side="left", padx=5)
     
     def _build_mvc_section(self):
         mvc = ttk.LabelFrame(self, text="MVC Test (Start of Session)")
         mvc.grid(row=3, column=0, sticky="ew", pady=5)
         
-        ttk.Button(mvc, text="Run MVC (5s)", command=self.app.run_mvc).grid(
-            row=0, column=0, padx=10, pady=5)
+        self.btn_run_mvc = ttk.Button(mvc, text="Run MVC", command=self.app.run_mvc)
+        self.btn_run_mvc.grid(row=0, column=0, padx=10, pady=5)
+        ttk.Button(mvc, text="Preview Params", command=self.app.preview_admittance_sweep).grid(
+            row=0, column=1, padx=10, pady=5)
+        
+        ttk.Label(mvc, text="Trials:").grid(row=0, column=2, padx=(10, 2), pady=5, sticky="e")
+        self.mvc_trials_var = tk.IntVar(value=MVC_TRIALS)
+        ttk.Spinbox(mvc, from_=1, to=5, textvariable=self.mvc_trials_var, width=4).grid(
+            row=0, column=3, padx=2, pady=5, sticky="w")
+        
+        ttk.Label(mvc, text="Rest (s):").grid(row=0, column=4, padx=(10, 2), pady=5, sticky="e")
+        self.mvc_rest_var = tk.DoubleVar(value=MVC_REST_S)
+        ttk.Spinbox(mvc, from_=0, to=60, increment=1, textvariable=self.mvc_rest_var, width=4).grid(
+            row=0, column=5, padx=2, pady=5, sticky="w")
         
         self.mvc_label = ttk.Label(mvc, text="Results: -", foreground="blue")
         self.mvc_label.grid(row=1, column=0, sticky="w", pady=5, padx=5)
@@ -448,6 +488,30 @@ class TherapyPage(BasePage):
         
         self.lbl_tau = ttk.Label(live, text="tau: 0.00", font=("Arial", 10))
         self.lbl_tau.grid(row=0, column=1, padx=10, pady=5)
+        
+        ttk.Button(live, text="Reset Stats", command=self.app.reset_telemetry_stats).grid(
+            row=0, column=2, padx=10, pady=5, sticky="e")
+        live.columnconfigure(2, weight=1)
+        
+        # Running statistics per telemetry channel
+        stat_cols = ("mean", "std", "min", "max", "ema", "p5", "p50", "p95")
+        self.stats_tree = ttk.Treeview(live, columns=stat_cols, height=len(COLS))
+        self.stats_tree.heading("#0", text="Channel")
+        self.stats_tree.column("#0", width=110, stretch=False)
+        for c in stat_cols:
+            self.stats_tree.heading(c, text=c)
+            self.stats_tree.column(c, width=70, anchor="e")
+        for c in COLS:
+            self.stats_tree.insert("", "end", iid=c, text=c, values=("-",) * len(stat_cols))
+        self.stats_tree.grid(row=1, column=0, columnspan=3, sticky="ew", padx=5, pady=5)
+        
+        # Live trace of angle and torque
+        self.chart = StripChart(live, STRIP_TRACES, source=self.app.trace_buffer, height=120)
+        self.chart.grid(row=2, column=0, columnspan=3, sticky="ew", padx=5, pady=5)
+        
+        # Dominant frequency / band power (tremor and oscillation check)
+        self.lbl_spectrum = ttk.Label(live, text="Spectrum: waiting for data", font=("Arial", 9))
+        self.lbl_spectrum.grid(row=3, column=0, columnspan=3, sticky="w", padx=10, pady=(0, 5))
     
     def _build_log_section(self):
         logf = ttk.LabelFrame(self, text="Log")
@@ -477,6 +541,27 @@ class TherapyPage(BasePage):
             self.therapy_diff_var.set(float(patient['difficulty']))
             self._update_therapy_diff_label(patient['difficulty'])
     
+    def update_stats(self, snapshot):
+        for c, st in snapshot.items():
+            pct = st['percentiles']
+            self.stats_tree.item(c, values=tuple(
+                f"{v:.3f}" for v in (st['mean'], st['std'], st['min'], st['max'],
+                                     st['ema'], pct[5], pct[50], pct[95])))
+    
+    def update_fault_risk(self, warning, tau_pred):
+        if warning:
+            self.lbl_fault_risk.config(text=f"Fault risk: HIGH (predicted {tau_pred:.2f} Nm)",
+                                       foreground="red")
+        else:
+            self.lbl_fault_risk.config(text="Fault risk: OK", foreground="green")
+    
+    def update_spectrum(self, result):
+        parts = []
+        for c, r in result.items():
+            bands = " ".join(f"{k} {v:.3g}" for k, v in r['bands'].items())
+            parts.append(f"{c}: {r['dominant_hz']:.2f} Hz ({bands})")
+        self.lbl_spectrum.config(text="   |   ".join(parts))
+    
     def log(self, msg):
         self.txt.insert("end", msg + "\n")
         self.txt.see("end")
@@ -490,6 +575,7 @@ class GamePage(BasePage):
         super().__init__(parent, app)
         self.cal_step = 0
         self.cal_data = {}
+        self.capture = StableCapture()
         self._build_ui()
     
     def _build_ui(self):
@@ -511,6 +597,9 @@ class GamePage(BasePage):
                                        font=("Arial", 40, "bold"), foreground="#2c3e50")
         self.lbl_cal_value.pack(pady=10)
         
+        self.chart = StripChart(val_frame, STRIP_TRACES, source=self.app.trace_buffer, height=100)
+        self.chart.pack(fill="x", padx=10, pady=(0, 10))
+        
         # Calibration/Game container
         self.cal_container = ttk.Frame(self)
         self.cal_container.grid(row=2, column=0, sticky="nsew")
@@ -538,6 +627,13 @@ class GamePage(BasePage):
                                      font=("Arial", 14), wraplength=400, justify="center")
         self.lbl_cal_instr.pack(pady=20)
         
+        # Stability indicator: fills while the wrist is held still, captures when full
+        self.cal_stability = ttk.Progressbar(self.frm_cal_steps, maximum=1.0, length=300)
+        self.cal_stability.pack(padx=40, pady=(0, 5))
+        self.lbl_cal_status = ttk.Label(self.frm_cal_steps, text="", font=("Arial", 11))
+        self.lbl_cal_status.pack(pady=(0, 10))
+        
+        # Manual override: takes the median of the samples collected so far
         self.btn_cal_action = ttk.Button(self.frm_cal_steps, text="CAPTURE VALUE", 
                                         command=self.next_calibration_step)
         self.btn_cal_action.pack(fill="x", padx=40, pady=10, ipady=10)
@@ -549,8 +645,9 @@ class GamePage(BasePage):
         self.frm_game_select = ttk.LabelFrame(self.cal_container, 
                                              text="Select Game", padding=20)
         
-        tk.Label(self.frm_game_select, text="Calibration Complete!", 
-                font=("Arial", 14, "bold"), fg="green").pack(pady=(10, 5))
+        self.lbl_cal_done = tk.Label(self.frm_game_select, text="Calibration Complete!", 
+                                     font=("Arial", 14, "bold"), fg="green")
+        self.lbl_cal_done.pack(pady=(10, 5))
         
         ttk.Button(self.frm_game_select, text="GAME 1: Flexion", 
                   command=lambda: self.app.launch_game(GAME_1_PATH)).pack(
@@ -569,6 +666,23 @@ class GamePage(BasePage):
         ttk.Button(self.frm_game_select, text="Re-Calibrate Device", 
                   command=self.reset_to_calibration).pack(pady=5)
     
+    def show(self):
+        # A patient with a saved calibration goes straight to the games
+        profile = self.app.calibration_profile
+        if self.cal_step == 0 and profile is not None:
+            self.show_game_selection(profile)
+        elif self.cal_step == 0:
+            self.reset_to_calibration()
+    
+    def show_game_selection(self, profile):
+        created = profile['created'][:16].replace("T", " ")
+        self.lbl_cal_done.config(
+            text=f"Calibration of {created}\n"
+                 f"neutral {profile['neutral']:.1f}°, flexion {profile['flexion']:.1f}°, "
+                 f"extension {profile['extension']:.1f}°")
+        self.frm_cal_wizard.pack_forget()
+        self.frm_game_select.pack(fill="both", expand=True, padx=10, pady=10)
+    
     def reset_to_calibration(self):
         self.frm_cal_wizard.pack(fill="both", expand=True, padx=10, pady=10)
         self.frm_game_select.pack_forget()
@@ -580,6 +694,7 @@ class GamePage(BasePage):
             return
         self.cal_step = 1
         self.cal_data = {}
+        self.capture.reset()
         self.btn_start_cal.pack_forget()
         self.frm_cal_steps.pack(fill="both", expand=True)
         self.update_wizard_ui()
@@ -589,23 +704,40 @@ class GamePage(BasePage):
         self.frm_cal_steps.pack_forget()
         self.btn_start_cal.pack(fill="x", pady=40, ipady=15)
     
-    def next_calibration_step(self):
-        val = self.app.current_theta_deg
+    def next_calibration_step(self, val=None):
+        """Store the current step (val: stable capture, else the median so far) and advance."""
+        if val is None:
+            val = self.capture.value()
+            if val is None:
+                val = self.app.current_theta_deg
+        self.app.log(f"# Calibration step {self.cal_step}: {val:.2f}° "
+                     f"(spread {self.capture.std():.2f}° over {len(self.capture.samples)} samples)")
         if self.cal_step == 1:
             self.cal_data['neutral'] = val
             self.cal_step = 2
+            self.capture.reset([val], CAPTURE_MIN_ROM_DEG, neutral=val)
             self.update_wizard_ui()
         elif self.cal_step == 2:
             self.cal_data['flexion'] = val
             self.cal_step = 3
+            # Extension lies on the other side of neutral than flexion
+            neutral = self.cal_data['neutral']
+            self.capture.reset([neutral, val], CAPTURE_MIN_ROM_DEG, neutral=neutral,
+                               side=-1 if val > neutral else 1)
             self.update_wizard_ui()
         elif self.cal_step == 3:
+            self.cal_step = 0
             self.cal_data['extension'] = val
             self.save_calibration_json()
-            self.frm_cal_wizard.pack_forget()
-            self.frm_game_select.pack(fill="both", expand=True, padx=10, pady=10)
+            if self.app.calibration_profile is not None:
+                self.show_game_selection(self.app.calibration_profile)
+            else:
+                self.frm_cal_wizard.pack_forget()
+                self.frm_game_select.pack(fill="both", expand=True, padx=10, pady=10)
     
     def update_wizard_ui(self):
+        self.cal_stability['value'] = 0.0
+        self.lbl_cal_status.config(text="Hold the position...")
         if self.cal_step == 1:
             self.lbl_cal_instr.config(text="STEP 1: Straight (Neutral)", fg="blue")
             self.btn_cal_action.config(text="CAPTURE NEUTRAL")
@@ -618,24 +750,54 @@ class GamePage(BasePage):
     
     def save_calibration_json(self):
         try:
+            # Last calibration made, for games started without a profile
             with open(CALIBRATION_FILE, 'w') as f:
                 json.dump(self.cal_data, f, indent=4)
             
+            p_id = self.app.current_patient_id or "guest"
+            profile = self.app.calibration_store.save(p_id, self.cal_data, device_id(self.app.port))
+            if profile['valid']:
+                self.app.use_calibration_profile(profile)
+            else:
+                self.app.log("# Calibration range too small, profile not used for games.")
+            
             if self.app.current_patient_id:
                 f_rom = self.cal_data.get('flexion', 0.0)
                 e_rom = self.cal_data.get('extension', 0.0)
                 self.app.patient_db.update_active_session(self.app.current_patient_id, {
                     "flexion_rom": round(f_rom, 2),
-                    "extension_rom": round(e_rom, 2)
+                    "extension_rom": round(e_rom, 2),
+                    "calibration_profile": profile['id']
                 })
             
-            self.app.log("# Calibration Saved.")
+            self.app.log(f"# Calibration Saved (profile {profile['id']}).")
             messagebox.showinfo("Success", "Calibration saved to Session.")
         except Exception as e:
             messagebox.showerror("Error", f"Save failed: {e}")
     
     def update_angle_display(self, angle_deg):
         self.lbl_cal_value.config(text=f"{angle_deg:.2f}°")
+        if self.cal_step:
+            self._on_capture_sample(angle_deg)
+    
+    def _on_capture_sample(self, angle_deg):
+        val = self.capture.add(angle_deg)
+        if val is not None:
+            self.next_calibration_step(val)
+            return
+        self.cal_stability['value'] = self.capture.progress()
+        placement = self.capture.placement()
+        if not self.capture.samples.is_full():
+            status = "Hold the position..."
+        elif placement == TOO_CLOSE:
+            status = "Move further from the previous position"
+        elif placement == WRONG_SIDE:
+            status = "Bend the other way, past neutral"
+        elif placement == SHORT_OF_PEAK:
+            status = "Go back to the furthest position reached"
+        else:
+            status = f"Hold still (moving ±{self.capture.std():.1f}°)"
+        self.lbl_cal_status.config(text=status)
 
 
 # ============================================================================
@@ -647,25 +809,46 @@ class RehabGUI:
         self.root.title("Wrist Rehab – Unified System")
         self.root.geometry("900x700")
         
-        # Serial communication
-        self.ser_thread = None
-        self.stop_event = threading.Event()
+        # Serial communication (the manager replaces the worker after a link loss)
+        self.connection = ConnectionManager(self._make_worker, on_lost=self._on_link_lost,
+                                            on_restored=self._on_link_restored,
+                                            on_reset=self._on_silent_reset,
+                                            on_failed=self._on_connect_failed)
+        self.port = None
+        self.baud = None
         self.msg_queue = queue.Queue()
         self.raw_queue = queue.Queue()
+        self.ui_queue = queue.Queue()   # (callback, arg) pairs to run on the Tk thread
         self.connected = False
         
         # Session data
         self.session_file = None
         self.csv_writer = None
         self.session_active = False
+        self.link_outages = []   # outages during the current session, saved with it
+        self.soften_steps = []   # auto-soften steps during the current session, saved with it
         self.current_theta_deg = 0.0
+        self.telemetry_stats = TelemetryStats(COLS)
+        self.trace_buffer = RingBuffer(STRIP_SPAN, width=len(STRIP_TRACES))
+        self.spectrum = StreamingSpectrum(["w_meas", "tau_ext"])
+        self.fault_predictor = FaultPredictor()
+        self.last_soften_time = 0.0
+        
+        # Last acknowledged device parameters (only changes are sent)
+        self.device_config = DeviceConfig()
+        self.device_state = DeviceStateMirror()
+        self.restore_future = None
+        
+        # Callables fed every parsed telemetry line (list of floats in COLS order)
+        self.telemetry_subscribers = []
         
         # Patient data
-        self.patient_db = PatientDatabase()
+        self.patient_db = open_patient_database(PATIENT_DB_FILE)
         self.current_patient_id = None
         self.current_patient = None
         
         # MVC parameters
+        self.mvc_test = None
         self.last_J = None
         self.last_B = None
         self.last_K = None
@@ -673,7 +856,14 @@ class RehabGUI:
         
         # Game tracking
         self.current_game_process = None
-        self.current_game_json_path = None
+        self.current_game_started = None
+        self.score_service = ScoreService(PATIENT_DB_FILE)
+        self.score_service.import_legacy()
+        self.calibration_store = CalibrationStore(PATIENT_DB_FILE)
+        self.calibration_profile = None   # profile the games are launched with
+        self.rom_tracker = RomTracker()   # refines the profile's range from the live angle
+        self.shared_pending = None        # newest (angle, button) not yet written for the games
+        self.shared_published = 0.0       # time.monotonic() of the last shared data write
         
         # Build UI
         self.container = ttk.Frame(root)
@@ -693,6 +883,9 @@ class RehabGUI:
         
         # Start polling
         self._poll_queues()
+        self._refresh_stats()
+        self._refresh_spectrum()
+        self._poll_device_state()
     
     def show_page(self, page_name):
         """Switch to a different page"""
@@ -708,9 +901,26 @@ class RehabGUI:
         """Load a patient and switch to therapy page"""
         self.current_patient_id = p_id
         self.current_patient = self.patient_db.get_patient(p_id)
+        self._load_calibration_profile()
         self.pages["therapy"].update_patient_info(self.current_patient)
         self.show_page("therapy")
     
+    def _load_calibration_profile(self):
+        """Pick the patient's newest valid calibration, made on the connected device if possible"""
+        p_id = self.current_patient_id or "guest"
+        device = device_id(self.port)
+        profile = self.calibration_store.latest(p_id, device)
+        self.use_calibration_profile(profile)
+        if profile is not None:
+            self.log(f"# Calibration profile {profile['id']} of {profile['created'][:16]} "
+                     f"loaded for {p_id}" + ("" if profile['device'] == device
+                                              else f" (made on {profile['device']})"))
+    
+    def use_calibration_profile(self, profile):
+        """Launch games with profile and track the patient's range starting from it"""
+        self.calibration_profile = profile
+        self.rom_tracker.reset(profile)
+    
     def toggle_connection(self):
         """Connect or disconnect from serial port"""
         if not self.connected:
@@ -718,46 +928,171 @@ class RehabGUI:
         else:
             self._disconnect()
     
+    @property
+    def ser_thread(self):
+        return self.connection.worker
+    
+    def _make_worker(self):
+        worker = SerialWorker(self.port, self.baud, self.msg_queue, self.raw_queue, threading.Event())
+        worker.start()
+        return worker
+    
     def _connect(self):
         port = self.pages["therapy"].port_cmb.get()
         if not port:
             return
         
-        baud = int(self.pages["therapy"].baud_cmb.get())
-        self.stop_event.clear()
-        self.ser_thread = SerialWorker(port, baud, self.msg_queue, self.raw_queue, self.stop_event)
-        self.ser_thread.start()
+        self.port = port
+        self.baud = int(self.pages["therapy"].baud_cmb.get())
+        if self.current_patient_id:
+            self._load_calibration_profile()   # prefer a profile made on this device
+        self.connection.start()
         self.connected = True
         self.pages["therapy"].btn_connect.config(text="Disconnect")
         
         # CSV logging will be started when MVC test creates a session
         self.session_file = None
         self.csv_writer = None
-        
-        # Initialize Arduino
-        time.sleep(1.0)
-        self._send("adm off")
-        time.sleep(0.2)
-        self.log("# Admittance disabled on connect")
+        self._initialize_device()
+    
+    def _initialize_device(self):
+        """Bring a freshly opened device to the host's state (retried until it has booted)"""
+        self.device_config.invalidate()
+        self.device_state.clear()
+        if self.current_patient and self.session_active:
+            self._restore_controller_parameters()
+        else:
+            self.device_config.set(adm=False)
+            self._send("adm off", on_done=lambda f: self._log_command(f, "# Admittance disabled on connect"),
+                       timeout=1.0, retries=5)
+        self._send("get state", quiet=True)
+    
+    def _restore_controller_parameters(self):
+        """Restore mass, arm length, and admittance parameters after Arduino reset (one cfg line)."""
+        try:
+            w = float(self.pages["therapy"].therapy_weight_var.get())
+            mass = 0.006 * w + 0.072
+            length = float(self.pages["therapy"].arm_length_var.get())
+        except ValueError as e:
+            self.log(f"# Warning: Could not restore all parameters: {e}")
+            return None
+        
+        values = {'mass': mass, 'arm': length}
+        hold_eq = False
+        if self.last_J is not None and self.last_B is not None and self.last_K is not None:
+            K = self.last_K if self.spring_enabled else 0.0
+            values.update(J=self.last_J, B=self.last_B, K=K, adm=True)
+            hold_eq = True
+        
+        self.device_config.invalidate()
+        self.restore_future = self._apply_config(
+            on_done=lambda f: self._log_command(f, "# Session parameters restored - ready to continue"),
+            tare=True, eq_hold=hold_eq, **values)
+        return self.restore_future
+    
+    def _on_link_lost(self, reason):
+        """Link dead: keep the session, stop anything that needs live data and reconnect"""
+        self.log(f"# WARNING: connection lost ({reason}) - reconnecting...")
+        self._abort_mvc()
+        self.device_config.invalidate()
+        self.device_state.clear()
+    
+    def _on_link_restored(self, outage_s, attempts):
+        self.log(f"# Connection restored after {outage_s:.1f} s ({attempts} attempt(s))")
+        self._record_outage("link lost", outage_s)
+        self._initialize_device()
+    
+    def _on_silent_reset(self, gap_s):
+        self._on_device_reset(f"ready banner after {gap_s:.1f} s without data", gap_s)
+    
+    def _on_connect_failed(self, reason):
+        self.log(f"# ERROR: could not connect ({reason})")
+        self._disconnect()
+    
+    def _on_device_reset(self, reason, outage_s=0.0):
+        """
+        The firmware rebooted with the link up: its parameters are back at defaults and
+        Admittance::begin() has turned admittance on again. Re-initialize like a fresh
+        connection (session parameters restored, or 'adm off' outside a session).
+        """
+        self.log(f"# WARNING: device reset detected ({reason})")
+        self._abort_mvc()
+        self._record_outage("device reset", outage_s)
+        # The banner and the uptime readback can both report the same reset
+        restoring = self.restore_future is not None and not self.restore_future.done()
+        if not restoring:
+            self._initialize_device()
+    
+    def _record_outage(self, kind, outage_s):
+        """Add an outage that just ended to the current session record"""
+        if not (self.current_patient_id and self.session_file):
+            return
+        start = datetime.now() - timedelta(seconds=outage_s)
+        self.link_outages.append({'start': start.isoformat(), 'kind': kind,
+                                  'duration_s': round(outage_s, 2)})
+        self.patient_db.update_active_session(self.current_patient_id,
+                                              {'link_outages': self.link_outages})
     
     def _disconnect(self):
-        self.stop_event.set()
+        self._abort_mvc()
+        self.connection.stop()
         self.connected = False
         self.pages["therapy"].btn_connect.config(text="Connect")
         self.session_active = False
         self.pages["therapy"].btn_stop_session.config(state="disabled")
         self.pages["therapy"].btn_goto_games.config(state="disabled")
-        if self.session_file:
-            self.session_file.close()
+        self._close_session_file()
     
-    def _send(self, cmd):
-        """Send command to Arduino"""
-        try:
-            if self.ser_thread and self.ser_thread.ser and self.ser_thread.ser.is_open:
-                self.ser_thread.ser.write((cmd + "\n").encode("utf-8"))
-                self.log(f">> {cmd}")
-        except:
-            pass
+    def _close_session_file(self):
+        """Close the session CSV and build its overview pyramid in the background"""
+        if not self.session_file:
+            return
+        path = self.session_file.name
+        self.session_file.close()
+        self.session_file = None
+        self.csv_writer = None
+        
+        def _build():
+            try:
+                build_pyramid(path)
+                self.msg_queue.put(("#INFO", f"Overview pyramid built for {os.path.basename(path)}"))
+            except Exception as e:
+                self.msg_queue.put(("#ERROR", f"Pyramid build failed: {e}"))
+        threading.Thread(target=_build, daemon=True).start()
+    
+    def _send(self, cmd, on_done=None, quiet=False, **kwargs):
+        """
+        Queue a command for the Arduino. Returns a Future resolved with the
+        acknowledgement line; on_done(future) is called on the Tk thread.
+        """
+        if not (self.connected and self.ser_thread):
+            return None
+        future = self.ser_thread.commands.submit(cmd, **kwargs)
+        if not quiet:
+            self.log(f">> {cmd}")
+        if on_done:
+            future.add_done_callback(lambda f: self.ui_queue.put((on_done, f)))
+        return future
+    
+    def _apply_config(self, on_done=None, tare=False, eq_hold=False, **values):
+        """Send the changed device parameters as one cfg line (see device_config.py)"""
+        if not self.connected:
+            return None
+        future = self.device_config.apply(self._send, tare=tare, eq_hold=eq_hold, **values)
+        if on_done:
+            future.add_done_callback(lambda f: self.ui_queue.put((on_done, f)))
+        return future
+    
+    def _log_command(self, future, ok_msg):
+        """on_done helper: log ok_msg, or the error if the command failed. Returns the error."""
+        error = future.exception()
+        if not error and future.result() and future.result().startswith("# cfg error"):
+            error = future.result()[2:]
+        if error:
+            self.log(f"# WARNING: {error}")
+        else:
+            self.log(ok_msg)
+        return error
     
     def _poll_queues(self):
         """Poll serial queues for incoming data"""
@@ -775,11 +1110,42 @@ class RehabGUI:
         except queue.Empty:
             pass
         
+        try:
+            while True:
+                callback, arg = self.ui_queue.get_nowait()
+                callback(arg)
+        except queue.Empty:
+            pass
+        
+        self._flush_shared_data()
+        self.connection.tick()
         self.root.after(50, self._poll_queues)
     
+    def _publish_shared_data(self, angle, button):
+        """Queue a sample for the games; the file is written at most SHARED_PUBLISH_HZ times a second"""
+        self.shared_pending = (angle, button)
+        if time.monotonic() - self.shared_published >= 1.0 / SHARED_PUBLISH_HZ:
+            self._flush_shared_data()
+    
+    def _flush_shared_data(self):
+        if self.shared_pending is None:
+            return
+        angle, button = self.shared_pending
+        self.shared_pending = None
+        self.shared_published = time.monotonic()
+        publish_shared_data(angle, button, rom=self.rom_tracker.rom())
+    
     def _handle_line(self, s):
         """Process incoming serial line"""
+        self.connection.on_line(s)
         if s.startswith("#"):
+            if s.startswith("# state"):
+                self._on_device_state(self.device_state.update(s))
+                return
+            if s == READY_BANNER:
+                # Resets seen by the banner are reported by the connection manager
+                self.device_state.on_banner()
+            self.device_config.observe(s)
             self.log(s)
             return
         
@@ -788,6 +1154,11 @@ class RehabGUI:
             try:
                 raw_angle = float(parts[0])
                 self.current_theta_deg = raw_angle
+                self.rom_tracker.update(raw_angle)
+                
+                # Publish to the shared data file read by the games, with the tracked range
+                if len(parts) >= 2:
+                    self._publish_shared_data(raw_angle, float(parts[1]))
                 
                 # Update angle displays
                 if self.current_page == "game":
@@ -802,11 +1173,92 @@ class RehabGUI:
                     if self.current_page == "therapy":
                         self.pages["therapy"].lbl_tau.config(text=f"tau: {vals[5]:.3f}")
                     
+                    self.telemetry_stats.update(vals)
+                    self.trace_buffer.append((vals[0], vals[5]))
+                    self.spectrum.update(time.time(), (vals[4], vals[5]))
+                    fault_event = self.fault_predictor.update(vals[5])
+                    if fault_event:
+                        self._on_fault_prediction(fault_event)
+                    
+                    for callback in list(self.telemetry_subscribers):
+                        callback(vals)
+                    
                     if self.csv_writer:
                         self.csv_writer.writerow([time.time()] + vals)
             except:
                 pass
     
+    def _refresh_stats(self):
+        """Push running statistics to the therapy page at display rate"""
+        if self.current_page == "therapy" and self.telemetry_stats.dirty:
+            self.pages["therapy"].update_stats(self.telemetry_stats.snapshot())
+        self.root.after(STATS_REFRESH_MS, self._refresh_stats)
+    
+    def _on_fault_prediction(self, event):
+        """Warn (and optionally soften the admittance) before the firmware latches a fault"""
+        fp = self.fault_predictor
+        self.pages["therapy"].update_fault_risk(fp.warning, fp.tau_pred)
+        if event != "warn":
+            self.log("# Fault risk cleared")
+            return
+        self.log(f"# WARNING: torque predicted to reach {fp.tau_pred:.2f} Nm "
+                 f"(fault limit {fp.limit:.1f} Nm)")
+        
+        if not self.pages["therapy"].auto_soften_var.get():
+            return
+        if self.last_J is None or not self.connected:
+            return
+        now = time.time()
+        if now - self.last_soften_time < SOFTEN_COOLDOWN_S:
+            return
+        self.last_soften_time = now
+        current = (self.last_J, self.last_B, self.last_K)
+        params = softened(*current, floor=params_from_tau_ref(MIN_TAU_REF))
+        if params == current:
+            self.log(f"# Auto-soften: already at the minimum (tau_ref {MIN_TAU_REF}), not softening further")
+            return
+        self.last_J, self.last_B, self.last_K = params
+        K = self.last_K if self.spring_enabled else 0.0
+        self._apply_config(J=self.last_J, B=self.last_B, K=K)
+        self.log(f"# Auto-soften: J={self.last_J:.4f}, B={self.last_B:.4f}, K={K:.4f}")
+        self._record_soften(self.last_J, self.last_B, K)
+    
+    def _record_soften(self, J, B, K):
+        """Keep the session's J/B/K equal to what the device runs after an auto-soften"""
+        if not (self.current_patient_id and self.session_file):
+            return
+        self.soften_steps.append({'time': datetime.now().isoformat(), 'J': J, 'B': B, 'K': K})
+        self.patient_db.update_active_session(self.current_patient_id, {
+            'J': J, 'B': B, 'K': K, 'auto_soften': self.soften_steps})
+    
+    def _poll_device_state(self):
+        """Read back the live device parameters while the command queue is idle"""
+        if self.connected and self.ser_thread and not len(self.ser_thread.commands):
+            self._send("get state", quiet=True)
+        self.root.after(STATE_POLL_MS, self._poll_device_state)
+    
+    def _on_device_state(self, events):
+        """A state frame (or banner) arrived: resync the config and react to resets/faults"""
+        if self.device_state.valid:
+            self.device_config.sync(self.device_state.config_values())
+        if FAULT_LATCHED in events:
+            self.log("# WARNING: torque fault latched on the device - press Clear Fault")
+            self.pages["therapy"].update_fault_risk(True, self.fault_predictor.limit)
+        if RESET in events:
+            self._on_device_reset("device uptime went backwards")
+    
+    def _refresh_spectrum(self):
+        """Run the FFTs for the windows completed since the last call"""
+        result = self.spectrum.analyze()
+        if result and self.current_page == "therapy":
+            self.pages["therapy"].update_spectrum(result)
+        self.root.after(SPECTRUM_REFRESH_MS, self._refresh_spectrum)
+    
+    def reset_telemetry_stats(self):
+        self.telemetry_stats.reset()
+        self.spectrum.reset()
+        self.log("# Telemetry statistics reset")
+    
     def log(self, msg):
         """Log message to therapy page"""
         if self.current_page == "therapy" or True:  # Always log
@@ -823,17 +1275,19 @@ class RehabGUI:
             return
         
         try:
-            self._send("tare")
-            time.sleep(0.3)
-            self.log("# Load cell tared")
-            
             w = float(self.pages["therapy"].therapy_weight_var.get())
             mass = 0.006 * w + 0.072
             self.patient_db.update_patient(self.current_patient_id, weight=w)
-            self._send(f"totalmass {mass:.4f}")
-            time.sleep(0.1)
-            self.log(f"# Mass set: {mass:.4f} kg (from weight: {w} kg)")
-            messagebox.showinfo("Success", f"Mass set to {mass:.4f} kg")
+            self.current_patient = self.patient_db.get_patient(self.current_patient_id)
+            
+            def _done(future):
+                error = self._log_command(future, f"# Load cell tared, mass set: {mass:.4f} kg "
+                                                  f"(from weight: {w} kg)")
+                if error:
+                    messagebox.showerror("Error", f"Failed to set mass: {error}")
+                else:
+                    messagebox.showinfo("Success", f"Mass set to {mass:.4f} kg")
+            self._apply_config(on_done=_done, tare=True, mass=mass)
         except ValueError:
             messagebox.showerror("Error", "Invalid weight value")
         except Exception as e:
@@ -849,10 +1303,13 @@ class RehabGUI:
             if length <= 0:
                 messagebox.showerror("Error", "Arm length must be positive")
                 return
-            self._send(f"armlength {length:.4f}")
-            time.sleep(0.1)
-            self.log(f"# Arm length set: {length:.4f} m")
-            messagebox.showinfo("Success", f"Arm length set to {length:.4f} m")
+            def _done(future):
+                error = self._log_command(future, f"# Arm length set: {length:.4f} m")
+                if error:
+                    messagebox.showerror("Error", f"Failed to set arm length: {error}")
+                else:
+                    messagebox.showinfo("Success", f"Arm length set to {length:.4f} m")
+            self._apply_config(on_done=_done, arm=length)
         except ValueError:
             messagebox.showerror("Error", "Invalid arm length value")
         except Exception as e:
@@ -862,33 +1319,53 @@ class RehabGUI:
         if not self.current_patient or not self.connected:
             messagebox.showerror("Error", "Connect & Load Patient")
             return
+        if self.mvc_test and self.mvc_test.running:
+            return
         
-        if self.session_active:
-            self._send("adm off")
-            time.sleep(0.2)
-            self.session_active = False
-        
-        self.log("MVC Started...")
-        self._send("adm off")
-        time.sleep(0.5)
-        self._send("eq hold")
-        time.sleep(0.2)
-        
-        t_end = time.time() + 5.0
-        tau_max = 0.0
+        try:
+            trials = int(self.pages["therapy"].mvc_trials_var.get())
+            rest_s = float(self.pages["therapy"].mvc_rest_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Error", "Invalid number of trials or rest time")
+            return
         
-        while time.time() < t_end:
-            self.root.update()
-            try:
-                line = self.raw_queue.get(timeout=0.1)
-                self._handle_line(line)
-                parts = line.split(',')
-                if len(parts) == len(COLS):
-                    t = float(parts[5])
-                    if t > tau_max:
-                        tau_max = t
-            except:
-                pass
+        self.session_active = False
+        self.log(f"MVC Started... ({trials} trial(s), {rest_s:.0f} s rest)")
+        self.mvc_test = MvcTest(self.root.after, self.root.after_cancel, self._send,
+                                on_progress=self._mvc_progress, on_done=self._mvc_done,
+                                trials=trials, rest_s=rest_s)
+        self.telemetry_subscribers.append(self.mvc_test.on_sample)
+        self.pages["therapy"].btn_run_mvc.config(state="disabled")
+        self.pages["therapy"].mvc_label.config(text="Preparing... relax the wrist")
+        self.mvc_test.start()
+    
+    def _mvc_progress(self, state, trial, remaining, peak):
+        n = self.mvc_test.n_trials
+        if state == RECORD:
+            text = f"Trial {trial}/{n}: PUSH! {remaining:.1f} s left | Peak: {peak:.2f} Nm"
+        else:
+            text = f"Rest - trial {trial + 1}/{n} starts in {remaining:.0f} s"
+        self.pages["therapy"].mvc_label.config(text=text)
+    
+    def _end_mvc_test(self):
+        if self.mvc_test and self.mvc_test.on_sample in self.telemetry_subscribers:
+            self.telemetry_subscribers.remove(self.mvc_test.on_sample)
+        self.pages["therapy"].btn_run_mvc.config(state="normal")
+    
+    def _abort_mvc(self):
+        if self.mvc_test and self.mvc_test.running:
+            self.mvc_test.abort()
+            self._end_mvc_test()
+            self.pages["therapy"].mvc_label.config(text="Results: - (MVC aborted)")
+            self.log("# MVC aborted")
+    
+    def _mvc_done(self, tau_max, trials):
+        """All trials recorded: derive J/B/K and start the therapy session"""
+        self._end_mvc_test()
+        for tr in trials:
+            self.log(f"# MVC trial {tr['trial']}: plateau {tr['plateau']:.3f} Nm, "
+                     f"peak {tr['peak']:.3f} Nm, {tr['samples']} samples"
+                     + (" (rejected)" if tr['rejected'] else ""))
         
         if tau_max <= 0:
             tau_max = 1.0
@@ -900,9 +1377,7 @@ class RehabGUI:
             self.log(f"# WARNING: tau_ref {tau_ref:.2f} below minimum. Using {MIN_TAU_REF}")
             tau_ref = MIN_TAU_REF
         
-        J = tau_ref / 27.9253
-        K = tau_ref / 1.0472
-        B = 2 * 1 * math.sqrt(J * K)
+        J, B, K = params_from_tau_ref(tau_ref)
         
         self.last_J = J
         self.last_B = B
@@ -918,7 +1393,11 @@ class RehabGUI:
             'type': 'THERAPY_SESSION',
             'mvc_tau_max': tau_max,
             'mvc_tau_ref': tau_ref,
+            'mvc_trials': trials,
             'difficulty': diff,
+            'J': J,
+            'B': B,
+            'K': K,
             'flexion_rom': 0.0,
             'extension_rom': 0.0,
             'session_highscore_flex': 0,
@@ -926,6 +1405,7 @@ class RehabGUI:
             'session_highscore_ext': 0
         }
         self.patient_db.create_new_session(self.current_patient_id, master_session)
+        self.current_patient = self.patient_db.get_patient(self.current_patient_id)
         
         # Create CSV file with patient name and session number
         patient_name = self.current_patient['name'].replace(' ', '_')
@@ -934,29 +1414,64 @@ class RehabGUI:
         csv_filename = f"{patient_name}_session{session_num:03d}_{ts}.csv"
         
         # Start CSV logging
-        if self.session_file:
-            self.session_file.close()
+        self._close_session_file()
         self.session_file = open(csv_filename, "w", newline="")
         self.csv_writer = csv.writer(self.session_file)
         self.csv_writer.writerow(["timestamp"] + COLS)
+        self.link_outages = []
+        self.soften_steps = []
+        self.telemetry_stats.reset()
+        self.spectrum.reset()
+        self.fault_predictor.reset()
         
         self.log(f"# Session Created. MVC saved. Logging to: {csv_filename}")
         
-        self._send(f"adm {J:.4f} {B:.4f} {K:.4f}")
-
-        time.sleep(0.2)
-        self._send("adm on")
-        time.sleep(0.2)
-        self.log("# Admittance enabled after MVC")
+        self._apply_config(on_done=lambda f: self._log_command(f, "# Admittance enabled after MVC"),
+                           J=J, B=B, K=K, adm=True)
         
         self.session_active = True
         self.pages["therapy"].btn_stop_session.config(state="normal")
         self.pages["therapy"].btn_goto_games.config(state="normal")
         messagebox.showinfo("MVC Done", "Admittance Active. Therapy session started. Go to Games.")
     
+    def preview_admittance_sweep(self):
+        """Simulate scaled J/B/K candidates against the recorded tau_ext of this session"""
+        if self.last_J is None:
+            messagebox.showerror("Error", "Run MVC test first to calculate admittance parameters")
+            return
+        if not self.session_file:
+            messagebox.showerror("Error", "No session log to preview against")
+            return
+        
+        self.session_file.flush()
+        t, tau = session_columns(self.session_file.name, ["timestamp", "tau_ext"])
+        if len(t) < 2:
+            messagebox.showerror("Error", "Not enough recorded data yet")
+            return
+        t = device_time(t)
+        recent = t >= t[-1] - ADM_PREVIEW_SECONDS
+        trace = resample_trace(t[recent], tau[recent], POS_DT_S)
+        
+        K = self.last_K if self.spring_enabled else 0.0
+        Js, Bs, Ks = candidate_grid(self.last_J, self.last_B, K, ADM_PREVIEW_SCALES)
+        t0 = time.perf_counter()
+        res = simulate(trace, Js, Bs, Ks)
+        elapsed_ms = (time.perf_counter() - t0) * 1000
+        
+        self.log(f"# Preview: {len(Js)} candidates over {len(trace) * POS_DT_S:.0f} s of tau_ext "
+                 f"in {elapsed_ms:.0f} ms")
+        n = len(ADM_PREVIEW_SCALES)
+        for i, scale in enumerate(ADM_PREVIEW_SCALES):
+            idx = i * n * n + i * n + i  # same scale on J, B and K
+            lo = np.degrees(res['theta_min'][idx])
+            hi = np.degrees(res['theta_max'][idx])
+            self.log(f"#   x{scale:.2f}: J={Js[idx]:.4f} B={Bs[idx]:.4f} K={Ks[idx]:.4f} -> "
+                     f"ROM {lo:+.1f}..{hi:+.1f} deg, peak {res['w_peak'][idx]:.2f} rad/s")
+    
     def stop_session(self):
         if not self.connected:
             return
+        self.device_config.set(adm=False)
         self._send("adm off")
         self._send("w 0")
         self.session_active = False
@@ -983,14 +1498,14 @@ class RehabGUI:
                 K = 0.0
                 self.spring_enabled = False
                 self.pages["therapy"].btn_toggle_spring.config(text="Spring: OFF")
-                self._send(f"adm {J:.4f} {B:.4f} {K:.4f}")
+                self._apply_config(J=J, B=B, K=K)
                 self.log(f"# Spring disabled: K=0, J={J:.4f}, B={B:.4f}")
                 messagebox.showinfo("Success", "Spring effect disabled (K=0)")
             else:
                 K = self.last_K
                 self.spring_enabled = True
                 self.pages["therapy"].btn_toggle_spring.config(text="Spring: ON")
-                self._send(f"adm {J:.4f} {B:.4f} {K:.4f}")
+                self._apply_config(J=J, B=B, K=K)
                 self.log(f"# Spring enabled: K={K:.4f}, J={J:.4f}, B={B:.4f}")
                 messagebox.showinfo("Success", f"Spring effect enabled (K={K:.4f})")
         except Exception as e:
@@ -1001,9 +1516,9 @@ class RehabGUI:
             messagebox.showerror("Error", "Connect to device first")
             return
         
-        self._send("adm off")
-        time.sleep(0.2)
-        self.log("# ADMITTANCE FORCED OFF")
+        # Always sent, even if the device is believed to be off already
+        self.device_config.set(adm=False)
+        self._send("adm off", on_done=lambda f: self._log_command(f, "# ADMITTANCE FORCED OFF"))
         self.session_active = False
         self.pages["therapy"].btn_stop_session.config(state="disabled")
         messagebox.showinfo("Admittance OFF", "Admittance control has been disabled")
@@ -1014,10 +1529,12 @@ class RehabGUI:
             messagebox.showerror("Error", "Connect to device first")
             return
         
-        self._send("clearfault")
-        time.sleep(0.2)
-        self.log("# Fault cleared - system ready to resume")
-        messagebox.showinfo("Fault Cleared", "Proactive fault stop has been released")
+        def _done(future):
+            if self._log_command(future, "# Fault cleared - system ready to resume"):
+                messagebox.showerror("Error", f"Failed to clear fault: {future.exception()}")
+            else:
+                messagebox.showinfo("Fault Cleared", "Proactive fault stop has been released")
+        self._send("clearfault", on_done=_done)
     
     # ===== GAME LAUNCHING =====
     
@@ -1029,83 +1546,65 @@ class RehabGUI:
         game_dir = os.path.dirname(script_path)
         game_filename = os.path.basename(script_path)
         
-        # Determine game info
-        game_title = "Unknown"
-        score_key = "score_generic"
-        json_filename = None
-        
-        if "flexion" in script_path.lower():
-            game_title = "Game 1: Flexion"
-            score_key = "session_highscore_flex"
-            json_filename = "Highscore_flex.json"
-        elif "game 2" in script_path.lower() or "potentiometer" in script_path.lower():
-            game_title = "Game 2: Mixed"
-            score_key = "session_highscore_all"
-            json_filename = "highscore_all.json"
-        elif "extension" in script_path.lower():
-            game_title = "Game 3: Extension"
-            score_key = "session_highscore_ext"
-            json_filename = "highscore_extension.json"
-        
-        if json_filename:
-            self.current_game_json_path = os.path.join(game_dir, json_filename)
-        else:
-            self.current_game_json_path = None
+        game = game_for_script(script_path)
+        game_title = GAMES[game]["title"] if game else "Unknown"
         
-        # Disconnect to free serial port
-        if self.connected:
-            self._disconnect()
-            time.sleep(0.5)
+        # Keep the serial connection (opening it from the game would reset the
+        # Arduino); the game reads the shared data file instead
+        publish_shared_data(self.current_theta_deg, 1.0, rom=self.rom_tracker.rom())
         
         try:
             p_id = self.current_patient_id if self.current_patient_id else "guest"
             p_name = self.current_patient['name'] if self.current_patient else "Guest"
             
-            self.current_game_process = subprocess.Popen(
-                [sys.executable, game_filename, p_id, p_name],
-                cwd=game_dir
-            )
+            # Plays recorded by the game from now on belong to this launch
+            self.current_game_started = datetime.now().isoformat()
+            args = [sys.executable, game_filename, p_id, p_name, "--use-shared-data"]
+            if self.calibration_profile is not None:
+                args += [PROFILE_ARG, str(self.calibration_profile['id'])]
+            self.current_game_process = subprocess.Popen(args, cwd=game_dir)
             
             self.pages["therapy"].btn_goto_games.config(state="disabled")
-            self.log(f"Launched {game_title}")
+            self.log(f"Launched {game_title} (using shared data mode)")
             
-            self._monitor_game(game_title, score_key)
+            self._monitor_game(game, game_title)
         except Exception as e:
             messagebox.showerror("Launch Error", str(e))
-            self._connect()
     
-    def _monitor_game(self, game_title, score_key):
+    def _monitor_game(self, game, game_title):
         if self.current_game_process.poll() is None:
-            self.root.after(500, lambda: self._monitor_game(game_title, score_key))
+            self.root.after(500, lambda: self._monitor_game(game, game_title))
             return
         
         self.log(f"# {game_title} finished.")
         
         final_session_score = 0
         
-        if self.current_game_json_path and os.path.exists(self.current_game_json_path):
+        if game:
+            p_id = self.current_patient_id if self.current_patient_id else "guest"
             try:
-                with open(self.current_game_json_path, "r") as f:
-                    full_data = json.load(f)
-                
-                p_id = self.current_patient_id if self.current_patient_id else "guest"
-                
-                if p_id in full_data:
-                    final_session_score = full_data[p_id].get("session_highscore", 0)
-                    self.log(f"# Retrieved score for {p_id}: {final_session_score}")
+                best = self.score_service.best_since(p_id, game, self.current_game_started)
+                if best is not None:
+                    final_session_score = best["score"]
+                    self.log(f"# Best play of {p_id}: {best['score']} points, level {best['level']}, "
+                             f"{best['duration_s'] or 0:.0f} s")
                 else:
-                    self.log(f"# No score data found for {p_id}")
+                    self.log(f"# No play recorded for {p_id}")
             except Exception as e:
                 self.log(f"# Error reading game results: {e}")
         
-        if self.current_patient_id:
-            self.patient_db.update_active_session(self.current_patient_id, {
-                score_key: final_session_score
-            })
+        if self.current_patient_id and game:
+            session_update = {GAMES[game]["session_key"]: final_session_score}
+            rom = self.rom_tracker.rom()
+            if rom is not None:
+                # Range the game ended with, as refined from the live angle
+                session_update["tracked_rom"] = rom
+                self.log(f"# Tracked range: flexion {rom['flexion']:.1f}°, "
+                         f"extension {rom['extension']:.1f}° (neutral {rom['neutral']:.1f}°)")
+            self.patient_db.update_active_session(self.current_patient_id, session_update)
             messagebox.showinfo("Game Over", f"Session Updated!\nScore: {final_session_score}")
         
         self.current_game_process = None
-        self._connect()
         self.pages["therapy"].btn_goto_games.config(state="normal")
 
 
@@ -0,0 +1,142 @@
+"""
+Listbox replacement that only draws the rows in view.
+
+The rows are a plain Python list of strings. The canvas holds one highlight
+rectangle and one text item per visible row; scrolling re-labels and moves that
+handful of items instead of creating an item per row, so setting or filtering
+thousands of rows costs a list assignment and a redraw of ~a screenful.
+
+Implements the part of the Listbox interface the GUI uses: curselection,
+selection_set, see, size, yview (for a Scrollbar) and the <<ListboxSelect>> event.
+"""
+import tkinter as tk
+
+# --- VIRTUAL LIST CONFIG ---
+ROW_HEIGHT = 20            # px per row
+LIST_BG = "white"
+LIST_FG = "black"
+SELECT_BG = "#3874d8"
+SELECT_FG = "white"
+TEXT_PAD = 4               # px left of the row text
+
+
+class VirtualList(tk.Canvas):
+    def __init__(self, parent, height=10, row_height=ROW_HEIGHT, yscrollcommand=None,
+                 font="TkDefaultFont", **kwargs):
+        super().__init__(parent, height=height * row_height, bg=LIST_BG,
+                         highlightthickness=1, takefocus=1, **kwargs)
+        self.row_height = row_height
+        self.font = font
+        self.yscrollcommand = yscrollcommand
+        self._rows = []
+        self._offset = 0          # px scrolled from the top
+        self._selected = None
+        self._pool = []           # [(rect id, text id)] reused for the visible rows
+
+        self.bind("<Configure>", lambda e: self._redraw())
+        self.bind("<Button-1>", self._on_click)
+        self.bind("<Up>", lambda e: self._move_selection(-1))
+        self.bind("<Down>", lambda e: self._move_selection(1))
+        self.bind("<Prior>", lambda e: self._move_selection(-self._page_rows()))
+        self.bind("<Next>", lambda e: self._move_selection(self._page_rows()))
+        self.bind("<MouseWheel>", self._on_wheel)                 # Windows / macOS
+        self.bind("<Button-4>", lambda e: self._scroll_to(self._offset - 3 * self.row_height))
+        self.bind("<Button-5>", lambda e: self._scroll_to(self._offset + 3 * self.row_height))
+
+    # ---------- LISTBOX INTERFACE ----------
+    def set_rows(self, rows):
+        """Replace all rows; clears the selection and scrolls to the top."""
+        self._rows = list(rows)
+        self._selected = None
+        self._offset = 0
+        self._redraw()
+
+    def size(self):
+        return len(self._rows)
+
+    def curselection(self):
+        return () if self._selected is None else (self._selected,)
+
+    def selection_set(self, index):
+        if 0 <= index < len(self._rows):
+            self._selected = index
+            self.see(index)
+            self._redraw()
+
+    def see(self, index):
+        top = index * self.row_height
+        bottom = top + self.row_height
+        if top < self._offset:
+            self._scroll_to(top)
+        elif bottom > self._offset + self._view_height():
+            self._scroll_to(bottom - self._view_height())
+
+    def yview(self, *args):
+        total = max(1, len(self._rows) * self.row_height)
+        if not args:
+            first = self._offset / total
+            return first, min(1.0, first + self._view_height() / total)
+        if args[0] == "moveto":
+            self._scroll_to(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = self._view_height() if args[2] == "pages" else self.row_height
+            self._scroll_to(self._offset + int(args[1]) * step)
+
+    # ---------- DRAWING ----------
+    def _view_height(self):
+        return max(self.row_height, self.winfo_height())
+
+    def _page_rows(self):
+        return max(1, self._view_height() // self.row_height - 1)
+
+    def _scroll_to(self, offset):
+        limit = max(0, len(self._rows) * self.row_height - self._view_height())
+        offset = int(min(max(0, offset), limit))
+        if offset != self._offset:
+            self._offset = offset
+            self._redraw()
+
+    def _redraw(self):
+        width = self.winfo_width()
+        needed = self._view_height() // self.row_height + 2
+        while len(self._pool) < needed:
+            self._pool.append((self.create_rectangle(0, 0, 0, 0, width=0),
+                               self.create_text(0, 0, anchor="w", font=self.font)))
+        first = self._offset // self.row_height
+        for k, (rect, text) in enumerate(self._pool):
+            i = first + k
+            if i >= len(self._rows):
+                self.itemconfigure(rect, state="hidden")
+                self.itemconfigure(text, state="hidden")
+                continue
+            y = i * self.row_height - self._offset
+            selected = i == self._selected
+            self.coords(rect, 0, y, width, y + self.row_height)
+            self.itemconfigure(rect, state="normal", fill=SELECT_BG if selected else LIST_BG)
+            self.coords(text, TEXT_PAD, y + self.row_height / 2)
+            self.itemconfigure(text, state="normal", text=self._rows[i],
+                               fill=SELECT_FG if selected else LIST_FG)
+        if self.yscrollcommand:
+            self.yscrollcommand(*self.yview())
+
+    # ---------- INPUT ----------
+    def _select(self, index):
+        self.selection_set(index)
+        self.event_generate("<<ListboxSelect>>")
+
+    def _on_click(self, event):
+        self.focus_set()
+        index = (self._offset + event.y) // self.row_height
+        if index < len(self._rows):
+            self._select(index)
+
+    def _move_selection(self, step):
+        if self._rows:
+            current = -1 if self._selected is None else self._selected
+            self._select(min(max(0, current + step), len(self._rows) - 1))
+        return "break"
+
+    def _on_wheel(self, event):
+        # Windows reports multiples of 120, macOS small deltas
+        units = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self._scroll_to(self._offset - units * 3 * self.row_height)
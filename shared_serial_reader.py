@@ -49,6 +49,27 @@ class SharedSerialReader:
         pass
 
 
+def publish_shared_data(angle, button, timestamp=None, **extra):
+    """
+    Write one sample to the shared file (used by the GUI and the replay tool).
+    The file is replaced atomically so readers never see a half-written JSON.
+    Extra keyword fields are added to the JSON object as-is.
+    """
+    data = {
+        "angle": angle,
+        "button": button,
+        "timestamp": time.time() if timestamp is None else timestamp
+    }
+    data.update(extra)
+    try:
+        tmp = SHARED_DATA_FILE + ".tmp"
+        with open(tmp, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp, SHARED_DATA_FILE)
+    except:
+        pass  # Don't let file write errors break telemetry
+
+
 def get_serial_reader(use_shared_data=False):
     """
     Factory function to get appropriate serial reader.